@@ -22,10 +22,12 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "rest_framework",
     "Portal",
 ]
 
 MIDDLEWARE = [
+    "Portal.middleware.QueryStatsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -35,6 +37,25 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Query statistics per request (Portal.middleware.QueryStatsMiddleware)
+QUERY_STATS_HEADERS = os.environ.get("QUERY_STATS_HEADERS", str(DEBUG)) == "True"
+QUERY_STATS_DUPLICATE_WARNING = 5
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "Portal.queries": {
+            "handlers": ["console"],
+            "level": os.environ.get("QUERY_STATS_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
+}
+
 ROOT_URLCONF = "Jobportal.urls"
 
 TEMPLATES = [
@@ -54,6 +75,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "Jobportal.wsgi.application"
+ASGI_APPLICATION = "Jobportal.asgi.application"
 
 DATABASES = {
     "default": {
@@ -62,6 +84,76 @@ DATABASES = {
     }
 }
 
+# Production SQLite profile for several gunicorn workers, enabled with
+# PORTAL_DB_PROFILE=production. WAL lets reads run alongside the single
+# writer, and BEGIN IMMEDIATE takes the write lock up front so a transaction
+# waits on busy_timeout instead of failing with "database is locked" when it
+# tries to upgrade from a read.
+SQLITE_PRODUCTION_OPTIONS = {
+    "init_command": (
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA mmap_size=268435456;"
+        "PRAGMA cache_size=-65536;"
+        "PRAGMA busy_timeout=10000;"
+        "PRAGMA temp_store=MEMORY;"
+    ),
+    "transaction_mode": "IMMEDIATE",
+    "timeout": 10,
+}
+if os.environ.get("PORTAL_DB_PROFILE") == "production":
+    DATABASES["default"].update(
+        OPTIONS=SQLITE_PRODUCTION_OPTIONS,
+        CONN_MAX_AGE=int(os.environ.get("PORTAL_DB_CONN_MAX_AGE", 600)),
+        CONN_HEALTH_CHECKS=True,
+    )
+
+# Rendered pages and fragments for the public job pages (Portal.caching).
+# File-based by default so every worker process sees the same version keys.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "portal": {
+        "BACKEND": os.environ.get(
+            "PORTAL_CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.environ.get("PORTAL_CACHE_LOCATION", str(BASE_DIR / "cache")),
+        "TIMEOUT": 3600,
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+}
+PORTAL_CACHE_ALIAS = "portal"
+
+# Job vectors for seeker recommendations, written by build_recommendations
+RECOMMENDATIONS_DIR = os.environ.get(
+    "PORTAL_RECOMMENDATIONS_DIR", str(BASE_DIR / "var" / "recommendations")
+)
+
+# Resume downloads are authorised by Portal.views.download_resume and, when
+# set, sent by the front server: "x-sendfile" (Apache mod_xsendfile, lighttpd)
+# or "x-accel-redirect" (nginx, with an internal location at SENDFILE_URL
+# aliased to MEDIA_ROOT). Empty streams them from Django.
+SENDFILE_BACKEND = os.environ.get("PORTAL_SENDFILE_BACKEND", "")
+SENDFILE_URL = os.environ.get("PORTAL_SENDFILE_URL", "/protected-media/")
+
+# Application notifications, mailed by send_notifications. Locally they are
+# written to files under var/mail; set PORTAL_EMAIL_BACKEND (and the usual
+# EMAIL_HOST settings) for real delivery.
+EMAIL_BACKEND = os.environ.get(
+    "PORTAL_EMAIL_BACKEND", "django.core.mail.backends.filebased.EmailBackend"
+)
+EMAIL_FILE_PATH = os.environ.get("PORTAL_EMAIL_FILE_PATH", str(BASE_DIR / "var" / "mail"))
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.environ.get("EMAIL_PORT", "25"))
+EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.environ.get("EMAIL_USE_TLS", "False") == "True"
+DEFAULT_FROM_EMAIL = os.environ.get("PORTAL_FROM_EMAIL", "Job Portal <noreply@jobportal.local>")
+# Scheme and host that links in emails point at
+SITE_URL = os.environ.get("PORTAL_SITE_URL", "http://127.0.0.1:8000")
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"
@@ -83,6 +175,8 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Stream uploads to disk while hashing them for content-addressed resume storage
+FILE_UPLOAD_HANDLERS = ["Portal.storage.HashingFileUploadHandler"]
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -90,3 +184,14 @@ AUTH_USER_MODEL = "Portal.User"
 LOGIN_REDIRECT_URL = "dashboard"
 LOGOUT_REDIRECT_URL = "home"
 LOGIN_URL = "login"
+
+# Public, read-only partner API under /api/v1/
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+    "DEFAULT_PARSER_CLASSES": [],
+    "DEFAULT_AUTHENTICATION_CLASSES": [],
+    "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.AllowAny"],
+    "UNAUTHENTICATED_USER": None,
+    "DEFAULT_VERSIONING_CLASS": "rest_framework.versioning.URLPathVersioning",
+    "ALLOWED_VERSIONS": ["v1"],
+}
@@ -0,0 +1,230 @@
+# alerts.py - saved job searches, checked against each new job once
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import facets, salaries, search
+from .models import FACETS, FacetCount, Job, OutboxEvent, SavedSearch, SavedSearchKey
+
+MAX_SAVED_SEARCHES = 20
+# Every job carries this key: searches with no usable condition file under it
+ANY_KEY = "*"
+# Prefix searches file under their first letters; jobs carry every token's
+PREFIX_KEY_LENGTH = 3
+# Keys per lookup, inside SQLite's limit on query parameters
+LOOKUP_BATCH_SIZE = 900
+# A radius around a place is not kept: alerts match text, facets and salary
+UNSAVED_PARAMS = ("cursor", "near", "radius")
+
+_MAX_KEY_LENGTH = SavedSearchKey._meta.get_field("key").max_length
+_MAX_SEARCH_LENGTH = SavedSearch._meta.get_field("search").max_length
+_MAX_NAME_LENGTH = SavedSearch._meta.get_field("name").max_length
+
+
+def conditions(params):
+    """The ``(search, facets, salary)`` a ``job_list`` query dict filters on.
+
+    Raises ValueError for an unreadable salary, or when nothing narrows the
+    listing down: such a search would alert on every job.
+    """
+    text = " ".join(params.get("search", "").split())
+    if len(text) > _MAX_SEARCH_LENGTH:
+        raise ValueError(f"Searches of up to {_MAX_SEARCH_LENGTH} characters can be saved.")
+    selected = facets.selected_facets(params)
+    salary = salaries.selected_range(params)
+    if not search.query_terms(text) and not selected and salary is None:
+        raise ValueError("Search for something or pick a filter before saving.")
+    return text, selected, salary
+
+
+def save_search(seeker, params, name=""):
+    """Save the ``job_list`` query in ``params`` for ``seeker`` and file it.
+
+    Raises ValueError when the query cannot be saved.
+    """
+    text, selected, salary = conditions(params)
+    if seeker.saved_searches.count() >= MAX_SAVED_SEARCHES:
+        raise ValueError(f"You can keep up to {MAX_SAVED_SEARCHES} saved searches.")
+    query = params.copy()
+    for param in UNSAVED_PARAMS:
+        query.pop(param, None)
+    currency, low, high = salary or ("", None, None)
+    name = " ".join(name.split()) or _describe(text, selected, salary)
+    with transaction.atomic():
+        saved = SavedSearch.objects.create(
+            seeker=seeker,
+            name=name[:_MAX_NAME_LENGTH],
+            query=query.urlencode(),
+            search=text,
+            facets=selected,
+            salary_currency=currency,
+            salary_min=low,
+            salary_max=high,
+        )
+        SavedSearchKey.objects.bulk_create(
+            SavedSearchKey(search=saved, key=key) for key in anchor_keys(saved)
+        )
+    return saved
+
+
+def _describe(text, selected, salary):
+    parts = [text] if text else []
+    parts += [value for values in selected.values() for value in values]
+    if salary:
+        parts.append(f"{salary[0]} salary")
+    return ", ".join(parts)
+
+
+def anchor_keys(saved):
+    """The keys ``saved`` is filed under: those of its rarest condition.
+
+    Every job ``saved`` matches carries one of them, and the fewer jobs a
+    key's condition matches, the fewer new jobs need to check the search.
+    """
+    options = []
+    terms = search.query_terms(saved.search)
+    counts = search.document_counts(token for tokens, _prefix in terms for token in tokens)
+    for tokens, is_prefix in terms:
+        for token in tokens[:-1] if is_prefix else tokens:
+            if len(f"w:{token}") <= _MAX_KEY_LENGTH:
+                options.append((counts.get(token, 0), [f"w:{token}"]))
+        if is_prefix and len(tokens[-1]) >= PREFIX_KEY_LENGTH:
+            start = tokens[-1][:PREFIX_KEY_LENGTH]
+            options.append((search.prefix_document_count(start), [f"p:{start}"]))
+
+    if saved.facets:
+        buckets = Q()
+        for facet, values in saved.facets.items():
+            buckets |= Q(facet=facet, value__in=values)
+        totals = defaultdict(int)
+        for facet, count in FacetCount.objects.filter(buckets).values_list("facet", "count"):
+            totals[facet] += count
+        for facet, values in saved.facets.items():
+            options.append((totals[facet], [f"{facet}:{value}" for value in values]))
+
+    if saved.salary_currency:
+        paid = Job.objects.filter(salary_currency=saved.salary_currency, salary_max__isnull=False)
+        options.append((paid.count(), [f"salary:{saved.salary_currency}"]))
+
+    if not options:
+        return [ANY_KEY]
+    return min(options, key=lambda option: option[0])[1]
+
+
+def job_keys(job, columns):
+    """Every key a saved search matching ``job`` can be filed under."""
+    tokens = set().union(*columns)
+    keys = {ANY_KEY}
+    keys.update(f"w:{token}" for token in tokens)
+    keys.update(
+        f"p:{token[:PREFIX_KEY_LENGTH]}" for token in tokens if len(token) >= PREFIX_KEY_LENGTH
+    )
+    for facet in FACETS:
+        value = getattr(job, f"{facet}_key")
+        if value:
+            keys.add(f"{facet}:{value}")
+    if job.salary_max is not None:
+        keys.add(f"salary:{job.salary_currency}")
+    return keys
+
+
+def matches(saved, terms, job, columns):
+    """Whether ``job`` would be listed by ``saved``'s query."""
+    if not search.matches_document(terms, columns):
+        return False
+    for facet, values in saved.facets.items():
+        if getattr(job, f"{facet}_key") not in values:
+            return False
+    if saved.salary_currency:
+        selected = (saved.salary_currency, saved.salary_min, saved.salary_max)
+        if not salaries.matches(selected, job):
+            return False
+    return True
+
+
+def match_jobs(jobs):
+    """Queue a job alert for every saved search one of the new ``jobs`` matches.
+
+    All keys of the batch are looked up together and only the searches
+    filed under them are checked, so the cost follows the jobs, not the
+    number of saved searches. A seeker hears about a job once, however
+    many of their searches match it. Returns the number of alerts queued.
+    """
+    jobs = [job for job in jobs if job.pk is not None]
+    columns = {
+        job.pk: [search.tokenize(getattr(job, field)) for field in search.INDEXED_FIELDS]
+        for job in jobs
+    }
+    keys = {job.pk: job_keys(job, columns[job.pk]) for job in jobs}
+    wanted = sorted(set().union(*keys.values()))
+    filed = defaultdict(list)
+    for start in range(0, len(wanted), LOOKUP_BATCH_SIZE):
+        rows = SavedSearchKey.objects.filter(
+            key__in=wanted[start : start + LOOKUP_BATCH_SIZE]
+        ).values_list("key", "search_id")
+        for key, search_id in rows:
+            filed[key].append(search_id)
+    if not filed:
+        return 0
+
+    candidates = sorted({search_id for ids in filed.values() for search_id in ids})
+    saved = {}
+    for start in range(0, len(candidates), LOOKUP_BATCH_SIZE):
+        saved.update(
+            SavedSearch.objects.defer("query", "created_at").in_bulk(
+                candidates[start : start + LOOKUP_BATCH_SIZE]
+            )
+        )
+    terms = {}
+    alerts = []
+    for job in jobs:
+        notified = set()
+        ids = {search_id for key in keys[job.pk] for search_id in filed.get(key, ())}
+        for search_id in sorted(ids):
+            candidate = saved.get(search_id)
+            if candidate is None or candidate.seeker_id in notified:
+                continue
+            if search_id not in terms:
+                terms[search_id] = search.query_terms(candidate.search)
+            if not matches(candidate, terms[search_id], job, columns[job.pk]):
+                continue
+            notified.add(candidate.seeker_id)
+            payload = {
+                "job": job.title,
+                "company": job.company,
+                "location": job.location,
+                "job_id": job.pk,
+                "search": candidate.name,
+            }
+            alerts.append((candidate.seeker_id, payload))
+    _queue(alerts)
+    return len(alerts)
+
+
+def _queue(alerts):
+    # A popular job can match thousands of searches: one prepared INSERT run
+    # for every row costs far less than building a model instance per alert
+    if not alerts:
+        return
+    encoder = OutboxEvent._meta.get_field("payload").encoder
+    adapt_json = connection.ops.adapt_json_value
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {OutboxEvent._meta.db_table}"
+            f" (kind, recipient_id, payload, status, error, attempts, worker, queued_at,"
+            f" updated_at) VALUES (%s, %s, %s, %s, '', 0, '', %s, %s)",
+            [
+                [
+                    OutboxEvent.JOB_ALERT,
+                    recipient_id,
+                    adapt_json(payload, encoder),
+                    OutboxEvent.PENDING,
+                    now,
+                    now,
+                ]
+                for recipient_id, payload in alerts
+            ],
+        )
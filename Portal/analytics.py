@@ -0,0 +1,219 @@
+# analytics.py - daily application rollups and the employer funnel read from them
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Application, DailyApplicationCount, Job
+
+ROLLUP_TABLE = DailyApplicationCount._meta.db_table
+JOB_TABLE = Job._meta.db_table
+PERIODS = [30, 90, 365]
+DEFAULT_PERIOD = 90
+# Longer periods are charted per week
+DAILY_CHART_DAYS = 90
+JOBS_SHOWN = 50
+# Statuses that have passed each funnel stage. Rejection can happen at any
+# stage, so a rejected application only counts as reviewed.
+FUNNEL = [
+    ("Applied", {status for status, _label in Application.STATUS_CHOICES}),
+    ("Reviewed", {"reviewed", "shortlisted", "accepted", "rejected"}),
+    ("Shortlisted", {"shortlisted", "accepted"}),
+    ("Accepted", {"accepted"}),
+]
+
+
+def snapshot(job_id, status, applied_at, reviewed_at):
+    """The ``(bucket, seconds to review)`` an application contributes to the rollup."""
+    seconds = None
+    if reviewed_at is not None:
+        seconds = max(int((reviewed_at - applied_at).total_seconds()), 0)
+    return (job_id, timezone.localdate(applied_at), status), seconds
+
+
+def update_counts(added=(), removed=()):
+    """Apply rollup changes for application snapshots added and removed.
+
+    A status change removes the old snapshot and adds the new one. Every
+    changed bucket is upserted by a single statement, creating it on first
+    use with the employer read from its job.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for entries, sign in ((added, 1), (removed, -1)):
+        for bucket, seconds in entries:
+            delta = deltas[bucket]
+            delta[0] += sign
+            if seconds is not None:
+                delta[1] += sign
+                delta[2] += sign * seconds
+    rows = [
+        [connection.ops.adapt_datefield_value(day), status, *delta, job_id]
+        for (job_id, day, status), delta in deltas.items()
+        if any(delta)
+    ]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {ROLLUP_TABLE}"
+            f" (job_id, employer_id, day, status, applications, reviewed, review_seconds)"
+            f" SELECT id, employer_id, %s, %s, %s, %s, %s FROM {JOB_TABLE} WHERE id = %s"
+            f" ON CONFLICT (job_id, day, status) DO UPDATE SET"
+            f" applications = applications + excluded.applications,"
+            f" reviewed = reviewed + excluded.reviewed,"
+            f" review_seconds = review_seconds + excluded.review_seconds",
+            rows,
+        )
+
+
+def actual_counts(job_ids):
+    """Rollup buckets recomputed from the Application table for ``job_ids``."""
+    counts = defaultdict(lambda: [0, 0, 0])
+    rows = (
+        Application.objects.filter(job_id__in=job_ids)
+        .order_by()
+        .values_list("job_id", "status", "applied_at", "reviewed_at")
+    )
+    for row in rows:
+        bucket, seconds = snapshot(*row)
+        counts[bucket][0] += 1
+        if seconds is not None:
+            counts[bucket][1] += 1
+            counts[bucket][2] += seconds
+    return {bucket: tuple(values) for bucket, values in counts.items()}
+
+
+def reconcile(batch_size=1000, job_ids=None):
+    """Backfill missing rollups and fix any that drifted from Application.
+
+    Walks jobs in primary-key batches, rewrites the rollup of every job
+    whose buckets differ and returns the number of jobs fixed.
+    """
+    jobs = Job.objects.order_by("pk").values_list("pk", "employer_id")
+    if job_ids:
+        jobs = jobs.filter(pk__in=job_ids)
+    fixed = 0
+    last_pk = 0
+    while True:
+        employers = dict(jobs.filter(pk__gt=last_pk)[:batch_size])
+        if not employers:
+            return fixed
+        batch = list(employers)
+        last_pk = batch[-1]
+        with transaction.atomic():
+            expected = actual_counts(batch)
+            rows = DailyApplicationCount.objects.filter(job_id__in=batch).values_list(
+                "job_id", "day", "status", "applications", "reviewed", "review_seconds"
+            )
+            # Buckets emptied by later changes are left at zero
+            stored = {tuple(row[:3]): tuple(row[3:]) for row in rows if any(row[3:])}
+            stale = {
+                bucket[0]
+                for bucket in expected.keys() | stored.keys()
+                if expected.get(bucket) != stored.get(bucket)
+            }
+            if stale:
+                DailyApplicationCount.objects.filter(job_id__in=stale).delete()
+                DailyApplicationCount.objects.bulk_create(
+                    (
+                        DailyApplicationCount(
+                            job_id=job_id, employer_id=employers[job_id], day=day, status=status,
+                            applications=applications, reviewed=reviewed,
+                            review_seconds=review_seconds,
+                        )
+                        for (job_id, day, status), (applications, reviewed, review_seconds)
+                        in expected.items()
+                        if job_id in stale
+                    ),
+                    batch_size=1000,
+                )
+        fixed += len(stale)
+
+
+def employer_report(employer, days=DEFAULT_PERIOD, today=None):
+    """The funnel, daily applications and per-job review times of ``employer``.
+
+    Covers applications received in the last ``days`` days and reads one
+    rollup row per job, day and status, however long the history. Only the
+    JOBS_SHOWN jobs with the most applications are listed.
+    """
+    today = today or timezone.localdate()
+    since = today - timedelta(days=days - 1)
+    rows = DailyApplicationCount.objects.filter(
+        employer=employer, day__gte=since, applications__gt=0
+    ).values_list("job_id", "day", "status", "applications", "reviewed", "review_seconds")
+
+    per_day = defaultdict(int)
+    per_status = defaultdict(int)
+    per_job = defaultdict(lambda: defaultdict(int))
+    review = defaultdict(lambda: [0, 0])
+    for job_id, day, status, applications, reviewed, review_seconds in rows:
+        per_day[day] += applications
+        per_status[status] += applications
+        per_job[job_id][status] += applications
+        if reviewed:
+            review[job_id][0] += reviewed
+            review[job_id][1] += review_seconds
+
+    shown = sorted(per_job, key=lambda job_id: -sum(per_job[job_id].values()))[:JOBS_SHOWN]
+    titles = {}
+    if shown:
+        titles = dict(Job.objects.filter(pk__in=shown).order_by().values_list("pk", "title"))
+    jobs = [
+        {
+            "id": job_id,
+            "title": titles.get(job_id, ""),
+            "funnel": _funnel(per_job[job_id]),
+            "review_time": _average_duration(review[job_id][1], review[job_id][0]),
+        }
+        for job_id in shown
+    ]
+    return {
+        "since": since,
+        "funnel": _funnel(per_status),
+        "review_time": _average_duration(
+            sum(seconds for _count, seconds in review.values()),
+            sum(count for count, _seconds in review.values()),
+        ),
+        "chart": _chart(per_day, since, today, weekly=days > DAILY_CHART_DAYS),
+        "jobs": jobs,
+        "more_jobs": max(len(per_job) - JOBS_SHOWN, 0),
+    }
+
+
+def _funnel(per_status):
+    applied = sum(per_status.values())
+    stages = []
+    for label, statuses in FUNNEL:
+        count = sum(per_status.get(status, 0) for status in statuses)
+        percent = round(100 * count / applied) if applied else 0
+        stages.append({"label": label, "count": count, "percent": percent})
+    return stages
+
+
+def _average_duration(seconds, count):
+    """A readable average such as "40 min", "5.5 h" or "3.2 days"; "" for no data."""
+    if not count:
+        return ""
+    average = seconds / count
+    if average < 3600:
+        return f"{round(average / 60)} min"
+    if average < 2 * 86400:
+        return f"{average / 3600:.1f} h"
+    return f"{average / 86400:.1f} days"
+
+
+def _chart(per_day, since, today, weekly):
+    """Bars for every day (or week) of the period, empty ones included."""
+    bars = []
+    day = since
+    while day <= today:
+        end = min(day + timedelta(days=6 if weekly else 0), today)
+        count = sum(per_day.get(day + timedelta(days=n), 0) for n in range((end - day).days + 1))
+        bars.append({"start": day, "end": end, "count": count})
+        day = end + timedelta(days=1)
+    highest = max((bar["count"] for bar in bars), default=0)
+    for bar in bars:
+        bar["percent"] = round(100 * bar["count"] / highest) if highest else 0
+    return bars
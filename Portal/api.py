@@ -0,0 +1,176 @@
+# api.py - read-only JSON API for partners, mounted under /api/<version>/
+from datetime import timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from . import caching, facets, geo, salaries
+from . import search as job_search
+from .models import DeletedJob, Job
+from .pagination import InvalidCursor, paginate_keyset
+from .serializers import DeletedJobSerializer, JobSerializer
+from .views import JOBS_PER_PAGE, LISTING_KEYS
+
+MAX_PAGE_SIZE = 100
+# Oldest change first, so a sync client can resume from the last row it saw
+UPDATED_KEYS = [("updated_at", False), ("id", False)]
+DELETED_KEYS = [("deleted_at", False), ("id", False)]
+# The description is only sent on request in lists; detail sends everything
+LIST_FIELDS = [name for name in JobSerializer.Meta.fields if name != "description"]
+
+
+def parse_timestamp(value, param):
+    # An unencoded "+05:30" offset arrives as " 05:30"
+    parsed = parse_datetime(value.strip().replace(" ", "+"))
+    if parsed is None:
+        raise ValidationError({param: ["Use an ISO 8601 timestamp."]})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def requested_fields(request, default):
+    """Fields named in ``?fields=a,b``; ``id`` is always included."""
+    value = request.query_params.get("fields")
+    if not value:
+        return default
+    fields = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = fields - set(JobSerializer.Meta.fields)
+    if unknown:
+        raise ValidationError(
+            {"fields": [f"Unknown fields: {', '.join(sorted(unknown))}."]}
+        )
+    return [name for name in JobSerializer.Meta.fields if name in fields | {"id"}]
+
+
+class KeysetPagination(BasePagination):
+    """DRF adapter for ``paginate_keyset``; views provide ``keys``."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            size = int(request.query_params.get("limit", JOBS_PER_PAGE))
+        except ValueError:
+            raise ValidationError({"limit": ["Must be a whole number."]})
+        size = max(1, min(size, MAX_PAGE_SIZE))
+        try:
+            self.page = paginate_keyset(
+                queryset, view.keys, request.query_params.get("cursor"), size
+            )
+        except InvalidCursor:
+            raise ValidationError({"cursor": ["Invalid cursor."]})
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.link(self.page.next_cursor),
+                "previous": self.link(self.page.prev_cursor),
+                "results": data,
+            }
+        )
+
+    def link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), "cursor", cursor)
+
+
+class JobList(generics.ListAPIView):
+    """Jobs, newest first, with the same ``search``, facet, salary and
+    ``near`` filters as job_list. ``sort=salary`` lists the highest paid
+    first, ``sort=distance`` the nearest, and ``updated_since`` switches to
+    an oldest-change-first feed."""
+
+    serializer_class = JobSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        params = self.request.query_params
+        self.fields = requested_fields(self.request, LIST_FIELDS)
+        self.keys = LISTING_KEYS
+        jobs = facets.filter_jobs(Job.objects.all(), facets.selected_facets(params))
+        try:
+            salary = salaries.selected_range(params)
+        except ValueError as exc:
+            raise ValidationError({"salary": [str(exc)]})
+        try:
+            area = geo.selected_area(params)
+        except ValueError as exc:
+            raise ValidationError({"near": [str(exc)]})
+        sort = params.get("sort")
+        if sort not in (None, "salary", "distance"):
+            raise ValidationError({"sort": ["Use sort=salary or sort=distance."]})
+        if sort == "distance" and area is None:
+            raise ValidationError({"sort": ["sort=distance needs near."]})
+        if sort == "salary" and salary is None:
+            salary = (salaries.DEFAULT_CURRENCY, None, None)
+        if salary is not None:
+            jobs = salaries.filter_jobs(jobs, salary)
+        if area is not None:
+            jobs = geo.filter_jobs(jobs, area)
+
+        since = params.get("updated_since")
+        if since:
+            jobs = jobs.filter(updated_at__gte=parse_timestamp(since, "updated_since"))
+            self.keys = UPDATED_KEYS
+        elif sort == "salary":
+            self.keys = salaries.SALARY_KEYS
+        elif sort == "distance":
+            self.keys = geo.DISTANCE_KEYS
+        search = params.get("search", "").strip()
+        if search:
+            jobs = job_search.search_jobs(jobs, search)
+            if job_search.is_ranked(jobs) and not since and not sort:
+                self.keys = job_search.RANK_KEYS
+
+        key_columns = [
+            name for name, _descending in self.keys if name not in ("rank", "distance")
+        ]
+        return jobs.only(*JobSerializer.columns(self.fields), *key_columns)
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, fields=self.fields, **kwargs)
+
+
+class JobDetail(generics.RetrieveAPIView):
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        self.fields = requested_fields(self.request, JobSerializer.Meta.fields)
+        return Job.objects.only(*JobSerializer.columns(self.fields))
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, fields=self.fields, **kwargs)
+
+
+class DeletedJobList(generics.ListAPIView):
+    """Tombstones for deleted jobs, oldest first, optionally ``since`` a time."""
+
+    serializer_class = DeletedJobSerializer
+    pagination_class = KeysetPagination
+    keys = DELETED_KEYS
+
+    def get_queryset(self):
+        deleted = DeletedJob.objects.all()
+        since = self.request.query_params.get("since")
+        if since:
+            deleted = deleted.filter(deleted_at__gte=parse_timestamp(since, "since"))
+        return deleted
+
+
+# Anonymous GETs share the public page cache, ETags and 304s with the HTML views
+job_list = caching.cache_public_page(lambda request, **kwargs: [caching.LISTING])(
+    JobList.as_view()
+)
+job_detail = caching.cache_public_page(
+    lambda request, pk, **kwargs: [caching.job_scope(pk)]
+)(JobDetail.as_view())
+deleted_jobs = caching.cache_public_page(lambda request, **kwargs: [caching.LISTING])(
+    DeletedJobList.as_view()
+)
@@ -0,0 +1,219 @@
+# caching.py - versioned page and fragment caches for the public job pages
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+# Version scope covering every listing page, search result and facet count.
+LISTING = "listing"
+
+
+def job_scope(job_id):
+    return f"job:{job_id}"
+
+
+def portal_cache():
+    return caches[getattr(settings, "PORTAL_CACHE_ALIAS", "default")]
+
+
+def _version_key(scope):
+    return f"portal:version:{scope}"
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12], int(time.time())
+
+
+def get_versions(scopes):
+    """Return ``{scope: (token, modified)}``, creating missing versions.
+
+    Cached entries embed the tokens of every scope they depend on, so bumping
+    a scope makes those entries unreachable without deleting anything.
+    """
+    cache = portal_cache()
+    keys = {scope: _version_key(scope) for scope in scopes}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for scope, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = _new_version()
+            # add() so concurrent first readers settle on a single token
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key) or version
+        versions[scope] = version
+    return versions
+
+
+async def aget_versions(scopes):
+    """Async ``get_versions`` for async views."""
+    cache = portal_cache()
+    keys = {scope: _version_key(scope) for scope in scopes}
+    found = await cache.aget_many(keys.values())
+    versions = {}
+    for scope, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = _new_version()
+            if not await cache.aadd(key, version, timeout=None):
+                version = await cache.aget(key) or version
+        versions[scope] = version
+    return versions
+
+
+def bump(*scopes):
+    """Invalidate everything cached under ``scopes``."""
+    portal_cache().set_many(
+        {_version_key(scope): _new_version() for scope in scopes}, timeout=None
+    )
+
+
+def fingerprint(*parts):
+    return hashlib.md5("|".join(map(str, parts)).encode()).hexdigest()
+
+
+def get_or_build(key, build):
+    cache = portal_cache()
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value)
+    return value
+
+
+async def aget_or_build(key, build):
+    """Async ``get_or_build``; ``build`` is a coroutine function."""
+    cache = portal_cache()
+    value = await cache.aget(key)
+    if value is None:
+        value = await build()
+        await cache.aset(key, value)
+    return value
+
+
+def get_or_build_many(keys, build):
+    """``keys`` maps an item to its cache key; ``build`` renders missing items.
+
+    Returns ``{item: value}`` using one read and at most one write.
+    """
+    cache = portal_cache()
+    found = cache.get_many(keys.values())
+    values = {item: found[key] for item, key in keys.items() if key in found}
+    missing = [item for item in keys if item not in values]
+    if missing:
+        built = build(missing)
+        cache.set_many({keys[item]: value for item, value in built.items()})
+        values.update(built)
+    return values
+
+
+def _is_anonymous_get(request):
+    return (
+        request.method in ("GET", "HEAD")
+        # A pending flash message would be baked into the cached page
+        and CookieStorage.cookie_name not in request.COOKIES
+        and not request.user.is_authenticated
+    )
+
+
+def _cached_page(request, scopes):
+    """Return ``(etag, last_modified, key, response)`` for an anonymous GET.
+
+    ``response`` is a 304/412, a page from the cache, or None if the view
+    has to run.
+    """
+    versions = get_versions(scopes).values()
+    # The host is part of the key because API bodies hold absolute URLs
+    token = fingerprint(
+        request.get_host(), request.get_full_path(), *(t for t, _ in versions)
+    )
+    etag = quote_etag(token)
+    last_modified = max(modified for _, modified in versions)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    key = f"portal:page:{token}"
+    if response is None:
+        cached = portal_cache().get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+    return etag, last_modified, key, response
+
+
+def _store_page(key, response):
+    """Cache a fresh response; False if it must be sent as it is."""
+    if response.status_code != 200 or response.streaming:
+        return False
+    if hasattr(response, "render"):
+        # TemplateResponse and DRF responses render lazily
+        response.render()
+    portal_cache().set(key, (response.content, response["Content-Type"]))
+    return True
+
+
+def _validators(response, etag, last_modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    patch_vary_headers(response, ["Cookie"])
+    return response
+
+
+def cache_public_page(scopes):
+    """Cache the whole response for anonymous visitors, with ETag and 304s.
+
+    ``scopes(request, *args, **kwargs)`` lists the version scopes the page
+    depends on. Logged-in users always reach the view, which is expected to
+    use fragment caching for the parts that are the same for everyone.
+    Works on sync and async views.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                # Resolve the user once here; templates rendered in a worker
+                # thread would otherwise load it a second time
+                request.user = await request.auser()
+                if not _is_anonymous_get(request):
+                    return await view(request, *args, **kwargs)
+                etag, last_modified, key, response = await sync_to_async(_cached_page)(
+                    request, scopes(request, *args, **kwargs)
+                )
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    if not await sync_to_async(_store_page)(key, response):
+                        return response
+                return _validators(response, etag, last_modified)
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _is_anonymous_get(request):
+                return view(request, *args, **kwargs)
+            etag, last_modified, key, response = _cached_page(
+                request, scopes(request, *args, **kwargs)
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if not _store_page(key, response):
+                    return response
+            return _validators(response, etag, last_modified)
+
+        return wrapper
+
+    return decorator
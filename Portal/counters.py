@@ -0,0 +1,146 @@
+# counters.py - per-job application counters stored on Job
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import analytics, notifications
+from .models import Application, Job
+
+STATUSES = [status for status, _label in Application.STATUS_CHOICES]
+# Ids per UPDATE, under SQLite's limit on bound parameters
+UPDATE_BATCH_SIZE = 500
+
+
+def status_field(status):
+    return f"{status}_count"
+
+
+def apply_changes(changes):
+    """Adjust counters in place; ``changes`` maps job id -> Counter of deltas.
+
+    Delta keys are statuses, plus ``"total"`` for ``applications_count``. One
+    UPDATE per job, using F() so concurrent writers never lose increments.
+    """
+    with transaction.atomic():
+        for job_id, deltas in changes.items():
+            updates = {}
+            for key, delta in deltas.items():
+                if delta:
+                    field = "applications_count" if key == "total" else status_field(key)
+                    updates[field] = F(field) + delta
+            if updates:
+                Job.objects.filter(pk=job_id).update(**updates)
+
+
+def record_new(job_id, status):
+    apply_changes({job_id: Counter({"total": 1, status: 1})})
+
+
+def record_removed(job_id, status):
+    apply_changes({job_id: Counter({"total": -1, status: -1})})
+
+
+def record_status_change(job_id, old_status, new_status):
+    if old_status != new_status:
+        apply_changes({job_id: Counter({old_status: -1, new_status: 1})})
+
+
+def status_change_deltas(rows, new_status):
+    """Deltas for moving ``(job_id, old_status)`` rows to ``new_status``."""
+    changes = defaultdict(Counter)
+    for job_id, old_status in rows:
+        if old_status != new_status:
+            changes[job_id][old_status] -= 1
+            changes[job_id][new_status] += 1
+    return changes
+
+
+def change_status(applications, new_status):
+    """Move the ``applications`` queryset to ``new_status`` with one UPDATE.
+
+    Counters, daily rollups and the notification outbox are updated from
+    the rows read under the same lock, since ``update()`` skips the save
+    signals. Leaving "pending" sets ``reviewed_at`` as ``save()`` does. Ids are
+    written UPDATE_BATCH_SIZE at a time, so a queryset of any size works.
+    Returns a Counter of the previous statuses of the rows that changed.
+    """
+    reviewed_now = None if new_status == "pending" else timezone.now()
+    updates = {"status": new_status}
+    if reviewed_now:
+        updates["reviewed_at"] = Coalesce(F("reviewed_at"), Value(reviewed_now))
+    with transaction.atomic():
+        rows = list(
+            applications.exclude(status=new_status)
+            .select_for_update()
+            .order_by()
+            .values_list("id", "job_id", "status", "applied_at", "reviewed_at")
+        )
+        if rows:
+            for start in range(0, len(rows), UPDATE_BATCH_SIZE):
+                ids = [row[0] for row in rows[start : start + UPDATE_BATCH_SIZE]]
+                # Reads the statuses this UPDATE is about to overwrite
+                notifications.record_status_changes(ids, new_status)
+                Application.objects.filter(pk__in=ids).update(**updates)
+            apply_changes(
+                status_change_deltas([(row[1], row[2]) for row in rows], new_status)
+            )
+            analytics.update_counts(
+                added=[
+                    analytics.snapshot(job_id, new_status, applied_at, reviewed_at or reviewed_now)
+                    for _, job_id, _, applied_at, reviewed_at in rows
+                ],
+                removed=[analytics.snapshot(*row[1:]) for row in rows],
+            )
+    return Counter(row[2] for row in rows)
+
+
+def actual_counts(job_ids):
+    """Counters recomputed from the Application table for ``job_ids``."""
+    rows = (
+        Application.objects.filter(job_id__in=job_ids)
+        .order_by()
+        .values("job_id")
+        .annotate(
+            applications_count=Count("id"),
+            **{
+                status_field(status): Count("id", filter=Q(status=status))
+                for status in STATUSES
+            },
+        )
+    )
+    zero = dict.fromkeys(Job.COUNTER_FIELDS, 0)
+    counts = {job_id: dict(zero) for job_id in job_ids}
+    for row in rows:
+        counts[row.pop("job_id")].update(row)
+    return counts
+
+
+def reconcile(batch_size=1000, job_ids=None):
+    """Fix every counter that drifted from the Application table.
+
+    Walks jobs in primary-key batches and returns the number of jobs fixed.
+    """
+    jobs = Job.objects.order_by("pk").only("pk", *Job.COUNTER_FIELDS)
+    if job_ids:
+        jobs = jobs.filter(pk__in=job_ids)
+    fixed = 0
+    last_pk = 0
+    while True:
+        batch = list(jobs.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return fixed
+        last_pk = batch[-1].pk
+        with transaction.atomic():
+            counts = actual_counts([job.pk for job in batch])
+            stale = []
+            for job in batch:
+                expected = counts[job.pk]
+                if any(getattr(job, f) != v for f, v in expected.items()):
+                    for field, value in expected.items():
+                        setattr(job, field, value)
+                    stale.append(job)
+            Job.objects.bulk_update(stale, Job.COUNTER_FIELDS)
+        fixed += len(stale)
@@ -0,0 +1,171 @@
+# downloads.py - private file downloads with ranges, validators and server offload
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import (
+    content_disposition_header,
+    http_date,
+    parse_http_date_safe,
+    quote_etag,
+)
+
+from .storage import BLOB_PREFIX
+
+# Values of settings.SENDFILE_BACKEND, and the header each one sets
+SENDFILE_HEADERS = {"x-sendfile": "X-Sendfile", "x-accel-redirect": "X-Accel-Redirect"}
+# Python-streamed ranges are read this much at a time
+BLOCK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$", re.IGNORECASE)
+_BLOB_RE = re.compile(rf"^{BLOB_PREFIX}/[0-9a-f]{{2}}/([0-9a-f]{{64}})(\.\w+)?$")
+
+
+class _FileRange:
+    """Read-only view of ``length`` bytes of ``handle`` from its current position.
+
+    Has no ``fileno``, so WSGI servers stream it through ``read()`` instead of
+    sending the rest of the file.
+    """
+
+    def __init__(self, handle, length):
+        self.handle = handle
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.handle.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.handle.close()
+
+
+def file_etag(name, stat):
+    """A strong ETag: the SHA-256 of a content-addressed blob, else mtime and size."""
+    match = _BLOB_RE.match(name)
+    if match:
+        return quote_etag(match[1])
+    return quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+
+def byte_range(header, size):
+    """The ``(start, end)`` a Range header asks for, end inclusive.
+
+    None means the header is absent, malformed or asks for several ranges, and
+    the whole file is sent. Raises ValueError when no byte can satisfy it.
+    """
+    match = _RANGE_RE.match(header or "")
+    if not match or match[1] == match[2] == "":
+        return None
+    if match[1] == "":
+        # "bytes=-500": the last 500 bytes
+        length = int(match[2])
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(match[1])
+    end = int(match[2]) if match[2] else size - 1
+    if match[2] and end < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(request, etag, modified):
+    # A resumed download only continues when the file is the one it started on
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == modified
+
+
+def serve(request, storage, name, filename, as_attachment=False):
+    """Send the file ``name`` of ``storage`` once the caller has authorised it.
+
+    Answers If-None-Match and If-Modified-Since with 304. With
+    SENDFILE_BACKEND set, the front server is told to send the file and
+    handles ranges itself; otherwise single byte ranges get 206 (If-Range
+    aware) and the file is handed to the server's ``wsgi.file_wrapper``, so
+    gunicorn sends whole files and ranges running to the end with
+    sendfile(). Responses are private and revalidated on every use, since
+    access is checked per request.
+    """
+    path = storage.path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404("File not found")
+    etag = file_etag(name, stat)
+    modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=modified)
+    if response is None:
+        backend = getattr(settings, "SENDFILE_BACKEND", "")
+        if backend:
+            response = _offload(backend, name, path)
+        else:
+            response = _stream(request, path, stat.st_size, etag, modified)
+        if response.status_code in (200, 206):
+            content_type, _encoding = mimetypes.guess_type(filename or name)
+            response["Content-Type"] = content_type or "application/octet-stream"
+            response["Content-Disposition"] = content_disposition_header(
+                as_attachment, os.path.basename(filename or name)
+            )
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _offload(backend, name, path):
+    header = SENDFILE_HEADERS.get(backend)
+    if header is None:
+        raise ImproperlyConfigured(
+            f"SENDFILE_BACKEND must be one of {', '.join(SENDFILE_HEADERS)}, not {backend!r}."
+        )
+    response = HttpResponse()
+    if backend == "x-accel-redirect":
+        # An nginx "internal" location aliased to MEDIA_ROOT
+        response[header] = settings.SENDFILE_URL + quote(name)
+    else:
+        response[header] = path
+    return response
+
+
+def _stream(request, path, size, etag, modified):
+    try:
+        span = None
+        if request.method == "GET" and _if_range_matches(request, etag, modified):
+            span = byte_range(request.headers.get("Range"), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    handle = open(path, "rb")
+    if span is None:
+        response = FileResponse(handle)
+    else:
+        start, end = span
+        handle.seek(start)
+        if end == size - 1:
+            # Resuming a download: the server still sends from the offset
+            response = FileResponse(handle, status=206)
+        else:
+            response = FileResponse(_FileRange(handle, end - start + 1), status=206)
+            response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response.block_size = BLOCK_SIZE
+    response["Accept-Ranges"] = "bytes"
+    return response
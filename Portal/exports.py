@@ -0,0 +1,130 @@
+# exports.py - streaming CSV / NDJSON exports of an employer's jobs and applicants
+import csv
+import itertools
+import json
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+
+from .models import Application, Job
+
+CHUNK_SIZE = 2000
+
+# (header, lookup) pairs; lookups through job__ / seeker__ become SQL joins.
+APPLICATION_COLUMNS = [
+    ("application_id", "id"),
+    ("job_id", "job_id"),
+    ("job_title", "job__title"),
+    ("company", "job__company"),
+    ("username", "seeker__username"),
+    ("first_name", "seeker__first_name"),
+    ("last_name", "seeker__last_name"),
+    ("email", "seeker__email"),
+    ("status", "status"),
+    ("applied_at", "applied_at"),
+    ("resume_name", "resume_name"),
+    ("cover_letter", "cover_letter"),
+]
+JOB_COLUMNS = [
+    ("job_id", "id"),
+    ("title", "title"),
+    ("company", "company"),
+    ("location", "location"),
+    ("category", "category"),
+    ("salary", "salary"),
+    ("created_at", "created_at"),
+    ("applications", "applications_count"),
+    *[(status, f"{status}_count") for status, _label in Application.STATUS_CHOICES],
+    ("description", "description"),
+]
+KINDS = {"applications": APPLICATION_COLUMNS, "jobs": JOB_COLUMNS}
+
+# Spreadsheet apps run cells starting with these as formulas
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def application_rows(employer, job_id=None):
+    queryset = Application.objects.filter(job__employer=employer)
+    if job_id is not None:
+        queryset = queryset.filter(job_id=job_id)
+    return queryset.order_by("job_id", "id").values_list(
+        *[lookup for _header, lookup in APPLICATION_COLUMNS]
+    )
+
+
+def job_rows(employer, job_id=None):
+    queryset = Job.objects.filter(employer=employer)
+    if job_id is not None:
+        queryset = queryset.filter(pk=job_id)
+    return queryset.order_by("id").values_list(
+        *[lookup for _header, lookup in JOB_COLUMNS]
+    )
+
+
+def rows_for(kind, employer, job_id=None):
+    """Headers and a lazily streamed iterator of row tuples."""
+    build = application_rows if kind == "applications" else job_rows
+    headers = [header for header, _lookup in KINDS[kind]]
+    return headers, build(employer, job_id).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class _Line:
+    """File-like sink so csv.writer hands back each line instead of buffering."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    value = _plain(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(headers, rows, header=True):
+    writer = csv.writer(_Line())
+    if header:
+        yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def ndjson_lines(headers, rows, header=True):
+    for row in rows:
+        yield json.dumps(dict(zip(headers, map(_plain, row))), ensure_ascii=False) + "\n"
+
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", csv_lines),
+    "ndjson": ("application/x-ndjson; charset=utf-8", ndjson_lines),
+}
+
+
+def stream(kind, fmt, employer, job_id=None):
+    """Yield the export line by line; memory does not grow with the row count."""
+    headers, rows = rows_for(kind, employer, job_id)
+    return FORMATS[fmt][1](headers, rows)
+
+
+def _next_block(rows, lines, headers, header):
+    chunk = list(itertools.islice(rows, CHUNK_SIZE))
+    return "".join(lines(headers, chunk, header=header)) if chunk or header else ""
+
+
+async def astream(kind, fmt, employer, job_id=None):
+    """Async ``stream`` for ASGI, sent one chunk of rows at a time.
+
+    Each chunk is fetched and formatted in the request's worker thread, so
+    the event loop only forwards finished blocks to the client.
+    """
+    headers, rows = rows_for(kind, employer, job_id)
+    lines = FORMATS[fmt][1]
+    header = True
+    while block := await sync_to_async(_next_block)(rows, lines, headers, header):
+        yield block
+        header = False
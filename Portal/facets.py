@@ -0,0 +1,120 @@
+# facets.py - location/category/company filters and their job counts
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import FACETS, FacetCount, Job
+
+TOP_VALUES = 10
+
+
+def selected_facets(params):
+    """Normalized facet values requested in a query dict, e.g. ``?location=Kochi``."""
+    selected = {}
+    for facet in FACETS:
+        values = {Job.normalize_facet(v) for v in params.getlist(facet)}
+        values.discard("")
+        if values:
+            selected[facet] = sorted(values)
+    return selected
+
+
+def filter_jobs(queryset, selected):
+    for facet, values in selected.items():
+        queryset = queryset.filter(**{f"{facet}_key__in": values})
+    return queryset
+
+
+def facet_counts(selected=None, limit=TOP_VALUES):
+    """Top values per facet, read from the rollup rather than the Job table.
+
+    Selected values are always included so they can be un-ticked.
+    """
+    selected = selected or {}
+    rows = FacetCount.objects.raw(
+        f"SELECT * FROM ("
+        f" SELECT *, ROW_NUMBER() OVER"
+        f" (PARTITION BY facet ORDER BY count DESC, label) AS position"
+        f" FROM {FacetCount._meta.db_table} WHERE count > 0"
+        f") WHERE position <= %s ORDER BY facet, position",
+        [limit],
+    )
+    counts = {facet: [] for facet in FACETS}
+    for row in rows:
+        counts[row.facet].append(row)
+    missing = Q()
+    for facet, values in selected.items():
+        shown = {row.value for row in counts[facet]}
+        if set(values) - shown:
+            missing |= Q(facet=facet, value__in=set(values) - shown)
+    if missing:
+        for row in FacetCount.objects.filter(missing):
+            counts[row.facet].append(row)
+    for facet, rows in counts.items():
+        for row in rows:
+            row.selected = row.value in selected.get(facet, ())
+    return counts
+
+
+def snapshot(job):
+    """The ``(values, labels)`` a job contributes to the rollup."""
+    values = {facet: getattr(job, f"{facet}_key") for facet in FACETS}
+    labels = {facet: " ".join(getattr(job, facet).split()) for facet in FACETS}
+    return values, labels
+
+
+def update_counts(added=(), removed=()):
+    """Apply rollup changes for job snapshots added and removed.
+
+    An edit removes the old snapshot and adds the new one. Writes one UPDATE
+    per changed bucket, so a batch of jobs costs no more than a single job
+    per distinct value.
+    """
+    deltas = Counter()
+    labels = {}
+    for entries, sign in ((added, 1), (removed, -1)):
+        for values, entry_labels in entries:
+            for facet, value in values.items():
+                if value:
+                    deltas[facet, value] += sign
+                    labels.setdefault((facet, value), entry_labels[facet])
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        FacetCount.objects.bulk_create(
+            [
+                FacetCount(facet=facet, value=value, label=labels[facet, value])
+                for (facet, value), delta in deltas.items()
+                if delta > 0
+            ],
+            ignore_conflicts=True,
+        )
+        for (facet, value), delta in deltas.items():
+            FacetCount.objects.filter(facet=facet, value=value).update(
+                count=F("count") + delta
+            )
+
+
+def rebuild_counts():
+    """Recompute every bucket from the Job table; returns the number of buckets."""
+    counts = Counter()
+    labels = {}
+    rows = Job.objects.order_by().values_list(*FACETS, *[f"{f}_key" for f in FACETS])
+    for row in rows.iterator(chunk_size=5000):
+        for index, facet in enumerate(FACETS):
+            value = row[len(FACETS) + index]
+            if value:
+                counts[facet, value] += 1
+                labels.setdefault((facet, value), " ".join(row[index].split()))
+    with transaction.atomic():
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create(
+            (
+                FacetCount(facet=facet, value=value, label=labels[facet, value], count=count)
+                for (facet, value), count in counts.items()
+            ),
+            batch_size=1000,
+        )
+    return len(counts)
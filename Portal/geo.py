@@ -0,0 +1,218 @@
+# geo.py - job locations as coordinates, and radius search over a geohash index
+import csv
+import math
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+Place = namedtuple("Place", ["name", "latitude", "longitude"])
+
+GAZETTEER = os.path.join(os.path.dirname(__file__), "data", "gazetteer.csv")
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_LENGTH = 9
+DEFAULT_RADIUS_KM = 25
+MAX_RADIUS_KM = 500
+# Radius queries use the finest cells whose grid over the circle's bounding
+# box has at most this many cells; neighbouring cells share one index range
+MAX_CELLS = 96
+# Nearest first; id breaks ties between jobs in the same place
+DISTANCE_KEYS = [("distance", False), ("id", True)]
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_PARTS_RE = re.compile(r"[,/|;()]|\s+-\s+|\s+or\s+")
+_COORDINATES_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+
+@lru_cache(maxsize=None)
+def gazetteer():
+    """Casefolded place names and aliases mapped to their ``Place``."""
+    places = {}
+    with open(GAZETTEER, encoding="utf-8", newline="") as source:
+        for row in csv.DictReader(source):
+            place = Place(row["name"], float(row["latitude"]), float(row["longitude"]))
+            for name in [row["name"], *filter(None, row["aliases"].split("|"))]:
+                places.setdefault(" ".join(name.split()).casefold(), place)
+    return places
+
+
+def resolve(location):
+    """The gazetteer ``Place`` for free text like "Kochi" or "Cochin, Kerala".
+
+    Tries the whole text, then each comma/slash/dash-separated part in
+    order. Returns None for unknown places and "Remote".
+    """
+    places = gazetteer()
+    text = " ".join(location.split()).casefold()
+    for candidate in [text, *_PARTS_RE.split(text)]:
+        place = places.get(candidate.strip())
+        if place:
+            return place
+    return None
+
+
+def encode(latitude, longitude, length=GEOHASH_LENGTH):
+    """Standard base-32 geohash of a point."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < length:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def _cell_size(length):
+    """``(height, width)`` in degrees of a geohash cell of ``length`` characters."""
+    bits = 5 * length
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Geohash prefixes whose cells together cover the circle.
+
+    Picks the longest prefix length for which the circle's bounding box
+    spans at most MAX_CELLS cells, then drops the cells of that grid that
+    lie wholly outside the circle.
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)
+    widest = max(abs(south), abs(north))
+    if widest >= 89.9:
+        west, east = -180.0, 180.0
+    else:
+        lon_delta = min(lat_delta / math.cos(math.radians(widest)), 180.0)
+        west, east = longitude - lon_delta, longitude + lon_delta
+
+    for length in range(GEOHASH_LENGTH, 0, -1):
+        height, width = _cell_size(length)
+        rows = range(math.floor((south + 90) / height), math.floor((north + 90) / height) + 1)
+        columns = range(math.floor((west + 180) / width), math.floor((east + 180) / width) + 1)
+        if len(rows) * len(columns) <= MAX_CELLS or length == 1:
+            break
+    cells = set()
+    for row in rows:
+        bottom = -90 + row * height
+        for column in columns:
+            left = -180 + column * width
+            # The point of the cell nearest the centre, before wrapping
+            nearest_lat = min(max(latitude, bottom), bottom + height)
+            nearest_lon = min(max(longitude, left), left + width)
+            if _haversine_km(latitude, longitude, nearest_lat, nearest_lon) > radius_km:
+                continue
+            # The centre of each cell, with longitude wrapped across the antimeridian
+            cells.add(
+                encode(
+                    min(bottom + height / 2, 90.0),
+                    (left + width / 2 + 180) % 360 - 180,
+                    length,
+                )
+            )
+    return sorted(cells)
+
+
+def cell_ranges(cells):
+    """``(start, stop)`` geohash ranges covering sorted same-length ``cells``.
+
+    Cells whose geohashes are consecutive base-32 numbers share one range.
+    """
+    ranges = []
+    for cell in cells:
+        if ranges and _successor(ranges[-1][1]) == cell:
+            ranges[-1][1] = cell
+        else:
+            ranges.append([cell, cell])
+    # "~" sorts after every geohash character
+    return [(start, last + "~") for start, last in ranges]
+
+
+def _successor(cell):
+    value = 0
+    for char in cell:
+        value = value * 32 + _BASE32.index(char)
+    value += 1
+    if value >= 32 ** len(cell):
+        return None
+    chars = []
+    for _ in cell:
+        value, digit = divmod(value, 32)
+        chars.append(_BASE32[digit])
+    return "".join(reversed(chars))
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    chord = (
+        math.sin(math.radians(lat2 - lat1) / 2) ** 2
+        + math.cos(math.radians(lat1))
+        * math.cos(math.radians(lat2))
+        * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(chord, 1.0)))
+
+
+def distance_km(latitude, longitude):
+    """Haversine distance from a point to each row's coordinates, in SQL."""
+    half_lat = Sin(Radians(F("latitude") - latitude) / 2)
+    half_lon = Sin(Radians(F("longitude") - longitude) / 2)
+    chord = Power(half_lat, 2) + math.cos(math.radians(latitude)) * Cos(
+        Radians(F("latitude"))
+    ) * Power(half_lon, 2)
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(chord), output_field=FloatField())
+
+
+def selected_area(params):
+    """The ``(place, radius_km)`` of ``?near=Kochi&radius=25``, or None.
+
+    ``near`` is a gazetteer place or "latitude,longitude". Raises ValueError
+    for unknown places and radii outside 1..MAX_RADIUS_KM.
+    """
+    near = params.get("near", "").strip()
+    if not near:
+        return None
+    coordinates = _COORDINATES_RE.match(near)
+    if coordinates:
+        latitude, longitude = map(float, coordinates.groups())
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValueError("near must be a place or latitude,longitude.")
+        place = Place(near, latitude, longitude)
+    else:
+        place = resolve(near)
+        if place is None:
+            raise ValueError(f"Unknown place {near!r}.")
+    try:
+        radius = float(params.get("radius") or DEFAULT_RADIUS_KM)
+    except ValueError:
+        raise ValueError("radius must be a number of kilometres.")
+    if not 1 <= radius <= MAX_RADIUS_KM:
+        raise ValueError(f"radius must be between 1 and {MAX_RADIUS_KM} km.")
+    return place, radius
+
+
+def filter_jobs(queryset, area):
+    """Jobs within ``area``, annotated with their ``distance`` in km.
+
+    Geohash cells narrow the candidates to a few index ranges; the exact
+    distance is then computed for those rows only.
+    """
+    place, radius = area
+    cells = Q()
+    for start, stop in cell_ranges(covering_cells(place.latitude, place.longitude, radius)):
+        cells |= Q(geohash__gte=start, geohash__lt=stop)
+    return (
+        queryset.filter(cells)
+        .annotate(distance=distance_km(place.latitude, place.longitude))
+        .filter(distance__lte=radius)
+    )
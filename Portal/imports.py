@@ -0,0 +1,268 @@
+# imports.py - bulk job import from CSV / NDJSON uploads
+import codecs
+import csv
+import itertools
+import json
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import alerts, caching, facets, search
+from .forms import JobForm
+from .models import Job, JobImport
+
+BATCH_SIZE = 1000
+# Errors past this are counted but not listed, so the report stays small
+MAX_REPORTED_ERRORS = 500
+FORMATS = ("csv", "ndjson")
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, errors))
+
+    @property
+    def truncated(self):
+        return self.failed > len(self.errors)
+
+
+def guess_format(filename):
+    return "ndjson" if filename.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def read_rows(binary_file, fmt):
+    """Yield ``(line, row_or_error)`` from a binary file without loading it whole.
+
+    ``row_or_error`` is a dict of column values, or a string explaining why the
+    line could not be parsed.
+    """
+    text = codecs.getreader("utf-8-sig")(binary_file, errors="replace")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, "Too many columns"
+            else:
+                yield reader.line_num, row
+        return
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError as exc:
+            yield line, f"Invalid JSON: {exc}"
+            continue
+        if isinstance(row, dict):
+            yield line, row
+        else:
+            yield line, "Each line must be a JSON object"
+
+
+def validate_rows(rows, employer_id):
+    """Check a chunk of ``(line, row)`` pairs with JobForm.
+
+    Returns ``(jobs, errors)``: unsaved Jobs with their derived fields set,
+    and ``(line, {field: [messages]})`` for every rejected row. Takes and
+    returns only picklable values so chunks can run in worker processes.
+    """
+    jobs, errors = [], []
+    for line, row in rows:
+        if isinstance(row, str):
+            errors.append((line, {"__all__": [row]}))
+            continue
+        form = JobForm(data={name: _text(row.get(name)) for name in JobForm.base_fields})
+        if not form.is_valid():
+            errors.append((line, {field: list(messages) for field, messages in form.errors.items()}))
+            continue
+        job = form.save(commit=False)
+        job.employer_id = employer_id
+        job.refresh_derived_fields()
+        jobs.append(job)
+    return jobs, errors
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, size)):
+        yield chunk
+
+
+def _validated_in_pool(chunks, employer_id, workers):
+    """Validate chunks on a process pool, in order, with a bounded read-ahead."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(validate_rows, chunk, employer_id))
+            if len(pending) > workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def import_jobs(
+    employer, rows, batch_size=BATCH_SIZE, dry_run=False, workers=1, report=None, progress=None
+):
+    """Validate ``rows`` from ``read_rows`` with JobForm and bulk-insert them.
+
+    Each chunk of ``batch_size`` rows is inserted, indexed and counted in its
+    own transaction, and the listing caches are bumped once per chunk, so a
+    failure part way keeps the chunks already written. With ``workers`` > 1
+    validation runs on a process pool while this process inserts. Adds to
+    ``report`` if given and returns the ``ImportReport``; ``progress(report,
+    line)`` runs inside each chunk's transaction with the chunk's last line.
+    """
+    if report is None:
+        report = ImportReport()
+    last_lines = deque()
+
+    def chunks():
+        for chunk in _chunks(rows, batch_size):
+            last_lines.append(chunk[-1][0])
+            yield chunk
+
+    if workers > 1:
+        results = _validated_in_pool(chunks(), employer.pk, workers)
+    else:
+        results = (validate_rows(chunk, employer.pk) for chunk in chunks())
+    for jobs, errors in results:
+        for line, messages in errors:
+            report.add_error(line, messages)
+        report.created += len(jobs)
+        line = last_lines.popleft()
+        if dry_run:
+            continue
+        with transaction.atomic():
+            if jobs:
+                _insert(jobs)
+            if progress is not None:
+                progress(report, line)
+        if jobs:
+            caching.bump(caching.LISTING)
+    return report
+
+
+def _insert(batch):
+    Job.objects.bulk_create(batch)
+    search.index_jobs(batch)
+    facets.update_counts(added=[facets.snapshot(job) for job in batch])
+    alerts.match_jobs(batch)
+
+
+# --- Queued uploads ---------------------------------------------------------
+
+
+def queue_upload(employer, upload, fmt):
+    """Store ``upload`` and queue it for ``process_job_imports``."""
+    return JobImport.objects.create(
+        employer=employer, file=upload, format=fmt, size=upload.size
+    )
+
+
+def requeue_stale(minutes=30):
+    """Hand imports claimed by a worker that died back to the queue.
+
+    They resume after the last chunk the worker committed.
+    """
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return JobImport.objects.filter(
+        status=JobImport.RUNNING, updated_at__lt=cutoff
+    ).update(status=JobImport.PENDING, worker="")
+
+
+def claim():
+    """Atomically mark the oldest pending import as ours and return it, or None."""
+    worker = uuid.uuid4().hex
+    with transaction.atomic():
+        pk = (
+            JobImport.objects.filter(status=JobImport.PENDING)
+            .order_by("queued_at")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if pk is None:
+            return None
+        JobImport.objects.filter(pk=pk, status=JobImport.PENDING).update(
+            status=JobImport.RUNNING, worker=worker, updated_at=timezone.now()
+        )
+    return (
+        JobImport.objects.filter(worker=worker, status=JobImport.RUNNING)
+        .select_related("employer")
+        .first()
+    )
+
+
+def process(job_import, workers=1, batch_size=BATCH_SIZE):
+    """Import a claimed upload, saving its progress with every chunk."""
+    report = ImportReport()
+    report.created, report.failed = job_import.created, job_import.failed
+    report.errors = [tuple(error) for error in job_import.errors]
+    updates = JobImport.objects.filter(pk=job_import.pk)
+    try:
+        with job_import.file.open("rb") as handle:
+
+            def progress(report, line):
+                updates.update(
+                    line=line,
+                    bytes_read=handle.tell(),
+                    created=report.created,
+                    failed=report.failed,
+                    errors=report.errors,
+                    updated_at=timezone.now(),
+                )
+
+            rows = (
+                (line, row)
+                for line, row in read_rows(handle, job_import.format)
+                if line > job_import.line
+            )
+            import_jobs(
+                job_import.employer,
+                rows,
+                batch_size=batch_size,
+                workers=workers,
+                report=report,
+                progress=progress,
+            )
+        status, error = JobImport.DONE, ""
+    except Exception as exc:
+        # Chunks already committed stay imported; the report says where it stopped
+        status, error = JobImport.FAILED, (str(exc) or type(exc).__name__)[:255]
+    job_import.file.delete(save=False)
+    updates.update(
+        status=status, error=error, file="", worker="", updated_at=timezone.now()
+    )
+    return report
+
+
+def run(workers=1, batch_size=BATCH_SIZE, sleep=None):
+    """Import queued uploads one at a time and return how many were handled.
+
+    With ``sleep`` the worker never returns: it calls ``sleep()`` whenever the
+    queue is empty and polls again.
+    """
+    processed = 0
+    while True:
+        job_import = claim()
+        if job_import is None:
+            if sleep is None:
+                return processed
+            sleep()
+            continue
+        process(job_import, workers, batch_size)
+        processed += 1
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from .benchmark_portal import percentile
+
+
+def parse_target(value):
+    label, _, url = value.partition("=")
+    parts = urlsplit(url)
+    if not label or parts.scheme != "http" or not parts.hostname:
+        raise CommandError(f"Targets look like wsgi=http://127.0.0.1:8000, not {value!r}.")
+    return label, parts.hostname, parts.port or 80
+
+
+async def fetch(host, port, path, trickle=0.0):
+    """GET ``path`` and read the whole response; returns the status code.
+
+    With ``trickle`` the request headers are sent one line at a time over
+    that many seconds, like a client on a slow or congested link.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        lines = [
+            f"GET {path} HTTP/1.1\r\n",
+            f"Host: {host}:{port}\r\n",
+            "User-Agent: benchmark_concurrency\r\n",
+            "Accept: text/html,application/json\r\n",
+            "Connection: close\r\n",
+            "\r\n",
+        ]
+        for line in lines:
+            writer.write(line.encode())
+            await writer.drain()
+            if trickle:
+                await asyncio.sleep(trickle / len(lines))
+        status_line = await reader.readline()
+        while await reader.read(65536):
+            pass
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def timed(host, port, path, timeout, trickle=0.0):
+    start = time.perf_counter()
+    try:
+        status = await asyncio.wait_for(fetch(host, port, path, trickle), timeout)
+    except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+        return None
+    return status, time.perf_counter() - start
+
+
+async def run_target(host, port, options):
+    """Hold ``slow`` trickling connections open while fast probes run."""
+    path, timeout = options["path"], options["timeout"]
+    slow = [
+        asyncio.create_task(timed(host, port, path, timeout * 4, options["trickle"]))
+        for _ in range(options["slow"])
+    ]
+    # Let the slow clients connect and occupy whatever handles them
+    await asyncio.sleep(min(1.0, options["trickle"] / 2))
+
+    semaphore = asyncio.Semaphore(options["concurrency"])
+
+    async def probe():
+        async with semaphore:
+            return await timed(host, port, path, timeout)
+
+    start = time.perf_counter()
+    probes = await asyncio.gather(*(probe() for _ in range(options["probes"])))
+    elapsed = time.perf_counter() - start
+    slow = await asyncio.gather(*slow)
+
+    ok = sorted(result[1] for result in probes if result and result[0] < 500)
+    summary = {
+        "slow_clients": options["slow"],
+        "slow_completed": sum(1 for result in slow if result and result[0] < 500),
+        "probes": options["probes"],
+        "probes_ok": len(ok),
+        "probes_failed": options["probes"] - len(ok),
+        "probe_rps": round(len(ok) / elapsed, 1),
+    }
+    if ok:
+        summary.update(
+            probe_p50_ms=round(percentile(ok, 0.50) * 1000, 1),
+            probe_p99_ms=round(percentile(ok, 0.99) * 1000, 1),
+        )
+    return summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare how running servers (e.g. gunicorn sync workers against "
+        "uvicorn on Jobportal.asgi) cope with many slow connections: hold "
+        "--slow trickling clients open and report how fast --probes ordinary "
+        "requests are still served, as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target", action="append", required=True, type=parse_target,
+            help="label=http://host:port of a running server; repeat to compare.",
+        )
+        parser.add_argument("--path", default="/jobs/")
+        parser.add_argument("--slow", type=int, default=200,
+                            help="Connections that send their request slowly.")
+        parser.add_argument("--trickle", type=float, default=5.0,
+                            help="Seconds each slow client takes to send its request.")
+        parser.add_argument("--probes", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--timeout", type=float, default=5.0,
+                            help="A probe slower than this counts as failed.")
+
+    def handle(self, *args, **options):
+        report = {}
+        for label, host, port in options["target"]:
+            report[label] = asyncio.run(run_target(host, port, options))
+            self.stderr.write(
+                f"{label}: {report[label]['probes_ok']}/{options['probes']} probes ok, "
+                f"p99 {report[label].get('probe_p99_ms')} ms"
+            )
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,215 @@
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from Portal.middleware import QueryStats
+from Portal.models import Application, Job, User
+
+SCENARIOS = [
+    "job_list",
+    "job_list_search",
+    "job_detail",
+    "dashboard_seeker",
+    "dashboard_employer",
+    "view_applicants",
+    "apply_job",
+]
+SEARCH_TERMS = ["python", "developer", "django react", "sales*", '"data analyst"', "remote"]
+
+
+def percentile(sorted_values, fraction):
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method="inclusive")[
+        round(fraction * 100) - 1
+    ]
+
+
+def summarize(timings, queries, elapsed):
+    timings = sorted(timings)
+    return {
+        "requests": len(timings),
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "throughput_rps": round(len(timings) / elapsed, 1) if elapsed else None,
+        "queries_median": statistics.median(queries),
+        "queries_max": max(queries),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the portal's hot views in-process with the Django test client "
+        "and print latency percentiles, throughput and query counts as JSON. "
+        "Writes made by the benchmark are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200,
+                            help="Requests per scenario.")
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                            help="Run only these scenarios (repeatable).")
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+        parser.add_argument("--compare", help="Earlier JSON report to diff against.")
+
+    def handle(self, *args, **options):
+        self.fixtures = self.pick_fixtures()
+        scenarios = options["scenario"] or SCENARIOS
+        results = {}
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root, ALLOWED_HOSTS=["testserver", *settings.ALLOWED_HOSTS]
+        ):
+            for name in scenarios:
+                with transaction.atomic():
+                    results[name] = self.run_scenario(
+                        name, options["requests"], options["warmup"]
+                    )
+                    transaction.set_rollback(True)
+                self.stderr.write(
+                    f"{name}: p50 {results[name]['p50_ms']} ms, "
+                    f"p99 {results[name]['p99_ms']} ms, "
+                    f"{results[name]['queries_max']} queries"
+                )
+
+        report = {"meta": self.metadata(), "scenarios": results}
+        if options["compare"]:
+            report["compare"] = self.compare(options["compare"], results)
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                handle.write(output + "\n")
+        self.stdout.write(output)
+
+    def pick_fixtures(self):
+        popular = Job.objects.order_by("-applications_count").first()
+        seeker = (
+            User.objects.filter(role="seeker", applications__isnull=False)
+            .order_by("-pk")
+            .first()
+        )
+        if popular is None or seeker is None:
+            raise CommandError("No data to benchmark; run seed_portal first.")
+        return {
+            "popular": popular,
+            "employer": popular.employer,
+            "seeker": seeker,
+            "jobs": list(Job.objects.order_by("-pk").values_list("pk", flat=True)[:500]),
+        }
+
+    def requests_for(self, name):
+        """Yield ``(client, method, url, data)`` forever for one scenario."""
+        fixtures = self.fixtures
+        anonymous = Client()
+        seeker = Client()
+        seeker.force_login(fixtures["seeker"])
+        employer = Client()
+        employer.force_login(fixtures["employer"])
+        jobs = fixtures["jobs"]
+        i = 0
+        while True:
+            i += 1
+            if name == "job_list":
+                yield anonymous, "get", reverse("job_list"), {}
+            elif name == "job_list_search":
+                yield anonymous, "get", reverse("job_list"), {
+                    "search": SEARCH_TERMS[i % len(SEARCH_TERMS)]
+                }
+            elif name == "job_detail":
+                yield anonymous, "get", reverse("job_detail", args=[jobs[i % len(jobs)]]), {}
+            elif name == "dashboard_seeker":
+                yield seeker, "get", reverse("dashboard"), {}
+            elif name == "dashboard_employer":
+                yield employer, "get", reverse("dashboard"), {}
+            elif name == "view_applicants":
+                yield employer, "get", reverse(
+                    "view_applications", args=[fixtures["popular"].pk]
+                ), {}
+            elif name == "apply_job":
+                # A fresh seeker each time so every POST creates an application
+                user = User.objects.create(username=f"bench_seeker_{i}", role="seeker")
+                applicant = Client()
+                applicant.force_login(user)
+                yield applicant, "post", reverse(
+                    "apply_job", args=[jobs[i % len(jobs)]]
+                ), {
+                    "cover_letter": "Benchmark application",
+                    "resume": SimpleUploadedFile(
+                        "resume.pdf", b"%PDF-1.4 benchmark", "application/pdf"
+                    ),
+                }
+
+    def run_scenario(self, name, count, warmup):
+        requests = self.requests_for(name)
+        for _ in range(warmup):
+            client, method, url, data = next(requests)
+            getattr(client, method)(url, data)
+
+        timings, queries = [], []
+        elapsed = 0.0
+        for _ in range(count):
+            client, method, url, data = next(requests)
+            stats = QueryStats()
+            with connection.execute_wrapper(stats):
+                start = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                duration = time.perf_counter() - start
+            if response.status_code >= 400:
+                raise CommandError(f"{name}: {method.upper()} {url} -> {response.status_code}")
+            elapsed += duration
+            timings.append(duration)
+            queries.append(stats.count)
+        return summarize(timings, queries, elapsed)
+
+    def metadata(self):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True, text=True, cwd=settings.BASE_DIR, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "rows": {
+                "users": User.objects.count(),
+                "jobs": Job.objects.count(),
+                "applications": Application.objects.count(),
+            },
+        }
+
+    def compare(self, path, results):
+        with open(path) as handle:
+            baseline = json.load(handle)["scenarios"]
+        diff = {}
+        for name, current in results.items():
+            if name not in baseline:
+                continue
+            diff[name] = {
+                key: {
+                    "before": baseline[name][key],
+                    "after": current[key],
+                    "change_pct": round((current[key] / baseline[name][key] - 1) * 100, 1)
+                    if baseline[name][key]
+                    else None,
+                }
+                for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "queries_max")
+            }
+        return diff
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from Portal import storage
+
+
+class Command(BaseCommand):
+    help = "Delete stored resume blobs that no application references any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=24,
+            help="Keep blobs written more recently than this, in case an upload "
+            "has not committed its application yet.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        orphans = storage.collect_garbage(
+            grace_seconds=options["grace_hours"] * 3600, dry_run=options["dry_run"]
+        )
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(orphans)} unreferenced blobs."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Portal import exports
+from Portal.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream an employer's jobs or applications as CSV or NDJSON to a file "
+        "or stdout, in constant memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(exports.KINDS))
+        parser.add_argument("employer", help="Username of the employer to export.")
+        parser.add_argument("--format", choices=sorted(exports.FORMATS), default="csv")
+        parser.add_argument("--job", type=int, help="Only this job's rows.")
+        parser.add_argument("--output", help="Write to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        employer = User.objects.filter(
+            username=options["employer"], role="employer"
+        ).first()
+        if employer is None:
+            raise CommandError(f"No employer named {options['employer']!r}.")
+
+        lines = exports.stream(options["kind"], options["format"], employer, options["job"])
+        if options["output"]:
+            # newline="" keeps the CSV writer's \r\n line endings as they are
+            with open(options["output"], "w", encoding="utf-8", newline="") as handle:
+                handle.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Portal import resumes
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract text from queued resumes on a process pool and index it for "
+        "applicant search. Run once from cron, or with --loop as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Extractor processes (default: CPU count).")
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep polling for new resumes instead of exiting.")
+        parser.add_argument("--interval", type=float, default=5,
+                            help="Seconds to wait between polls with --loop.")
+        parser.add_argument("--stale-minutes", type=float, default=30,
+                            help="Requeue resumes claimed longer ago than this.")
+        parser.add_argument("--enqueue-missing", action="store_true",
+                            help="First queue applications that have no extraction row.")
+
+    def handle(self, *args, **options):
+        if options["enqueue_missing"]:
+            self.stdout.write(f"Queued {resumes.queue_missing()} applications.")
+
+        def wait():
+            time.sleep(options["interval"])
+            resumes.requeue_stale(options["stale_minutes"])
+
+        resumes.requeue_stale(options["stale_minutes"])
+        processed = resumes.run(
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            sleep=wait if options["loop"] else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} resumes."))
@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Portal import imports
+from Portal.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Import jobs for an employer from a CSV or NDJSON file. Rows are "
+        "validated like the Post Job form and inserted in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("employer", help="Username of the employer posting the jobs.")
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=imports.FORMATS,
+                            help="Default: guessed from the file extension.")
+        parser.add_argument("--batch-size", type=int, default=imports.BATCH_SIZE)
+        parser.add_argument("--workers", type=int, default=1,
+                            help="Validate rows on this many processes.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Validate every row without saving anything.")
+
+    def handle(self, *args, **options):
+        employer = User.objects.filter(
+            username=options["employer"], role="employer"
+        ).first()
+        if employer is None:
+            raise CommandError(f"No employer named {options['employer']!r}.")
+
+        started = time.monotonic()
+        fmt = options["format"] or imports.guess_format(options["path"])
+        with open(options["path"], "rb") as handle:
+            report = imports.import_jobs(
+                employer,
+                imports.read_rows(handle, fmt),
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+                workers=options["workers"],
+            )
+
+        for line, errors in report.errors:
+            for field, messages in errors.items():
+                prefix = "" if field == "__all__" else f"{field}: "
+                for message in messages:
+                    self.stderr.write(f"line {line}: {prefix}{message}")
+        if report.truncated:
+            self.stderr.write(f"... {report.failed - len(report.errors)} more rows failed")
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {report.created} jobs, skipped {report.failed} rows "
+                f"in {time.monotonic() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Portal import imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the job files employers uploaded under Manage Jobs, recording "
+        "progress as each batch is committed. Run once from cron, or with "
+        "--loop as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1,
+                            help="Validate rows on this many processes.")
+        parser.add_argument("--batch-size", type=int, default=imports.BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep polling for new uploads instead of exiting.")
+        parser.add_argument("--interval", type=float, default=5,
+                            help="Seconds to wait between polls with --loop.")
+        parser.add_argument("--stale-minutes", type=float, default=30,
+                            help="Resume imports claimed longer ago than this.")
+
+    def handle(self, *args, **options):
+        def wait():
+            time.sleep(options["interval"])
+            imports.requeue_stale(options["stale_minutes"])
+
+        imports.requeue_stale(options["stale_minutes"])
+        processed = imports.run(
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            sleep=wait if options["loop"] else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} imports."))
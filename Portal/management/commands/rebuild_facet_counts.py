@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from Portal import facets
+
+
+class Command(BaseCommand):
+    help = "Recompute the location/category/company facet counts from the Job table."
+
+    def handle(self, *args, **options):
+        buckets = facets.rebuild_counts()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} facet buckets."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from Portal import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text job search index from the Job table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of jobs written to the index per statement batch.",
+        )
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            self.stdout.write("Full-text index is only available on SQLite; nothing to do.")
+            return
+        count = search.rebuild_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} jobs."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from Portal import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute per-job application counters and fix any that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "job_ids", nargs="*", type=int, help="Only check these jobs (default: all)."
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = counters.reconcile(
+            batch_size=options["batch_size"], job_ids=options["job_ids"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Fixed counters on {fixed} jobs."))
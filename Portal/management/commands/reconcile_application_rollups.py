@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from Portal import analytics
+
+
+class Command(BaseCommand):
+    help = "Backfill the daily application rollups and fix any that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "job_ids", nargs="*", type=int, help="Only check these jobs (default: all)."
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = analytics.reconcile(
+            batch_size=options["batch_size"], job_ids=options["job_ids"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Fixed daily rollups of {fixed} jobs."))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Portal import ranking
+
+
+class Command(BaseCommand):
+    help = (
+        "Score the applicants of every job queued for ranking. Applications "
+        "queue their job when created or when their text changes, and ranked "
+        "applicant views only read stored scores. Run from cron, or with "
+        "--loop as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100,
+                            help="Queued jobs read per round.")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep polling for queued jobs instead of exiting.")
+        parser.add_argument("--interval", type=float, default=5,
+                            help="Seconds to wait between polls with --loop.")
+        parser.add_argument("--enqueue-missing", action="store_true",
+                            help="First queue every job with unscored applications.")
+
+    def handle(self, *args, **options):
+        if options["enqueue_missing"]:
+            ranking.queue_missing()
+        start = time.perf_counter()
+        scored = ranking.run(
+            batch_size=options["batch_size"],
+            sleep=(lambda: time.sleep(options["interval"])) if options["loop"] else None,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Scored {scored} applications in {time.perf_counter() - start:.1f}s."
+            )
+        )
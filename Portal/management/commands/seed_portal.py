@@ -0,0 +1,243 @@
+import bisect
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from Portal import analytics, counters, facets, ranking, resumes, search
+from Portal.models import Application, Job, User
+from Portal.storage import resume_storage
+
+CITIES = [
+    "Bangalore", "Hyderabad", "Pune", "Chennai", "Mumbai", "Delhi", "Gurgaon",
+    "Noida", "Kochi", "Trivandrum", "Kolkata", "Ahmedabad", "Jaipur", "Coimbatore",
+    "Remote",
+]
+CATEGORIES = [
+    "IT", "Software", "Sales", "Marketing", "Finance", "Design", "Operations",
+    "Human Resources", "Customer Support", "Data Science", "Healthcare", "Education",
+]
+ROLES = [
+    "Python Developer", "Java Developer", "Frontend Engineer", "Data Analyst",
+    "DevOps Engineer", "Sales Executive", "Product Designer", "Account Manager",
+    "QA Engineer", "HR Generalist", "Business Analyst", "Support Engineer",
+    "Machine Learning Engineer", "Content Writer", "Financial Analyst",
+]
+SKILLS = [
+    "django", "react", "sql", "aws", "kubernetes", "excel", "negotiation", "figma",
+    "python", "java", "spring", "docker", "tableau", "communication", "selenium",
+    "pandas", "linux", "salesforce", "seo", "accounting",
+]
+SALARIES = ["3-5 LPA", "6-8 LPA", "10-12 LPA", "15-20 LPA", "₹50,000/month", "$120k", ""]
+# Roughly how a real pipeline is spread across statuses
+STATUS_WEIGHTS = {
+    "pending": 50,
+    "reviewed": 20,
+    "shortlisted": 12,
+    "accepted": 5,
+    "rejected": 13,
+}
+MINIMAL_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[]/Count 0>>endobj\ntrailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+
+def zipf_weights(n, exponent):
+    """Cumulative weights where item ``k`` is ``1 / (k + 1) ** exponent`` likely."""
+    return list(accumulate(1 / (k + 1) ** exponent for k in range(n)))
+
+
+def pick(rng, items, cum_weights):
+    return items[bisect.bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create keep the seeded dates instead of auto_now_add's now()."""
+    previous = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, previous):
+            field.auto_now_add = value
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic users, jobs and applications with bulk_create for load "
+        "testing. Employer activity and job popularity are Zipf-skewed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seekers", type=int, default=10000)
+        parser.add_argument("--employers", type=int, default=500)
+        parser.add_argument("--jobs", type=int, default=50000)
+        parser.add_argument("--applications", type=int, default=200000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--resume-files", type=int, default=20,
+                            help="Number of distinct dummy resume files to share.")
+        parser.add_argument("--days", type=int, default=730,
+                            help="Spread postings over this many past days.")
+        parser.add_argument("--prefix", default="seed",
+                            help="Username prefix; must not be in use yet.")
+        parser.add_argument("--password", default="seedpass123",
+                            help="Password given to every seeded user.")
+        parser.add_argument("--random-seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["random_seed"])
+        self.batch_size = options["batch_size"]
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(f"Users prefixed {prefix!r} already exist; pass --prefix.")
+
+        started = time.monotonic()
+        password = make_password(options["password"])
+        employer_ids = self.create_users(prefix, "employer", options["employers"], password)
+        seeker_ids = self.create_users(prefix, "seeker", options["seekers"], password)
+        resume_files = self.create_resume_files(prefix, options["resume_files"])
+        job_ids = self.create_jobs(employer_ids, options["jobs"], options["days"])
+        created = self.create_applications(
+            job_ids, seeker_ids, resume_files, options["applications"]
+        )
+
+        # bulk_create skips the signals that keep these up to date
+        self.stdout.write(
+            "Rebuilding search index, facet counts, counters and daily rollups..."
+        )
+        search.rebuild_index(batch_size=self.batch_size)
+        facets.rebuild_counts()
+        counters.reconcile(batch_size=self.batch_size)
+        analytics.reconcile(batch_size=self.batch_size)
+        queued = resumes.queue_missing(batch_size=self.batch_size)
+        self.stdout.write(f"Queued {queued} resumes for text extraction.")
+        ranking.queue_missing()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(employer_ids)} employers, {len(seeker_ids)} seekers, "
+                f"{len(job_ids)} jobs and {created} applications "
+                f"in {time.monotonic() - started:.1f}s."
+            )
+        )
+
+    def batches(self, rows):
+        iterator = iter(rows)
+        while batch := list(itertools.islice(iterator, self.batch_size)):
+            yield batch
+
+    def create_users(self, prefix, role, count, password):
+        ids = []
+        users = (
+            User(
+                username=f"{prefix}_{role}_{i}",
+                email=f"{prefix}_{role}_{i}@example.com",
+                password=password,
+                role=role,
+            )
+            for i in range(count)
+        )
+        for batch in self.batches(users):
+            with transaction.atomic():
+                ids.extend(user.pk for user in User.objects.bulk_create(batch))
+        self.stdout.write(f"Created {len(ids)} {role}s.")
+        return ids
+
+    def create_resume_files(self, prefix, count):
+        storage = resume_storage()
+        return [
+            storage.save(
+                f"{prefix}_resume_{i}.pdf",
+                ContentFile(MINIMAL_PDF + f"% {prefix} resume {i}\n".encode()),
+            )
+            for i in range(count)
+        ]
+
+    def create_jobs(self, employer_ids, count, days):
+        rng = self.rng
+        # A handful of large employers post most of the jobs
+        employer_weights = zipf_weights(len(employer_ids), 1.1)
+        city_weights = zipf_weights(len(CITIES), 0.8)
+        now = timezone.now()
+        created_at = Job._meta.get_field("created_at")
+
+        def jobs():
+            for i in range(count):
+                role = rng.choice(ROLES)
+                skills = rng.sample(SKILLS, 4)
+                job = Job(
+                    employer_id=pick(rng, employer_ids, employer_weights),
+                    title=f"{rng.choice(['', 'Senior ', 'Junior ', 'Lead '])}{role}",
+                    description=(
+                        f"We are hiring a {role} with experience in {', '.join(skills)}. "
+                        + " ".join(rng.choices(SKILLS, k=60))
+                    ),
+                    salary=rng.choice(SALARIES),
+                    location=pick(rng, CITIES, city_weights),
+                    category=rng.choice(CATEGORIES),
+                    company=f"Company {rng.randrange(max(1, len(employer_ids) * 2))}",
+                    created_at=now - timedelta(seconds=rng.randrange(days * 86400)),
+                )
+                job.refresh_derived_fields()
+                yield job
+
+        ids = []
+        with explicit_timestamps(created_at):
+            for batch in self.batches(jobs()):
+                with transaction.atomic():
+                    ids.extend(job.pk for job in Job.objects.bulk_create(batch))
+        self.stdout.write(f"Created {len(ids)} jobs.")
+        return ids
+
+    def create_applications(self, job_ids, seeker_ids, resumes, count):
+        rng = self.rng
+        if not job_ids or not seeker_ids:
+            return 0
+        # A few postings attract most applicants
+        job_weights = zipf_weights(len(job_ids), 1.0)
+        shuffled_jobs = list(job_ids)
+        rng.shuffle(shuffled_jobs)
+        statuses = list(STATUS_WEIGHTS)
+        status_weights = list(accumulate(STATUS_WEIGHTS.values()))
+        now = timezone.now()
+        applied_at = Application._meta.get_field("applied_at")
+
+        def applications():
+            for _ in range(count):
+                resume = rng.choice(resumes)
+                status = pick(rng, statuses, status_weights)
+                applied = now - timedelta(seconds=rng.randrange(180 * 86400))
+                reviewed = None
+                if status != "pending":
+                    # First looked at within two weeks, for the analytics review times
+                    reviewed = min(applied + timedelta(seconds=rng.randrange(14 * 86400)), now)
+                yield Application(
+                    job_id=pick(rng, shuffled_jobs, job_weights),
+                    seeker_id=rng.choice(seeker_ids),
+                    cover_letter=" ".join(rng.choices(SKILLS, k=30)),
+                    resume=resume,
+                    resume_name="resume.pdf",
+                    status=status,
+                    applied_at=applied,
+                    reviewed_at=reviewed,
+                )
+
+        before = Application.objects.count()
+        with explicit_timestamps(applied_at):
+            for batch in self.batches(applications()):
+                with transaction.atomic():
+                    # Repeated (job, seeker) pairs are dropped by the unique constraint
+                    Application.objects.bulk_create(batch, ignore_conflicts=True)
+        created = Application.objects.count() - before
+        self.stdout.write(f"Created {created} applications.")
+        return created
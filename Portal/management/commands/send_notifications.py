@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Portal import notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Mail queued application notifications as one digest per recipient. "
+        "Run once from cron, or with --loop as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200,
+                            help="Events claimed and mailed per round.")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep polling for new events instead of exiting.")
+        parser.add_argument("--interval", type=float, default=5,
+                            help="Seconds to wait between polls with --loop.")
+        parser.add_argument("--stale-minutes", type=float, default=10,
+                            help="Requeue events claimed longer ago than this.")
+        parser.add_argument("--keep-days", type=float, default=30,
+                            help="Delete sent events older than this.")
+
+    def handle(self, *args, **options):
+        def wait():
+            time.sleep(options["interval"])
+            notifications.requeue_stale(options["stale_minutes"])
+
+        notifications.requeue_stale(options["stale_minutes"])
+        purged = notifications.purge_sent(options["keep_days"])
+        handled = notifications.run(
+            batch_size=options["batch_size"],
+            sleep=wait if options["loop"] else None,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Handled {handled} events; purged {purged} sent events.")
+        )
@@ -0,0 +1,159 @@
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILES = ("default", "production")
+
+
+def profile_options(profile):
+    return dict(settings.SQLITE_PRODUCTION_OPTIONS) if profile == "production" else {}
+
+
+def _worker(worker, db_path, options, seconds, write_ratio, barrier, results):
+    """One process hammering ``db_path`` with a mix of listing reads and writes."""
+    import django
+
+    django.setup()
+    settings.DATABASES["default"].update(NAME=db_path, OPTIONS=options)
+    # Keep cache version bumps away from the real cache directory
+    settings.PORTAL_CACHE_ALIAS = "default"
+
+    from django.db import OperationalError, connection, transaction
+
+    from Portal.models import Application, Job, User
+
+    employer = User.objects.create(username=f"stress_employer_{worker}", role="employer")
+    seeker = User.objects.create(username=f"stress_seeker_{worker}", role="seeker")
+    job_ids = list(Job.objects.order_by("-id").values_list("id", flat=True)[:5000])
+    applied = iter(job_ids)
+    rng = random.Random(worker)
+
+    def read():
+        list(Job.objects.only("id", "title", "summary", "created_at")[:20])
+        Job.objects.only("id", "title", "description").get(pk=rng.choice(job_ids))
+
+    def apply():
+        with transaction.atomic():
+            Application.objects.create(
+                job_id=next(applied), seeker=seeker, cover_letter="stress",
+                resume="resumes/stress.pdf",
+            )
+
+    def post():
+        with transaction.atomic():
+            Job.objects.create(
+                employer=employer, title="Stress Engineer", description="Load test " * 50,
+                location="Kochi", category="IT", company=f"Stress {worker}",
+            )
+
+    timings = {"read": [], "write": []}
+    errors = Counter()
+    barrier.wait()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        kind = "write" if rng.random() < write_ratio else "read"
+        operation = read if kind == "read" else rng.choice([apply, post])
+        start = time.perf_counter()
+        try:
+            operation()
+        except OperationalError as exc:
+            errors[f"{kind}: {exc}"] += 1
+            continue
+        except StopIteration:
+            break
+        timings[kind].append(time.perf_counter() - start)
+    connection.close()
+    results.put((timings, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent reader/writer processes against a copy of the SQLite "
+        "database under the default and production profiles, and report "
+        "throughput, latency and lock errors as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=10)
+        parser.add_argument("--write-ratio", type=float, default=0.2,
+                            help="Share of operations that write (apply or post).")
+        parser.add_argument("--profile", action="append", choices=PROFILES,
+                            help="Profiles to compare (default: both).")
+
+    def handle(self, *args, **options):
+        source = settings.DATABASES["default"]
+        if source["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("stress_sqlite only runs against SQLite.")
+
+        report = {}
+        with tempfile.TemporaryDirectory() as scratch:
+            for profile in options["profile"] or PROFILES:
+                db_path = os.path.join(scratch, f"{profile}.sqlite3")
+                self.copy_database(str(source["NAME"]), db_path)
+                report[profile] = self.run_profile(profile, db_path, options)
+                self.stderr.write(
+                    f"{profile}: {report[profile]['reads_per_s']} reads/s, "
+                    f"{report[profile]['writes_per_s']} writes/s, "
+                    f"{sum(report[profile]['errors'].values())} errors"
+                )
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def copy_database(self, source, target):
+        # The backup API gives a consistent copy even while the site is running
+        with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+            src.backup(dst)
+            dst.execute("PRAGMA journal_mode=DELETE")
+
+    def run_profile(self, profile, db_path, options):
+        # Imported here: spawned workers load this module before django.setup()
+        from .benchmark_portal import percentile
+
+        context = multiprocessing.get_context("spawn")
+        processes = options["processes"]
+        barrier = context.Barrier(processes)
+        results = context.Queue()
+        workers = [
+            context.Process(
+                target=_worker,
+                args=(
+                    worker, db_path, profile_options(profile), options["seconds"],
+                    options["write_ratio"], barrier, results,
+                ),
+            )
+            for worker in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        collected = [results.get() for _ in workers]
+        for process in workers:
+            process.join()
+
+        timings = {"read": [], "write": []}
+        errors = Counter()
+        for worker_timings, worker_errors in collected:
+            for kind, values in worker_timings.items():
+                timings[kind].extend(values)
+            errors.update(worker_errors)
+        summary = {
+            "processes": processes,
+            "seconds": options["seconds"],
+            "reads_per_s": round(len(timings["read"]) / options["seconds"], 1),
+            "writes_per_s": round(len(timings["write"]) / options["seconds"], 1),
+            "errors": dict(errors),
+        }
+        for kind, values in timings.items():
+            if values:
+                values.sort()
+                summary[f"{kind}_p50_ms"] = round(percentile(values, 0.50) * 1000, 2)
+                summary[f"{kind}_p99_ms"] = round(percentile(values, 0.99) * 1000, 2)
+                summary[f"{kind}_max_ms"] = round(values[-1] * 1000, 2)
+        return summary
@@ -0,0 +1,113 @@
+# middleware.py - per-request SQL statistics
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("Portal.queries")
+
+_IN_LIST_RE = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def query_shape(sql):
+    """SQL with placeholder lists collapsed, so N+1 lookups share one shape."""
+    return _SPACE_RE.sub(" ", _IN_LIST_RE.sub("(%s...)", sql)).strip()
+
+
+class QueryStats:
+    """Execute wrapper that counts, times and fingerprints every query."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[query_shape(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """``{shape: times}`` for every shape run more than once."""
+        return {shape: times for shape, times in self.shapes.items() if times > 1}
+
+
+class QueryStatsMiddleware:
+    """Record query count, SQL time and repeated query shapes per request.
+
+    Every request is logged to ``Portal.queries`` (a warning once the same
+    shape repeats ``QUERY_STATS_DUPLICATE_WARNING`` times, the usual sign of an
+    N+1). With ``QUERY_STATS_HEADERS`` on, the numbers are also sent as
+    ``X-Query-Count``, ``X-Query-Time-Ms`` and ``X-Duplicate-Queries`` headers.
+
+    Under ASGI the wrappers are installed from the request's thread-sensitive
+    worker thread, which is where Django runs the ORM calls of async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.headers = getattr(settings, "QUERY_STATS_HEADERS", settings.DEBUG)
+        self.duplicate_warning = getattr(settings, "QUERY_STATS_DUPLICATE_WARNING", 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = QueryStats()
+        with ExitStack() as stack:
+            self.install(stack, stats)
+            response = self.get_response(request)
+        return self.report(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        stack = ExitStack()
+        await sync_to_async(self.install)(stack, stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.report(request, response, stats)
+
+    def install(self, stack, stats):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+
+    def report(self, request, response, stats):
+        duplicated = sum(times - 1 for times in stats.duplicates.values())
+        if self.headers:
+            response["X-Query-Count"] = str(stats.count)
+            response["X-Query-Time-Ms"] = f"{stats.duration * 1000:.1f}"
+            response["X-Duplicate-Queries"] = str(duplicated)
+
+        worst = max(stats.duplicates.values(), default=0)
+        level = logging.WARNING if worst >= self.duplicate_warning else logging.INFO
+        logger.log(
+            level,
+            "%s %s: %d queries in %.1f ms, %d duplicated",
+            request.method,
+            request.path,
+            stats.count,
+            stats.duration * 1000,
+            duplicated,
+            extra={"query_shapes": stats.duplicates},
+        )
+        if level == logging.WARNING:
+            for shape, times in sorted(stats.duplicates.items(), key=lambda i: -i[1]):
+                logger.warning("  %dx %s", times, shape)
+        return response
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:29
+
+import Portal.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS Portal_jobsearchindex USING fts5("
+        "title, company, description, category, location, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    # Title and company matches outrank a passing mention in the description.
+    schema_editor.execute(
+        "INSERT INTO Portal_jobsearchindex(Portal_jobsearchindex, rank) "
+        "VALUES ('rank', 'bm25(10.0, 6.0, 1.0, 3.0, 3.0)')"
+    )
+    schema_editor.execute(
+        "INSERT INTO Portal_jobsearchindex"
+        "(rowid, title, company, description, category, location) "
+        "SELECT id, title, company, description, category, location FROM Portal_job"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS Portal_jobsearchindex")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0005_application_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSearchIndex',
+            fields=[
+                ('job', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='Portal.job')),
+                ('title', models.TextField()),
+                ('company', models.TextField()),
+                ('description', models.TextField()),
+                ('category', models.TextField()),
+                ('location', models.TextField()),
+                ('document', Portal.models.SearchDocumentField(db_column='Portal_jobsearchindex')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'Portal_jobsearchindex',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:30
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def backfill_summaries(apps, schema_editor):
+    Job = apps.get_model("Portal", "Job")
+    batch = []
+    for job in Job.objects.only("id", "description").iterator(chunk_size=2000):
+        job.summary = Truncator(" ".join(job.description.split())).chars(200)
+        batch.append(job)
+        if len(batch) >= 2000:
+            Job.objects.bulk_update(batch, ["summary"])
+            batch = []
+    if batch:
+        Job.objects.bulk_update(batch, ["summary"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0006_jobsearchindex'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='job',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='summary',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['-created_at', '-id'], name='job_listing_idx'),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:31
+
+from collections import Counter
+
+from django.db import migrations, models
+
+FACETS = ("location", "category", "company")
+
+
+def backfill_facets(apps, schema_editor):
+    Job = apps.get_model("Portal", "Job")
+    FacetCount = apps.get_model("Portal", "FacetCount")
+    counts = Counter()
+    labels = {}
+    batch = []
+    for job in Job.objects.only("id", *FACETS).iterator(chunk_size=2000):
+        for facet in FACETS:
+            label = " ".join(getattr(job, facet).split())
+            key = label.casefold()
+            setattr(job, f"{facet}_key", key)
+            if key:
+                counts[facet, key] += 1
+                labels.setdefault((facet, key), label)
+        batch.append(job)
+        if len(batch) >= 2000:
+            Job.objects.bulk_update(batch, [f"{facet}_key" for facet in FACETS])
+            batch = []
+    if batch:
+        Job.objects.bulk_update(batch, [f"{facet}_key" for facet in FACETS])
+    FacetCount.objects.bulk_create(
+        FacetCount(facet=facet, value=key, label=labels[facet, key], count=count)
+        for (facet, key), count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0007_job_summary_listing_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='category_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=120),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='company_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=120),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='location_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=120),
+        ),
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('location', 'Location'), ('category', 'Category'), ('company', 'Company')], max_length=20)),
+                ('value', models.CharField(max_length=120)),
+                ('label', models.CharField(max_length=120)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['facet', '-count'], name='facet_top_values_idx')],
+                'constraints': [models.UniqueConstraint(fields=('facet', 'value'), name='unique_facet_value')],
+            },
+        ),
+        migrations.RunPython(backfill_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:32
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+STATUSES = ("pending", "reviewed", "shortlisted", "accepted", "rejected")
+
+
+def backfill_counters(apps, schema_editor):
+    Job = apps.get_model("Portal", "Job")
+    Application = apps.get_model("Portal", "Application")
+    rows = (
+        Application.objects.order_by()
+        .values("job_id")
+        .annotate(
+            applications_count=Count("id"),
+            **{
+                f"{status}_count": Count("id", filter=Q(status=status))
+                for status in STATUSES
+            },
+        )
+    )
+    for row in rows:
+        Job.objects.filter(pk=row.pop("job_id")).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0008_job_facets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='accepted_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='applications_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='rejected_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='reviewed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='shortlisted_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:42
+
+import Portal.storage
+import django.core.validators
+import os
+
+from django.core.files import File
+from django.db import migrations, models
+
+
+def deduplicate_resumes(apps, schema_editor):
+    """Move existing resumes into content-addressed blobs, one per distinct file."""
+    Application = apps.get_model("Portal", "Application")
+    storage = Portal.storage.resume_storage()
+    moved = {}
+    applications = (
+        Application.objects.exclude(resume="")
+        .exclude(resume__startswith=Portal.storage.BLOB_PREFIX + "/")
+        .only("id", "resume")
+    )
+    for application in applications.iterator(chunk_size=2000):
+        old_name = application.resume.name
+        if old_name not in moved:
+            if not storage.exists(old_name):
+                continue
+            with storage.open(old_name) as handle:
+                moved[old_name] = storage.save(old_name, File(handle))
+        Application.objects.filter(pk=application.pk).update(
+            resume=moved[old_name], resume_name=os.path.basename(old_name)
+        )
+    for old_name in moved:
+        storage.delete(old_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0009_job_application_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='resume_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='resume',
+            field=models.FileField(db_index=True, max_length=255, storage=Portal.storage.resume_storage, upload_to='resumes/', validators=[django.core.validators.FileExtensionValidator(['pdf', 'doc', 'docx'])]),
+        ),
+        migrations.RunPython(deduplicate_resumes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:44
+
+import Portal.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS Portal_applicationsearchindex USING fts5("
+        "resume, cover_letter, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS Portal_applicationsearchindex")
+
+
+def queue_existing_resumes(apps, schema_editor):
+    Application = apps.get_model("Portal", "Application")
+    ResumeExtraction = apps.get_model("Portal", "ResumeExtraction")
+    ids = Application.objects.exclude(resume="").values_list("id", flat=True)
+    batch = []
+    for application_id in ids.iterator(chunk_size=5000):
+        batch.append(ResumeExtraction(application_id=application_id))
+        if len(batch) >= 5000:
+            ResumeExtraction.objects.bulk_create(batch)
+            batch = []
+    ResumeExtraction.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0010_content_addressed_resumes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationSearchIndex',
+            fields=[
+                ('application', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='Portal.application')),
+                ('resume', models.TextField()),
+                ('cover_letter', models.TextField()),
+                ('document', Portal.models.SearchDocumentField(db_column='Portal_applicationsearchindex')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'Portal_applicationsearchindex',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumeExtraction',
+            fields=[
+                ('application', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='extraction', serialize=False, to='Portal.application')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('text', models.TextField(blank=True)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('worker', models.CharField(blank=True, max_length=32)),
+                ('queued_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'queued_at'], name='extraction_queue_idx')],
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+        migrations.RunPython(queue_existing_resumes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:59
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing rows were last written when they were posted, as far as we know
+    Job = apps.get_model("Portal", "Job")
+    Job.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0011_resume_extraction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.PositiveBigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['updated_at', 'id'], name='job_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deletedjob',
+            index=models.Index(fields=['deleted_at', 'id'], name='deleted_job_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:37
+
+from django.db import migrations, models
+
+from Portal import salaries
+
+
+def backfill_salaries(apps, schema_editor):
+    Job = apps.get_model("Portal", "Job")
+    rows = Job.objects.exclude(salary="").values_list("id", "salary")
+    parsed = []
+    for pk, text in rows.iterator(chunk_size=2000):
+        salary = salaries.parse(text)
+        if salary is not None:
+            parsed.append((*salary, pk))
+    # One keyed UPDATE per row; bulk_update's CASE WHEN is quadratic per batch
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f"UPDATE {Job._meta.db_table} SET salary_min = %s, salary_max = %s, "
+            f"salary_currency = %s, salary_period = %s WHERE id = %s",
+            parsed,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0014_application_relevance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='salary_currency',
+            field=models.CharField(blank=True, editable=False, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='salary_max',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='salary_min',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='salary_period',
+            field=models.CharField(blank=True, choices=[('year', 'Year'), ('month', 'Month'), ('week', 'Week'), ('day', 'Day'), ('hour', 'Hour')], editable=False, max_length=5),
+        ),
+        # Before the index, so the backfill does not maintain it row by row
+        migrations.RunPython(backfill_salaries, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['salary_currency', '-salary_max', '-id'], name='job_salary_idx'),
+        ),
+    ]
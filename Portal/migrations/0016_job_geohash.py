@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:47
+
+from django.db import migrations, models
+
+from Portal import geo
+
+
+def backfill_coordinates(apps, schema_editor):
+    Job = apps.get_model("Portal", "Job")
+    # Far fewer distinct places than jobs; location_key is indexed
+    keys = Job.objects.order_by().values_list("location_key", flat=True).distinct()
+    for key in list(keys):
+        place = geo.resolve(key)
+        if place:
+            Job.objects.filter(location_key=key).update(
+                latitude=place.latitude,
+                longitude=place.longitude,
+                geohash=geo.encode(place.latitude, place.longitude),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0015_job_salary_range'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=9),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_coordinates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_vocab_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    # Per-term job counts, read when choosing a saved search's rarest word
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS Portal_jobsearchvocab "
+        "USING fts5vocab(Portal_jobsearchindex, row)"
+    )
+
+
+def drop_vocab_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS Portal_jobsearchvocab")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0018_outbox_event'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxevent',
+            name='application_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='outboxevent',
+            name='kind',
+            field=models.CharField(choices=[('applied', 'New application'), ('status_changed', 'Status changed'), ('job_alert', 'Job alert')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('query', models.TextField()),
+                ('search', models.CharField(blank=True, max_length=255)),
+                ('facets', models.JSONField(default=dict)),
+                ('salary_currency', models.CharField(blank=True, max_length=3)),
+                ('salary_min', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('salary_max', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('seeker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SavedSearchKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=130)),
+                ('search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='keys', to='Portal.savedsearch')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='savedsearch',
+            index=models.Index(fields=['seeker', '-created_at'], name='saved_search_seeker_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedsearchkey',
+            index=models.Index(fields=['key', 'search'], name='saved_search_key_idx'),
+        ),
+        migrations.RunPython(create_vocab_table, drop_vocab_table),
+    ]
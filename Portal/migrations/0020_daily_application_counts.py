@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0019_saved_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='reviewed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='DailyApplicationCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('reviewed', 'Reviewed'), ('shortlisted', 'Shortlisted'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], max_length=20)),
+                ('applications', models.IntegerField(default=0)),
+                ('reviewed', models.IntegerField(default=0)),
+                ('review_seconds', models.BigIntegerField(default=0)),
+                ('employer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_counts', to='Portal.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['employer', 'day'], name='daily_application_employer_idx')],
+                'constraints': [models.UniqueConstraint(fields=('job', 'day', 'status'), name='daily_application_count_unique')],
+            },
+        ),
+    ]
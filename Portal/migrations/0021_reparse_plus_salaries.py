@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from Portal import salaries
+
+
+def reparse_salaries(apps, schema_editor):
+    # "15+ LPA" used to lose its scale word; only such rows can have changed
+    Job = apps.get_model("Portal", "Job")
+    rows = Job.objects.filter(salary__contains="+").values_list("id", "salary")
+    parsed = []
+    for pk, text in rows.iterator(chunk_size=2000):
+        salary = salaries.parse(text)
+        if salary is not None:
+            parsed.append((*salary, pk))
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f"UPDATE {Job._meta.db_table} SET salary_min = %s, salary_max = %s, "
+            f"salary_currency = %s, salary_period = %s WHERE id = %s",
+            parsed,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0020_daily_application_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(reparse_salaries, migrations.RunPython.noop),
+    ]
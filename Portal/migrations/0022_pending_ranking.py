@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def queue_unscored_jobs(apps, schema_editor):
+    # Ranked views no longer score on demand: queue the existing backlog
+    Application = apps.get_model("Portal", "Application")
+    PendingRanking = apps.get_model("Portal", "PendingRanking")
+    job_ids = (
+        Application.objects.filter(relevance__isnull=True)
+        .order_by()
+        .values_list("job_id", flat=True)
+        .distinct()
+    )
+    PendingRanking.objects.bulk_create(
+        [PendingRanking(job_id=job_id) for job_id in job_ids], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Portal', '0021_reparse_plus_salaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingRanking',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='Portal.job')),
+                ('queued_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['queued_at'], name='ranking_queue_idx')],
+            },
+        ),
+        migrations.RunPython(queue_unscored_jobs, migrations.RunPython.noop),
+    ]
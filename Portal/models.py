@@ -1,6 +1,13 @@
+import os
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import FileExtensionValidator
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from . import geo, salaries
+from .storage import resume_storage
 
 
 class User(AbstractUser):
@@ -10,6 +17,12 @@ class User(AbstractUser):
     )
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # The admin's user list filtered by role, in username order
+            models.Index(fields=["role", "username"], name="user_role_idx"),
+        ]
+
     def is_seeker(self):
         return self.role == "seeker"
 
@@ -17,6 +30,12 @@ class User(AbstractUser):
         return self.role == "employer"
 
 
+SUMMARY_LENGTH = 200
+FACETS = ("location", "category", "company")
+SALARY_FIELDS = ("salary_min", "salary_max", "salary_currency", "salary_period")
+GEO_FIELDS = ("latitude", "longitude", "geohash")
+
+
 class Job(models.Model):
     employer = models.ForeignKey(
         User,
@@ -30,14 +49,108 @@ class Job(models.Model):
     location = models.CharField(max_length=120)
     category = models.CharField(max_length=120)
     company = models.CharField(max_length=120)
+    summary = models.CharField(max_length=SUMMARY_LENGTH, blank=True, editable=False)
+    # Normalized copies of the facet columns, used for filtering and rollups
+    location_key = models.CharField(max_length=120, blank=True, editable=False, db_index=True)
+    category_key = models.CharField(max_length=120, blank=True, editable=False, db_index=True)
+    company_key = models.CharField(max_length=120, blank=True, editable=False, db_index=True)
+    # ``salary`` parsed by Portal.salaries: yearly whole units, NULL if unparsed
+    salary_min = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    salary_max = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    salary_currency = models.CharField(max_length=3, blank=True, editable=False)
+    salary_period = models.CharField(
+        max_length=5,
+        blank=True,
+        editable=False,
+        choices=[(period, period.title()) for period in salaries.PERIODS],
+    )
+    # ``location`` resolved through the bundled gazetteer (Portal.geo); the
+    # geohash prefix index narrows radius searches. Empty for unknown places.
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    geohash = models.CharField(
+        max_length=geo.GEOHASH_LENGTH, blank=True, editable=False, db_index=True
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Last edit of the posting itself; counter changes do not touch it
+    updated_at = models.DateTimeField(auto_now=True)
+    # Application counters, maintained by Portal.counters
+    applications_count = models.PositiveIntegerField(default=0, editable=False)
+    pending_count = models.PositiveIntegerField(default=0, editable=False)
+    reviewed_count = models.PositiveIntegerField(default=0, editable=False)
+    shortlisted_count = models.PositiveIntegerField(default=0, editable=False)
+    accepted_count = models.PositiveIntegerField(default=0, editable=False)
+    rejected_count = models.PositiveIntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = (
+        "applications_count",
+        "pending_count",
+        "reviewed_count",
+        "shortlisted_count",
+        "accepted_count",
+        "rejected_count",
+    )
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="job_listing_idx"),
+            models.Index(fields=["updated_at", "id"], name="job_updated_idx"),
+            # An employer's jobs, newest first (dashboard, manage_jobs)
+            models.Index(fields=["employer", "-created_at", "-id"], name="job_employer_idx"),
+            # Salary range filters and highest-paying-first, per currency
+            models.Index(
+                fields=["salary_currency", "-salary_max", "-id"], name="job_salary_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} — {self.company}"
 
+    @staticmethod
+    def summarize(description):
+        # Short plain-text excerpt shown on listing cards instead of the full text
+        return Truncator(" ".join(description.split())).chars(SUMMARY_LENGTH)
+
+    @staticmethod
+    def normalize_facet(value):
+        return " ".join(value.split()).casefold()
+
+    def refresh_derived_fields(self):
+        """Recompute the denormalized columns; bulk writers call this directly."""
+        self.summary = self.summarize(self.description)
+        for facet in FACETS:
+            setattr(self, f"{facet}_key", self.normalize_facet(getattr(self, facet)))
+        place = geo.resolve(self.location)
+        self.latitude, self.longitude = (place.latitude, place.longitude) if place else (None, None)
+        self.geohash = geo.encode(place.latitude, place.longitude) if place else ""
+        salary = salaries.parse(self.salary)
+        self.salary_min, self.salary_max, self.salary_currency, self.salary_period = (
+            salary or (None, None, "", "")
+        )
+
+    def save(self, *args, **kwargs):
+        self.refresh_derived_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None and not self._state.adding:
+            # Never write back counters loaded before a concurrent application.
+            update_fields = kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        if update_fields is not None:
+            derived = {"updated_at"}
+            if "description" in update_fields:
+                derived.add("summary")
+            if "salary" in update_fields:
+                derived.update(SALARY_FIELDS)
+            if "location" in update_fields:
+                derived.update(GEO_FIELDS)
+            derived.update(f"{f}_key" for f in FACETS if f in update_fields)
+            kwargs["update_fields"] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
+
 
 class Application(models.Model):
     STATUS_CHOICES = [
@@ -58,14 +171,401 @@ class Application(models.Model):
     cover_letter = models.TextField(blank=True)
     resume = models.FileField(
         upload_to="resumes/",
+        storage=resume_storage,
+        db_index=True,
+        max_length=255,
         validators=[FileExtensionValidator(["pdf", "doc", "docx"])],
     )
+    # Resumes are stored under their content hash; this keeps the uploaded name
+    resume_name = models.CharField(max_length=255, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
     applied_at = models.DateTimeField(auto_now_add=True)
+    # When the application first left "pending"; the end of time-to-review
+    reviewed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Similarity of the cover letter and resume to the job (see ranking.py);
+    # NULL until scored, and reset whenever either side's text changes
+    relevance = models.FloatField(null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = ("job", "seeker")  # one application per seeker per job
         ordering = ["-applied_at"]
+        indexes = [
+            # A seeker's applications, newest first (seeker dashboard)
+            models.Index(fields=["seeker", "-applied_at"], name="application_seeker_idx"),
+            # A job's applicants, newest first, optionally of one status
+            # (view_applicants); the second also covers per-status counts
+            models.Index(fields=["job", "-applied_at"], name="application_job_idx"),
+            models.Index(
+                fields=["job", "status", "-applied_at"], name="application_job_status_idx"
+            ),
+            # A job's applicants, best match first (view_applicants?sort=relevance)
+            models.Index(fields=["job", "-relevance", "-id"], name="application_relevance_idx"),
+            # Every application newest first, optionally of one status or
+            # applied in a date range (admin); read backwards, these also give
+            # -id within the same applied_at
+            models.Index(fields=["applied_at"], name="application_applied_idx"),
+            models.Index(fields=["status", "applied_at"], name="application_status_idx"),
+        ]
 
     def __str__(self):
         return f"{self.seeker.username} → {self.job.title} ({self.status})"
+
+    def save(self, *args, **kwargs):
+        if self.resume and not self.resume._committed:
+            self.resume_name = os.path.basename(self.resume.name)
+        if self.status != "pending" and self.reviewed_at is None:
+            self.reviewed_at = timezone.now()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "reviewed_at"}
+        super().save(*args, **kwargs)
+
+
+class DeletedJob(models.Model):
+    """Tombstone for a deleted posting, so API sync clients can drop it."""
+
+    job_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="deleted_job_feed_idx"),
+        ]
+
+    def __str__(self):
+        return f"Job {self.job_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class FacetCount(models.Model):
+    """Number of jobs per normalized facet value, maintained incrementally."""
+
+    FACET_CHOICES = [(facet, facet.title()) for facet in FACETS]
+
+    facet = models.CharField(max_length=20, choices=FACET_CHOICES)
+    value = models.CharField(max_length=120)
+    label = models.CharField(max_length=120)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["facet", "value"], name="unique_facet_value"),
+        ]
+        indexes = [
+            models.Index(fields=["facet", "-count"], name="facet_top_values_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.facet}: {self.label} ({self.count})"
+
+
+class DailyApplicationCount(models.Model):
+    """Applications to a job received on ``day`` and now in ``status``.
+
+    Maintained incrementally as applications are written, so the employer
+    analytics page never groups the Application table. ``reviewed`` of them
+    have a ``reviewed_at``, together ``review_seconds`` after applying.
+    """
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="daily_counts")
+    # The job's employer, so a report reads only the days it covers
+    employer = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+", db_index=False
+    )
+    # The day applied, in TIME_ZONE
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Application.STATUS_CHOICES)
+    applications = models.IntegerField(default=0)
+    reviewed = models.IntegerField(default=0)
+    review_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["job", "day", "status"], name="daily_application_count_unique"
+            ),
+        ]
+        indexes = [
+            # An employer's days in a period (employer_analytics)
+            models.Index(fields=["employer", "day"], name="daily_application_employer_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} {self.day} {self.status}: {self.applications}"
+
+
+class ResumeExtraction(models.Model):
+    """Queue entry and result of pulling plain text out of an application's resume.
+
+    Rows are created when an application is saved and processed offline by the
+    ``extract_resumes`` command, so the request never waits on parsing.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    application = models.OneToOneField(
+        Application,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="extraction",
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    text = models.TextField(blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=32, blank=True)
+    queued_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "queued_at"], name="extraction_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"Resume text for application {self.application_id} ({self.status})"
+
+
+class JobImport(models.Model):
+    """A CSV or NDJSON upload of jobs and the report of importing it.
+
+    The upload view stores the file and queues the row; the
+    ``process_job_imports`` command imports it chunk by chunk, recording
+    progress with each chunk it commits so the employer can follow along.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    employer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="job_imports")
+    file = models.FileField(upload_to="imports/%Y/%m/", blank=True)
+    format = models.CharField(max_length=10)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    size = models.PositiveBigIntegerField(default=0)
+    # Progress as of the last committed chunk: a restarted import resumes after ``line``
+    bytes_read = models.PositiveBigIntegerField(default=0)
+    line = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    worker = models.CharField(max_length=32, blank=True)
+    queued_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "queued_at"], name="job_import_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"Job import {self.pk} ({self.status})"
+
+    @property
+    def finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    @property
+    def percent(self):
+        if self.status == self.DONE:
+            return 100
+        return min(99, self.bytes_read * 100 // self.size) if self.size else 0
+
+
+class PendingRanking(models.Model):
+    """Queue entry for a job whose applicants need relevance scores.
+
+    Queued when an application is created or the text it is scored on
+    changes, and drained by the ``score_applicants`` command, so ranked
+    applicant views only ever read stored scores.
+    """
+
+    job = models.OneToOneField(
+        Job, on_delete=models.CASCADE, primary_key=True, related_name="+"
+    )
+    queued_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["queued_at"], name="ranking_queue_idx")]
+
+    def __str__(self):
+        return f"Rank applicants of job {self.job_id}"
+
+
+class OutboxEvent(models.Model):
+    """A notification owed to a user about an application or a job alert.
+
+    Written in the same transaction as the change it reports, and mailed
+    later as a per-recipient digest by the ``send_notifications`` command,
+    so the request never waits on email.
+    """
+
+    APPLIED = "applied"
+    STATUS_CHANGED = "status_changed"
+    JOB_ALERT = "job_alert"
+    KIND_CHOICES = [
+        (APPLIED, "New application"),
+        (STATUS_CHANGED, "Status changed"),
+        (JOB_ALERT, "Job alert"),
+    ]
+    PENDING = "pending"
+    RUNNING = "running"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name="outbox_events")
+    # No foreign key: the event outlives a withdrawn application, and the
+    # payload keeps what the message needs (job title, company, statuses).
+    # Job alerts concern no application.
+    application_id = models.PositiveBigIntegerField(null=True, blank=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    error = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=32, blank=True)
+    queued_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "queued_at"], name="outbox_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.recipient_id} ({self.status})"
+
+
+class SavedSearch(models.Model):
+    """A ``job_list`` query a seeker wants to hear about new matches for.
+
+    ``query`` re-opens the listing; ``search``, ``facets`` and the salary
+    columns are the conditions new jobs are checked against.
+    """
+
+    seeker = models.ForeignKey(User, on_delete=models.CASCADE, related_name="saved_searches")
+    name = models.CharField(max_length=100)
+    query = models.TextField()
+    search = models.CharField(max_length=255, blank=True)
+    facets = models.JSONField(default=dict)
+    salary_currency = models.CharField(max_length=3, blank=True)
+    salary_min = models.PositiveBigIntegerField(null=True, blank=True)
+    salary_max = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["seeker", "-created_at"], name="saved_search_seeker_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class SavedSearchKey(models.Model):
+    """Inverted index entry: a job with ``key`` may match ``search``.
+
+    Each saved search is filed under its most selective condition only, so
+    a new job reads the few searches sharing one of its keys instead of
+    every saved search.
+    """
+
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name="keys")
+    key = models.CharField(max_length=130)
+
+    class Meta:
+        indexes = [
+            # Covers the lookup: a new job's keys in, search ids out
+            models.Index(fields=["key", "search"], name="saved_search_key_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} -> {self.search_id}"
+
+
+class SearchDocumentField(models.TextField):
+    """The FTS5 hidden column named after its table; only used with ``match``."""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+class JobSearchIndex(models.Model):
+    """Read-only view of the SQLite FTS5 table that indexes ``Job`` text.
+
+    The virtual table is created by migration 0006 and kept in sync by
+    ``Portal.search``; Django never creates or writes it through the ORM.
+    """
+
+    job = models.OneToOneField(
+        Job,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="search_entry",
+    )
+    title = models.TextField()
+    company = models.TextField()
+    description = models.TextField()
+    category = models.TextField()
+    location = models.TextField()
+    document = SearchDocumentField(db_column="Portal_jobsearchindex")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "Portal_jobsearchindex"
+
+
+class ApplicationSearchIndex(models.Model):
+    """Read-only view of the FTS5 table over resume text and cover letters.
+
+    Created by migration 0011 and written by ``Portal.resumes``.
+    """
+
+    application = models.OneToOneField(
+        Application,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="search_entry",
+    )
+    resume = models.TextField()
+    cover_letter = models.TextField()
+    document = SearchDocumentField(db_column="Portal_applicationsearchindex")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "Portal_applicationsearchindex"
@@ -0,0 +1,259 @@
+# notifications.py - transactional outbox for application events and job alerts, mailed as digests
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import mail
+from django.db import connection, transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import JSONObject
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Application, OutboxEvent
+
+MAX_ATTEMPTS = 5
+# Doubled after every failed attempt: 1, 2, 4, 8 minutes
+RETRY_DELAY = timedelta(minutes=1)
+# Moving an application back to pending is not news to the seeker
+NOTIFIED_STATUSES = {status for status, _label in Application.STATUS_CHOICES} - {"pending"}
+STATUS_LABELS = dict(Application.STATUS_CHOICES)
+
+# --- Recording ----------------------------------------------------------------
+# Called from inside the transaction that changes the application, so an
+# event exists exactly when the change was committed.
+
+
+def record_applied(application):
+    """Tell the employer about a new application."""
+    job = application.job
+    OutboxEvent.objects.create(
+        kind=OutboxEvent.APPLIED,
+        recipient_id=job.employer_id,
+        application_id=application.pk,
+        payload={
+            "job": job.title,
+            "company": job.company,
+            "seeker": application.seeker.get_username(),
+        },
+    )
+
+
+def record_status_change(application, previous_status):
+    """Tell the seeker their application moved to a new status."""
+    if application.status == previous_status or application.status not in NOTIFIED_STATUSES:
+        return
+    job = application.job
+    OutboxEvent.objects.create(
+        kind=OutboxEvent.STATUS_CHANGED,
+        recipient_id=application.seeker_id,
+        application_id=application.pk,
+        payload={
+            "job": job.title,
+            "company": job.company,
+            "status": application.status,
+            "previous": previous_status,
+        },
+    )
+
+
+def record_status_changes(application_ids, new_status):
+    """Bulk form of ``record_status_change``, as one INSERT ... SELECT.
+
+    Call it before moving ``application_ids`` to ``new_status``: the
+    previous status is read from the rows themselves.
+    """
+    if new_status not in NOTIFIED_STATUSES or not application_ids:
+        return
+    now = Value(timezone.now(), output_field=DateTimeField())
+    columns = {
+        "kind": Value(OutboxEvent.STATUS_CHANGED),
+        "recipient_id": F("seeker_id"),
+        "application_id": F("id"),
+        "payload": JSONObject(
+            job=F("job__title"),
+            company=F("job__company"),
+            status=Value(new_status),
+            previous=F("status"),
+        ),
+        "status": Value(OutboxEvent.PENDING),
+        "error": Value(""),
+        "attempts": Value(0),
+        "worker": Value(""),
+        "queued_at": now,
+        "updated_at": now,
+    }
+    rows = (
+        Application.objects.filter(pk__in=application_ids)
+        .exclude(status=new_status)
+        .order_by()
+        .annotate(**{f"outbox_{name}": value for name, value in columns.items()})
+        .values_list(*[f"outbox_{name}" for name in columns])
+    )
+    select, params = rows.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {OutboxEvent._meta.db_table} ({', '.join(columns)}) {select}", params
+        )
+
+
+# --- Delivery -----------------------------------------------------------------
+
+
+def requeue_stale(minutes=10):
+    """Hand events claimed by a worker that died back to the queue.
+
+    A worker that died after sending but before recording it sends that
+    digest again: delivery is at least once.
+    """
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return OutboxEvent.objects.filter(
+        status=OutboxEvent.RUNNING, updated_at__lt=cutoff
+    ).update(status=OutboxEvent.PENDING, worker="")
+
+
+def purge_sent(days=30):
+    """Delete events delivered more than ``days`` ago."""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _by_model = OutboxEvent.objects.filter(
+        status=OutboxEvent.SENT, queued_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def claim(batch_size):
+    """Atomically mark up to ``batch_size`` due events as ours and return them."""
+    worker = uuid.uuid4().hex
+    with transaction.atomic():
+        ids = list(
+            OutboxEvent.objects.filter(status=OutboxEvent.PENDING, queued_at__lte=timezone.now())
+            .order_by("queued_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        OutboxEvent.objects.filter(id__in=ids, status=OutboxEvent.PENDING).update(
+            status=OutboxEvent.RUNNING,
+            worker=worker,
+            attempts=F("attempts") + 1,
+            updated_at=timezone.now(),
+        )
+    return list(
+        OutboxEvent.objects.filter(worker=worker, status=OutboxEvent.RUNNING)
+        .select_related("recipient")
+        .order_by("id")
+    )
+
+
+def site_url(path):
+    """``path`` as an absolute URL on settings.SITE_URL, for links in emails."""
+    return settings.SITE_URL.rstrip("/") + path
+
+
+def digest(recipient, events, mailer):
+    """One email listing every event of ``recipient``, oldest first."""
+    applied = [e.payload for e in events if e.kind == OutboxEvent.APPLIED]
+    changed = [
+        {**e.payload, "label": STATUS_LABELS.get(e.payload["status"], e.payload["status"])}
+        for e in events
+        if e.kind == OutboxEvent.STATUS_CHANGED
+    ]
+    alerts = [
+        {**e.payload, "url": site_url(reverse("job_detail", args=[e.payload["job_id"]]))}
+        for e in events
+        if e.kind == OutboxEvent.JOB_ALERT
+    ]
+    if applied and len(applied) == len(events):
+        subject = f"{len(applied)} new applicant{'s' if len(applied) != 1 else ''}"
+    elif alerts and len(alerts) == len(events):
+        subject = f"{len(alerts)} new job{'s' if len(alerts) != 1 else ''} for your saved searches"
+    else:
+        subject = f"{len(events)} update{'s' if len(events) != 1 else ''} on your applications"
+    body = render_to_string(
+        "emails/notification_digest.txt",
+        {
+            "recipient": recipient,
+            "applied": applied,
+            "changed": changed,
+            "alerts": alerts,
+            "dashboard_url": site_url(reverse("dashboard")),
+        },
+    )
+    return mail.EmailMessage(
+        subject,
+        body,
+        settings.DEFAULT_FROM_EMAIL,
+        [recipient.email],
+        connection=mailer,
+    )
+
+
+def send_batch(batch_size=200):
+    """Mail one claimed batch as a digest per recipient; returns events handled.
+
+    Every digest goes over a single backend connection. A digest that fails
+    is retried with exponential backoff, up to MAX_ATTEMPTS.
+    """
+    events = claim(batch_size)
+    if not events:
+        return 0
+    by_recipient = defaultdict(list)
+    for event in events:
+        by_recipient[event.recipient_id].append(event)
+
+    errors = {}
+    try:
+        with mail.get_connection() as mailer:
+            for recipient_id, pending in by_recipient.items():
+                recipient = pending[0].recipient
+                if not recipient.email:
+                    errors[recipient_id] = None
+                    continue
+                try:
+                    digest(recipient, pending, mailer).send()
+                except Exception as exc:  # noqa: BLE001 - retried below
+                    errors[recipient_id] = f"{type(exc).__name__}: {exc}"[:255]
+                else:
+                    errors[recipient_id] = ""
+    except Exception as exc:  # noqa: BLE001 - the connection itself failed
+        for recipient_id in by_recipient:
+            errors.setdefault(recipient_id, f"{type(exc).__name__}: {exc}"[:255])
+
+    # Events sharing an outcome are written with one UPDATE
+    now = timezone.now()
+    outcomes = defaultdict(list)
+    for event in events:
+        error = errors[event.recipient_id]
+        if error == "":
+            outcome = {"status": OutboxEvent.SENT, "error": ""}
+        elif error is None:
+            outcome = {"status": OutboxEvent.FAILED, "error": "Recipient has no email address"}
+        elif event.attempts >= MAX_ATTEMPTS:
+            outcome = {"status": OutboxEvent.FAILED, "error": error}
+        else:
+            outcome = {
+                "status": OutboxEvent.PENDING,
+                "error": error,
+                "queued_at": now + RETRY_DELAY * 2 ** (event.attempts - 1),
+            }
+        outcomes[tuple(outcome.items())].append(event.id)
+    with transaction.atomic():
+        for outcome, ids in outcomes.items():
+            OutboxEvent.objects.filter(id__in=ids).update(**dict(outcome), worker="", updated_at=now)
+    return len(events)
+
+
+def run(batch_size=200, sleep=None):
+    """Drain the outbox and return how many events it handled.
+
+    With ``sleep`` the worker never returns: it calls ``sleep()`` whenever
+    nothing is due and polls again.
+    """
+    handled = 0
+    while True:
+        count = send_batch(batch_size)
+        handled += count
+        if count == 0:
+            if sleep is None:
+                return handled
+            sleep()
@@ -0,0 +1,110 @@
+# pagination.py - keyset (cursor) pagination for large listings
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import DateTimeField, Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps(
+        [direction] + [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, keys, model):
+    """Return ``(direction, values)`` for a cursor produced by ``encode_cursor``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, *values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if direction not in ("next", "prev") or len(values) != len(keys):
+        raise InvalidCursor(cursor)
+    fields = {f.name: f for f in model._meta.concrete_fields}
+    decoded = []
+    for (name, _descending), value in zip(keys, values):
+        if isinstance(fields.get(name), DateTimeField):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError) as exc:
+                raise InvalidCursor(cursor) from exc
+        decoded.append(value)
+    return direction, decoded
+
+
+def _after(keys, values):
+    """Rows strictly after ``values`` in ``keys`` order.
+
+    Written as ``a <= x AND (a < x OR <rest after>)`` rather than the plain
+    OR expansion so the leading column still bounds an index range scan.
+    """
+    (name, descending), value = keys[0], values[0]
+    strictly = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+    if len(keys) == 1:
+        return strictly
+    bound = Q(**{f"{name}__{'lte' if descending else 'gte'}": value})
+    return bound & (strictly | _after(keys[1:], values[1:]))
+
+
+def _reverse(keys):
+    return [(name, not descending) for name, descending in keys]
+
+
+def _order(keys):
+    return [f"-{name}" if descending else name for name, descending in keys]
+
+
+class KeysetPage:
+    def __init__(self, object_list, keys, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = self.prev_cursor = None
+        if object_list and has_next:
+            self.next_cursor = encode_cursor("next", self._values(object_list[-1], keys))
+        if object_list and has_previous:
+            self.prev_cursor = encode_cursor("prev", self._values(object_list[0], keys))
+
+    @staticmethod
+    def _values(obj, keys):
+        return [getattr(obj, name) for name, _descending in keys]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginate_keyset(queryset, keys, cursor=None, per_page=20):
+    """Return one ``KeysetPage`` of ``queryset`` ordered by ``keys``.
+
+    ``keys`` is a list of ``(field, descending)`` pairs ending in a unique
+    column; every page costs one indexed range scan no matter how deep it is.
+    Raises ``InvalidCursor`` for a cursor that was not produced here.
+    """
+    if not cursor:
+        rows = list(queryset.order_by(*_order(keys))[: per_page + 1])
+        return KeysetPage(rows[:per_page], keys, len(rows) > per_page, False)
+
+    direction, values = decode_cursor(cursor, keys, queryset.model)
+    if direction == "next":
+        rows = list(
+            queryset.filter(_after(keys, values)).order_by(*_order(keys))[: per_page + 1]
+        )
+        return KeysetPage(rows[:per_page], keys, len(rows) > per_page, True)
+
+    backwards = _reverse(keys)
+    rows = list(
+        queryset.filter(_after(backwards, values)).order_by(*_order(backwards))[
+            : per_page + 1
+        ]
+    )
+    return KeysetPage(rows[:per_page][::-1], keys, True, len(rows) > per_page)
@@ -0,0 +1,112 @@
+# ranking.py - applicants ranked by how closely their text matches the job
+import numpy as np
+from django.db import connection, transaction
+
+from .models import Application, Job, PendingRanking
+from .recommendations import N_FEATURES, chunks, vectorize
+
+# Scores depend on nothing but the two texts (no corpus-wide idf), so a
+# stored score stays valid until the job or the application is edited.
+JOB_WEIGHTS = {"title": 3, "category": 2, "description": 1}
+JOB_TERMS = 64
+# Cover letter, then the resume text once extract_resumes has pulled it out
+APPLICATION_WEIGHTS = (1, 1)
+RELEVANCE_KEYS = [("relevance", True), ("id", True)]
+
+
+def job_text(job):
+    return [getattr(job, field) for field in JOB_WEIGHTS]
+
+
+def job_vector(job):
+    """Dense, L2-normalized weights of the job's JOB_TERMS strongest terms."""
+    _indptr, features, data = vectorize(
+        [job_text(job)], None, {}, JOB_WEIGHTS.values(), JOB_TERMS
+    )
+    dense = np.zeros(N_FEATURES, dtype=np.float32)
+    dense[features] = data
+    return dense
+
+
+def score(dense, texts, memo):
+    """Cosine similarity of each ``(cover_letter, resume_text)`` to a job vector."""
+    indptr, features, data = vectorize(texts, None, memo, APPLICATION_WEIGHTS, terms=None)
+    rows = np.repeat(np.arange(len(texts)), np.diff(indptr))
+    return np.bincount(rows, weights=dense[features] * data, minlength=len(texts))
+
+
+def score_job(job):
+    """Score every application of ``job`` without a current score.
+
+    Applications are vectorized CHUNK_SIZE at a time and scored against the
+    job in one sparse product per chunk; all scores are written in a single
+    transaction. Returns the number of applications scored.
+    """
+    pending = (
+        Application.objects.filter(job=job, relevance__isnull=True)
+        .order_by()
+        .values_list("id", "cover_letter", "extraction__text")
+    )
+    dense, memo, scores = None, {}, []
+    for chunk in chunks(pending.iterator()):
+        if dense is None:
+            dense = job_vector(job)
+        values = score(dense, [(letter, text or "") for _id, letter, text in chunk], memo)
+        scores += zip(np.round(values, 6).tolist(), (pk for pk, *_text in chunk))
+    if scores:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f"UPDATE {Application._meta.db_table} SET relevance = %s WHERE id = %s",
+                scores,
+            )
+    return len(scores)
+
+
+def queue_jobs(job_ids):
+    """Queue ``job_ids`` for ``score_pending``; a job already queued stays once."""
+    PendingRanking.objects.bulk_create(
+        [PendingRanking(job_id=pk) for pk in set(job_ids)], ignore_conflicts=True
+    )
+
+
+def queue_missing():
+    """Queue every job with unscored applications, e.g. after bulk loads."""
+    job_ids = (
+        Application.objects.filter(relevance__isnull=True)
+        .order_by()
+        .values_list("job_id", flat=True)
+        .distinct()
+    )
+    queue_jobs(list(job_ids))
+
+
+def score_pending(batch_size=100):
+    """Score the unscored applications of every queued job; returns how many.
+
+    Each job leaves the queue in the transaction that scores it, so an
+    application saved meanwhile queues the job again.
+    """
+    scored = 0
+    while True:
+        job_ids = list(
+            PendingRanking.objects.order_by("queued_at").values_list("job_id", flat=True)[
+                :batch_size
+            ]
+        )
+        if not job_ids:
+            return scored
+        jobs = Job.objects.filter(id__in=job_ids).only("id", *JOB_WEIGHTS)
+        for job in jobs:
+            with transaction.atomic():
+                PendingRanking.objects.filter(job=job).delete()
+                scored += score_job(job)
+
+
+def run(batch_size=100, sleep=None):
+    """Score queued jobs until the queue is empty, or forever with ``sleep``."""
+    scored = 0
+    while True:
+        scored += score_pending(batch_size)
+        if sleep is None:
+            return scored
+        sleep()
@@ -0,0 +1,360 @@
+# recommendations.py - "Recommended for you": TF-IDF similarity between jobs
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+import zlib
+from collections import Counter
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import caching
+from .models import DeletedJob, Job
+
+# Terms are hashed into a fixed space, so jobs posted after a build need no
+# new vocabulary and can be vectorized with the build's idf weights.
+N_FEATURES = 1 << 18
+TERMS_PER_JOB = 48
+PROFILE_TERMS = 32
+# Postings are stored strongest first; scoring reads at most this many per
+# term, which bounds the work for common terms at the cost of weak matches
+POSTINGS_PER_TERM = 5000
+RECOMMENDATIONS = 6
+CHUNK_SIZE = 2000
+KEEP_BUILDS = 2
+# Edits are re-read this far back, in case they committed out of order
+REFRESH_OVERLAP = timedelta(minutes=5)
+FIELD_WEIGHTS = {"title": 3, "category": 2, "location": 1, "description": 1}
+FIELDS = list(FIELD_WEIGHTS)
+CARD_FIELDS = ["id", "title", "company", "location", "salary"]
+ARRAYS = ["job_ids", "indptr", "indices", "data", "col_indptr", "col_rows", "col_data", "idf"]
+
+_WORD_RE = re.compile(r"\w{2,}")
+_STOPWORDS = frozenset(
+    "about all also an and any are as at be but by can for from has have in into is it "
+    "its of on or our that the their this to us we will with you your".split()
+)
+
+
+def index_dir():
+    return settings.RECOMMENDATIONS_DIR
+
+
+# --- Vectorizing ------------------------------------------------------------
+
+
+def term_counts(rows, memo, weights=None):
+    """Hashed term counts for rows of text columns.
+
+    Each column's words count ``weights[i]`` times (default FIELD_WEIGHTS for
+    rows of ``FIELDS``). Returns ``(row_ids, features, counts)`` arrays with
+    one entry per distinct term of each row. ``memo`` caches word hashes
+    between calls.
+    """
+    weights = list(FIELD_WEIGHTS.values()) if weights is None else list(weights)
+    row_ids, features, counts = [], [], []
+    for row, values in enumerate(rows):
+        terms = Counter()
+        for weight, text in zip(weights, values):
+            for word in _WORD_RE.findall(text.lower()):
+                if word in _STOPWORDS or word.isdigit():
+                    continue
+                feature = memo.get(word)
+                if feature is None:
+                    feature = memo[word] = zlib.crc32(word.encode()) % N_FEATURES
+                terms[feature] += weight
+        row_ids.extend([row] * len(terms))
+        features.extend(terms)
+        counts.extend(terms.values())
+    return (
+        np.array(row_ids, dtype=np.int64),
+        np.array(features, dtype=np.int32),
+        np.array(counts, dtype=np.float32),
+    )
+
+
+def vectorize(rows, idf, memo, weights=None, terms=TERMS_PER_JOB):
+    """CSR ``(indptr, indices, data)`` for ``rows``, one L2-normalized row each.
+
+    Weights are sublinear tf times ``idf`` (plain sublinear tf when it is
+    None), and only each row's ``terms`` strongest terms are kept, which
+    bounds the index size per job; ``terms=None`` keeps them all.
+    """
+    row_ids, features, counts = term_counts(rows, memo, weights)
+    weights = 1 + np.log(counts)
+    if idf is not None:
+        weights *= idf[features]
+    order = np.lexsort((-weights, row_ids))
+    row_ids, features, weights = row_ids[order], features[order], weights[order]
+    if terms is not None:
+        rank = np.arange(len(row_ids)) - np.searchsorted(row_ids, row_ids)
+        keep = rank < terms
+        row_ids, features, weights = row_ids[keep], features[keep], weights[keep]
+    norms = np.sqrt(np.bincount(row_ids, weights=weights**2, minlength=len(rows)))
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(row_ids, minlength=len(rows)), out=indptr[1:])
+    return indptr, features, (weights / norms[row_ids]).astype(np.float32)
+
+
+def chunks(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build(directory=None):
+    """Vectorize every job into a new index build and make it current.
+
+    Reads the Job table twice, for document frequencies and then vectors.
+    Returns the number of jobs indexed.
+    """
+    directory = directory or index_dir()
+    built_at = timezone.now()
+    jobs = Job.objects.order_by("id").values_list("id", *FIELDS)
+    memo = {}
+
+    document_frequency = np.zeros(N_FEATURES, dtype=np.int64)
+    total = 0
+    for chunk in chunks(jobs.iterator(chunk_size=CHUNK_SIZE)):
+        _rows, features, _counts = term_counts([row[1:] for row in chunk], memo)
+        document_frequency += np.bincount(features, minlength=N_FEATURES)
+        total += len(chunk)
+    idf = (np.log((1 + total) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    job_ids, indptrs, indices, data = [], [], [], []
+    offset = 0
+    for chunk in chunks(jobs.iterator(chunk_size=CHUNK_SIZE)):
+        indptr, chunk_indices, chunk_data = vectorize([row[1:] for row in chunk], idf, memo)
+        job_ids.append(np.array([row[0] for row in chunk], dtype=np.int64))
+        indptrs.append(indptr[1:] + offset)
+        indices.append(chunk_indices)
+        data.append(chunk_data)
+        offset += len(chunk_indices)
+    arrays = {
+        "job_ids": np.concatenate([np.zeros(0, dtype=np.int64), *job_ids]),
+        "indptr": np.concatenate([np.zeros(1, dtype=np.int64), *indptrs]),
+        "indices": np.concatenate([np.zeros(0, dtype=np.int32), *indices]),
+        "data": np.concatenate([np.zeros(0, dtype=np.float32), *data]),
+        "idf": idf,
+    }
+    arrays.update(_postings(arrays["indptr"], arrays["indices"], arrays["data"]))
+
+    name = f"build-{built_at:%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+    path = os.path.join(directory, name)
+    os.makedirs(path)
+    for array_name, array in arrays.items():
+        np.save(os.path.join(path, f"{array_name}.npy"), array)
+    with open(os.path.join(path, "meta.json"), "w") as meta:
+        json.dump({"built_at": built_at.isoformat(), "jobs": total}, meta)
+    pointer = os.path.join(directory, f"CURRENT.{uuid.uuid4().hex[:8]}")
+    with open(pointer, "w") as current:
+        current.write(name)
+    os.replace(pointer, os.path.join(directory, "CURRENT"))
+    _remove_old_builds(directory, name)
+    return total
+
+
+def _postings(indptr, indices, data):
+    """The same matrix by term: for each feature, its rows by falling weight."""
+    rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr))
+    order = np.lexsort((-data, indices))
+    col_indptr = np.zeros(N_FEATURES + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=N_FEATURES), out=col_indptr[1:])
+    return {"col_indptr": col_indptr, "col_rows": rows[order], "col_data": data[order]}
+
+
+def _ranges(starts, ends):
+    """Positions ``start..end`` of every range, concatenated."""
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return np.arange(lengths.sum()) + offsets
+
+
+def _remove_old_builds(directory, current):
+    # Build names start with their timestamp, so they sort oldest first
+    builds = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.startswith("build-")),
+        key=lambda entry: entry.name,
+        reverse=True,
+    )
+    # Keep a previous build: workers may still have it mapped
+    for entry in builds[KEEP_BUILDS:]:
+        if entry.name != current:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+# --- Serving ----------------------------------------------------------------
+
+
+class RecommendationIndex:
+    """A memory-mapped build plus the jobs changed since it was made.
+
+    Posted and edited jobs are vectorized into an in-memory delta and their
+    build rows masked out; deleted ones are masked. ``refresh`` reads only
+    rows changed since the last refresh, through the ``updated_at`` and
+    DeletedJob indexes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+        with open(os.path.join(path, "meta.json")) as meta:
+            built_at = parse_datetime(json.load(meta)["built_at"])
+        self.alive = np.ones(len(self.job_ids), dtype=bool)
+        self.changed_since = self.deleted_since = built_at
+        self.token = None
+        self.memo = {}
+        self.delta = {}
+        self._pack_delta()
+
+    def refresh(self):
+        changed = list(
+            Job.objects.filter(updated_at__gte=self.changed_since - REFRESH_OVERLAP)
+            .order_by()
+            .values_list("id", "updated_at", *FIELDS)
+        )
+        deleted = list(
+            DeletedJob.objects.filter(deleted_at__gte=self.deleted_since - REFRESH_OVERLAP)
+            .order_by()
+            .values_list("job_id", "deleted_at")
+        )
+        if changed:
+            indptr, indices, data = vectorize([row[2:] for row in changed], self.idf, self.memo)
+            for row, (job_id, updated_at, *_text) in enumerate(changed):
+                vector = slice(indptr[row], indptr[row + 1])
+                self.delta[job_id] = (indices[vector], data[vector])
+                self.changed_since = max(self.changed_since, updated_at)
+        for job_id, deleted_at in deleted:
+            self.delta.pop(job_id, None)
+            self.deleted_since = max(self.deleted_since, deleted_at)
+        stale = self._rows([job_id for job_id, *_ in changed] + [job_id for job_id, _ in deleted])
+        self.alive[stale] = False
+        self._pack_delta()
+
+    def _pack_delta(self):
+        # Swapped in as one tuple so a concurrent top() sees one consistent delta
+        vectors = list(self.delta.values())
+        self.packed_delta = (
+            np.array(list(self.delta), dtype=np.int64),
+            np.repeat(np.arange(len(vectors)), [len(indices) for indices, _data in vectors]),
+            np.concatenate([np.zeros(0, dtype=np.int32)] + [indices for indices, _ in vectors]),
+            np.concatenate([np.zeros(0, dtype=np.float32)] + [data for _, data in vectors]),
+        )
+
+    def _rows(self, job_ids):
+        """Build rows of ``job_ids``; ids that are not in the build are skipped."""
+        job_ids = np.asarray(job_ids, dtype=np.int64)
+        rows = np.searchsorted(self.job_ids, job_ids)
+        found = rows < len(self.job_ids)
+        found[found] = self.job_ids[rows[found]] == job_ids[found]
+        return rows[found]
+
+    def profile(self, job_ids):
+        """``(features, weights)`` of the summed vectors of ``job_ids``."""
+        rows = self._rows(job_ids)
+        rows = rows[self.alive[rows]]
+        positions = _ranges(self.indptr[rows], self.indptr[rows + 1])
+        parts = [(self.indices[positions], self.data[positions])]
+        parts += filter(None, map(self.delta.get, job_ids))
+        if not sum(len(features) for features, _ in parts):
+            return None
+        features, inverse = np.unique(
+            np.concatenate([features for features, _ in parts]), return_inverse=True
+        )
+        weights = np.bincount(inverse, weights=np.concatenate([weights for _, weights in parts]))
+        strongest = np.argsort(-weights)[:PROFILE_TERMS]
+        order = np.argsort(features[strongest])
+        return features[strongest][order], weights[strongest][order]
+
+    def top(self, applied_job_ids, limit):
+        """Ids of the ``limit`` jobs most similar to ``applied_job_ids``."""
+        profile = self.profile(applied_job_ids)
+        if profile is None:
+            return []
+        features, weights = profile
+
+        # Build jobs: walk the strongest postings of the profile's terms only
+        starts = self.col_indptr[features]
+        ends = np.minimum(self.col_indptr[features + 1], starts + POSTINGS_PER_TERM)
+        positions = _ranges(starts, ends)
+        scores = np.bincount(
+            self.col_rows[positions],
+            weights=self.col_data[positions] * np.repeat(weights, ends - starts),
+            minlength=len(self.job_ids),
+        )
+        scores[~self.alive] = 0
+        scores[self._rows(applied_job_ids)] = 0
+
+        # Jobs changed since the build: a sparse dot product per delta row
+        delta_ids, delta_rows, delta_indices, delta_data = self.packed_delta
+        positions = np.minimum(np.searchsorted(features, delta_indices), len(features) - 1)
+        matched = features[positions] == delta_indices
+        delta_scores = np.bincount(
+            delta_rows,
+            weights=np.where(matched, weights[positions] * delta_data, 0),
+            minlength=len(delta_ids),
+        )
+        delta_scores[np.isin(delta_ids, applied_job_ids)] = 0
+
+        if len(scores) > limit:
+            best = np.argpartition(-scores, limit)[:limit]
+        else:
+            best = np.arange(len(scores))
+        candidates = [(scores[row], int(self.job_ids[row])) for row in best]
+        candidates += zip(delta_scores, map(int, delta_ids))
+        candidates = sorted((c for c in candidates if c[0] > 0), reverse=True)
+        return [job_id for _score, job_id in candidates[:limit]]
+
+
+_current = None
+_lock = threading.Lock()
+
+
+def current_index():
+    """The current build, refreshed when the listing version has moved on.
+
+    Returns None until ``build_recommendations`` has been run.
+    """
+    global _current
+    directory = index_dir()
+    try:
+        with open(os.path.join(directory, "CURRENT")) as current:
+            path = os.path.join(directory, current.read().strip())
+    except FileNotFoundError:
+        return None
+    # Every job save and delete bumps the listing version
+    token, _modified = caching.get_versions([caching.LISTING])[caching.LISTING]
+    with _lock:
+        if _current is None or _current.path != path:
+            _current = RecommendationIndex(path)
+        if _current.token != token:
+            _current.refresh()
+            _current.token = token
+        return _current
+
+
+def recommend(applied_job_ids, limit=RECOMMENDATIONS):
+    """Ids of jobs like the ones applied to, best first, excluding those."""
+    if not applied_job_ids:
+        return []
+    index = current_index()
+    return index.top(sorted(set(applied_job_ids)), limit) if index else []
+
+
+def recommended_jobs(applied_job_ids, limit=RECOMMENDATIONS):
+    """The recommended jobs themselves, loaded by primary key."""
+    ids = recommend(applied_job_ids, limit)
+    jobs = Job.objects.only(*CARD_FIELDS).in_bulk(ids)
+    return [jobs[job_id] for job_id in ids if job_id in jobs]
@@ -0,0 +1,297 @@
+# resumes.py - offline resume text extraction and applicant search
+import os
+import re
+import uuid
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from xml.etree import ElementTree
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import ranking, search
+from .models import Application, ApplicationSearchIndex, ResumeExtraction
+from .storage import resume_storage
+
+INDEX_TABLE = ApplicationSearchIndex._meta.db_table
+MAX_TEXT_LENGTH = 200_000
+MAX_ATTEMPTS = 3
+RETRY_DELAY = timedelta(minutes=5)
+
+# --- Extractors -------------------------------------------------------------
+# These run in worker processes, so they only take a path and return text.
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_PDF_STREAM_RE = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.S)
+_PDF_TEXT_BLOCK_RE = re.compile(rb"BT(.*?)ET", re.S)
+_PDF_STRING_RE = re.compile(rb"\(((?:\\.|[^\\()])*)\)", re.S)
+_PDF_ESCAPE_RE = re.compile(rb"\\([nrtbf()\\]|[0-7]{1,3})")
+_PDF_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"", b"f": b""}
+_DOC_RUN_RE = re.compile(rb"(?:[\x20-\x7e]\x00){4,}|[\x20-\x7e]{4,}")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _extract_docx(path):
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    for paragraph in root.iter(f"{_WORD_NS}p"):
+        paragraphs.append("".join(node.text or "" for node in paragraph.iter(f"{_WORD_NS}t")))
+    return "\n".join(paragraphs)
+
+
+def _pdf_unescape(match):
+    code = match.group(1)
+    if code in _PDF_ESCAPES:
+        return _PDF_ESCAPES[code]
+    if code.isdigit():
+        return bytes([int(code, 8) & 0xFF])
+    return code
+
+
+def _extract_pdf(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        PdfReader = None
+    if PdfReader is not None:
+        return "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+
+    # Fallback without pypdf: inflate content streams and collect the string
+    # operands of text blocks. Good enough for keyword search.
+    with open(path, "rb") as handle:
+        data = handle.read()
+    chunks = []
+    for stream in _PDF_STREAM_RE.findall(data):
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass
+        for block in _PDF_TEXT_BLOCK_RE.findall(stream):
+            for literal in _PDF_STRING_RE.findall(block):
+                chunks.append(_PDF_ESCAPE_RE.sub(_pdf_unescape, literal))
+            chunks.append(b"\n")
+    return b" ".join(chunks).decode("latin-1")
+
+
+def _extract_doc(path):
+    # Legacy Word files keep their text as 8-bit or UTF-16LE runs; pull those out.
+    with open(path, "rb") as handle:
+        data = handle.read()
+    runs = []
+    for run in _DOC_RUN_RE.findall(data):
+        runs.append(run.decode("utf-16-le" if b"\x00" in run else "latin-1"))
+    return "\n".join(runs)
+
+
+EXTRACTORS = {".pdf": _extract_pdf, ".docx": _extract_docx, ".doc": _extract_doc}
+
+
+def extract_text(path):
+    """Return ``(text, error)`` for the resume at ``path``; never raises."""
+    extractor = EXTRACTORS.get(os.path.splitext(path)[1].lower())
+    if extractor is None:
+        return "", f"Unsupported file type: {os.path.basename(path)}"
+    try:
+        text = extractor(path)
+    except Exception as exc:  # noqa: BLE001 - any parser failure is recorded
+        return "", f"{type(exc).__name__}: {exc}"[:255]
+    return _SPACE_RE.sub(" ", text).strip()[:MAX_TEXT_LENGTH], ""
+
+
+# --- Queue ------------------------------------------------------------------
+
+
+def queue(application_ids):
+    ResumeExtraction.objects.bulk_create(
+        [ResumeExtraction(application_id=pk) for pk in application_ids],
+        ignore_conflicts=True,
+    )
+
+
+def queue_missing(batch_size=5000):
+    """Queue every application that has no extraction row, e.g. after bulk loads."""
+    missing = Application.objects.filter(extraction__isnull=True).exclude(resume="")
+    total = 0
+    while ids := list(missing.values_list("id", flat=True)[:batch_size]):
+        queue(ids)
+        total += len(ids)
+    return total
+
+
+def requeue_stale(minutes=30):
+    """Hand rows claimed by a worker that died back to the queue."""
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return ResumeExtraction.objects.filter(
+        status=ResumeExtraction.RUNNING, updated_at__lt=cutoff
+    ).update(status=ResumeExtraction.PENDING, worker="")
+
+
+def claim(batch_size):
+    """Atomically mark up to ``batch_size`` pending rows as ours and return them."""
+    worker = uuid.uuid4().hex
+    with transaction.atomic():
+        ids = list(
+            ResumeExtraction.objects.filter(
+                status=ResumeExtraction.PENDING, queued_at__lte=timezone.now()
+            )
+            .order_by("queued_at")
+            .values_list("application_id", flat=True)[:batch_size]
+        )
+        ResumeExtraction.objects.filter(
+            application_id__in=ids, status=ResumeExtraction.PENDING
+        ).update(
+            status=ResumeExtraction.RUNNING,
+            worker=worker,
+            attempts=F("attempts") + 1,
+            updated_at=timezone.now(),
+        )
+    return list(
+        ResumeExtraction.objects.filter(worker=worker, status=ResumeExtraction.RUNNING)
+        .select_related("application")
+        .only(
+            "application_id",
+            "attempts",
+            "queued_at",
+            "application__job_id",
+            "application__resume",
+            "application__cover_letter",
+        )
+    )
+
+
+def process_batch(executor, batch_size=50):
+    """Extract one claimed batch on ``executor``; returns the number processed.
+
+    Resumes are content-addressed, so a blob another application already
+    extracted is reused and each remaining blob is parsed once per batch.
+    """
+    rows = claim(batch_size)
+    if not rows:
+        return 0
+    names = {row.application.resume.name for row in rows} - {""}
+    results = dict(
+        (name, (text, ""))
+        for name, text in ResumeExtraction.objects.filter(
+            status=ResumeExtraction.DONE, application__resume__in=names
+        ).values_list("application__resume", "text")
+    )
+    storage = resume_storage()
+    paths = {
+        name: storage.path(name)
+        for name in names - results.keys()
+        if storage.exists(name)
+    }
+    results.update(zip(paths, executor.map(extract_text, paths.values())))
+
+    done, failed = [], []
+    now = timezone.now()
+    for row in rows:
+        text, error = results.get(row.application.resume.name, ("", "Resume file is missing"))
+        row.text, row.error, row.updated_at, row.worker = text, error, now, ""
+        if not error:
+            row.status = ResumeExtraction.DONE
+            done.append(row)
+        else:
+            if row.attempts >= MAX_ATTEMPTS:
+                row.status = ResumeExtraction.FAILED
+            else:
+                # Back off before the next attempt
+                row.status = ResumeExtraction.PENDING
+                row.queued_at = now + RETRY_DELAY * row.attempts
+            failed.append(row)
+
+    with transaction.atomic():
+        ResumeExtraction.objects.bulk_update(
+            done + failed, ["status", "text", "error", "worker", "queued_at", "updated_at"]
+        )
+        # The resume text is part of what applicants are ranked on
+        Application.objects.filter(id__in=[row.application_id for row in done]).update(
+            relevance=None
+        )
+        ranking.queue_jobs(row.application.job_id for row in done)
+        # Give up on the resume but keep the cover letter searchable
+        index_applications(
+            (row.application_id, row.text, row.application.cover_letter)
+            for row in done + failed
+            if row.status != ResumeExtraction.PENDING
+        )
+    return len(rows)
+
+
+def run(workers=None, batch_size=50, sleep=None):
+    """Drain the queue with a process pool and return how many rows it handled.
+
+    With ``sleep`` the worker never returns: it calls ``sleep()`` whenever the
+    queue is empty and polls again.
+    """
+    processed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            count = process_batch(executor, batch_size)
+            processed += count
+            if count == 0:
+                if sleep is None:
+                    return processed
+                sleep()
+
+
+# --- Applicant search -------------------------------------------------------
+
+
+def index_applications(rows):
+    """Index ``(application_id, resume_text, cover_letter)`` rows."""
+    rows = [list(row) for row in rows]
+    if rows and search.fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {INDEX_TABLE}(rowid, resume, cover_letter) "
+                f"VALUES (%s, %s, %s)",
+                rows,
+            )
+
+
+def unindex_applications(application_ids):
+    ids = [[pk] for pk in application_ids]
+    if ids and search.fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s", ids)
+
+
+def unindex_job_applications(job_id):
+    if search.fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {INDEX_TABLE} WHERE rowid IN "
+                f"(SELECT id FROM {Application._meta.db_table} WHERE job_id = %s)",
+                [job_id],
+            )
+
+
+def search_applications(queryset, text):
+    """Restrict ``queryset`` to applications whose resume or cover letter
+    matches ``text``, best matches first.
+
+    Only applications whose resume has been processed are indexed.
+    """
+    expression = search.build_match_expression(text)
+    if expression is None:
+        return queryset
+    if not search.fts_enabled():
+        for word in text.split():
+            queryset = queryset.filter(
+                Q(extraction__text__icontains=word) | Q(cover_letter__icontains=word)
+            )
+        return queryset
+    return (
+        queryset.filter(search_entry__document__match=expression)
+        .annotate(rank=F("search_entry__rank"))
+        .order_by("rank", "-id")
+    )
+
+
+def attach_snippets(applications, text):
+    return search.attach_snippets(applications, text, size=16, table=INDEX_TABLE, column=-1)
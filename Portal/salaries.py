@@ -0,0 +1,121 @@
+# salaries.py - free-text salaries as comparable yearly ranges
+import re
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+# ``low``/``high`` are whole currency units per year, whatever period the
+# posting quoted, so ranges compare and sort in the database.
+Salary = namedtuple("Salary", ["low", "high", "currency", "period"])
+
+DEFAULT_CURRENCY = "INR"
+CURRENCIES = ["INR", "USD", "EUR", "GBP"]
+PERIODS = {"year": 1, "month": 12, "week": 52, "day": 260, "hour": 2080}
+# Highest paying first; id breaks ties, as in job_salary_idx
+SALARY_KEYS = [("salary_max", True), ("id", True)]
+
+_CURRENCY_RE = re.compile(r"₹|\brs\b\.?|\binr\b|us\$|\$|\busd\b|€|\beur\b|£|\bgbp\b")
+_CURRENCY_CODES = {
+    "₹": "INR", "rs": "INR", "rs.": "INR", "inr": "INR",
+    "us$": "USD", "$": "USD", "usd": "USD",
+    "€": "EUR", "eur": "EUR",
+    "£": "GBP", "gbp": "GBP",
+}
+_PERIOD_RE = [
+    (period, re.compile("|".join(patterns)))
+    for period, patterns in [
+        ("year", [r"lpa", r"\bp\.?\s?a\b", r"per\s+(?:annum|year)", r"/\s*(?:yr|year|annum)\b",
+                  r"\b(?:annual(?:ly)?|yearly|a\s+year)\b"]),
+        ("month", [r"\bp\.?\s?m\b", r"per\s+month", r"/\s*(?:mo|month)\b",
+                   r"\b(?:monthly|a\s+month)\b"]),
+        ("week", [r"per\s+week", r"/\s*(?:wk|week)\b", r"\b(?:weekly|a\s+week)\b"]),
+        ("day", [r"per\s+day", r"/\s*day\b", r"\b(?:daily|a\s+day)\b"]),
+        ("hour", [r"per\s+hour", r"/\s*(?:hr|hour)\b", r"\b(?:hourly|an\s+hour)\b"]),
+    ]
+]
+# An amount and its optional scale word, which may follow a "+" as in
+# "15+ LPA"; "10-12 LPA" scales both ends
+_AMOUNT_RE = re.compile(
+    r"(\d[\d,]*(?:\.\d+)?)(?:\s*\+)?\s*(k|lakhs?|lacs?|lpa|l|crores?|cr|million|mn|m)?(?![a-z])"
+)
+_SCALES = {
+    "k": 1_000, "l": 100_000, "lakh": 100_000, "lakhs": 100_000, "lac": 100_000,
+    "lacs": 100_000, "lpa": 100_000, "cr": 10_000_000, "crore": 10_000_000,
+    "crores": 10_000_000, "m": 1_000_000, "mn": 1_000_000, "million": 1_000_000,
+}
+
+
+def parse(text, default_currency=DEFAULT_CURRENCY):
+    """``Salary`` for text like "10-12 LPA", "₹50,000/month" or "$120k".
+
+    Returns None when the text states no amount ("Negotiable"). Without a
+    currency ``default_currency`` is assumed, and without a period, a year.
+    """
+    text = " ".join(text.lower().split())
+    amounts = []
+    for number, scale in _AMOUNT_RE.findall(text)[:2]:
+        try:
+            amounts.append([Decimal(number.replace(",", "")), scale])
+        except InvalidOperation:
+            continue
+    if not amounts:
+        return None
+    if len(amounts) == 2 and not amounts[0][1]:
+        amounts[0][1] = amounts[1][1]
+
+    currency = _CURRENCY_RE.search(text)
+    currency = _CURRENCY_CODES[currency.group().strip()] if currency else default_currency
+    period = next((name for name, pattern in _PERIOD_RE if pattern.search(text)), "year")
+    yearly = [
+        int(amount * _SCALES.get(scale, 1) * PERIODS[period]) for amount, scale in amounts
+    ]
+    return Salary(min(yearly), max(yearly), currency, period)
+
+
+def selected_range(params):
+    """The ``(currency, low, high)`` salary filter in a query dict, or None.
+
+    ``salary_min``/``salary_max`` take anything ``parse`` does, so "10 LPA"
+    and "1000000" mean the same. ``currency`` defaults to the one written in
+    the amounts, else DEFAULT_CURRENCY. Raises ValueError for unreadable input.
+    """
+    currency = params.get("currency", "").strip().upper()
+    if currency and currency not in CURRENCIES:
+        raise ValueError(f"currency must be one of {', '.join(CURRENCIES)}.")
+    bounds = {}
+    for name in ("salary_min", "salary_max"):
+        value = params.get(name, "").strip()
+        if not value:
+            continue
+        salary = parse(value, currency or DEFAULT_CURRENCY)
+        if salary is None:
+            raise ValueError(f"{name} must be an amount such as 1000000 or 10 LPA.")
+        currency = currency or salary.currency
+        bounds[name] = salary.low
+    if not currency and not bounds:
+        return None
+    return currency or DEFAULT_CURRENCY, bounds.get("salary_min"), bounds.get("salary_max")
+
+
+def filter_jobs(queryset, selected):
+    """Jobs paid in ``selected``'s currency whose yearly range overlaps it.
+
+    Either bound may be None. Leaves one range condition on job_salary_idx.
+    """
+    currency, low, high = selected
+    queryset = queryset.filter(salary_currency=currency, salary_max__isnull=False)
+    if low is not None:
+        queryset = queryset.filter(salary_max__gte=low)
+    if high is not None:
+        queryset = queryset.filter(salary_min__lte=high)
+    return queryset
+
+
+def matches(selected, job):
+    """Whether ``job`` passes ``filter_jobs(..., selected)``, without a query."""
+    currency, low, high = selected
+    return (
+        job.salary_currency == currency
+        and job.salary_max is not None
+        and (low is None or job.salary_max >= low)
+        and (high is None or job.salary_min <= high)
+    )
@@ -0,0 +1,226 @@
+# search.py - full-text job search over the SQLite FTS5 index
+import re
+import unicodedata
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Job, JobSearchIndex
+
+INDEX_TABLE = JobSearchIndex._meta.db_table
+# fts5vocab over INDEX_TABLE: how many jobs contain each term
+VOCAB_TABLE = "Portal_jobsearchvocab"
+INDEXED_FIELDS = ["title", "company", "description", "category", "location"]
+# Keyset ordering of ranked results: best BM25 score first, newest on ties.
+RANK_KEYS = [("rank", False), ("id", True)]
+
+# Control characters never appear in job text, so snippet() can mark hits with
+# them and we escape the text before turning them into <mark> tags.
+_HIT_START = "\x02"
+_HIT_END = "\x03"
+
+_TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r"\w+")
+# What the unicode61 tokenizer keeps as a token once case and accents are gone
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def fts_enabled():
+    return connection.vendor == "sqlite"
+
+
+def build_match_expression(text):
+    """Turn free text from the search box into a safe FTS5 query.
+
+    ``"senior engineer"`` is a phrase, ``dev*`` a prefix query, everything
+    else an ANDed term. FTS5 operators typed by the user are treated as words.
+    Returns None when nothing searchable is left.
+    """
+    terms = []
+    for phrase, word in _TERM_RE.findall(text or ""):
+        words = _WORD_RE.findall(phrase or word)
+        if not words:
+            continue
+        term = '"%s"' % " ".join(words)
+        if word.endswith("*"):
+            term += "*"
+        terms.append(term)
+    return " ".join(terms) or None
+
+
+def query_terms(text):
+    """The ``(tokens, is_prefix)`` terms FTS5 sees in ``build_match_expression(text)``.
+
+    Every term must match for a job to be listed; a term matches when its
+    tokens appear in that order in one column, the last as a prefix if asked.
+    """
+    terms = []
+    for phrase, word in _TERM_RE.findall(text or ""):
+        tokens = tokenize(" ".join(_WORD_RE.findall(phrase or word)))
+        if tokens:
+            terms.append((tokens, word.endswith("*")))
+    return terms
+
+
+def tokenize(text):
+    """Split ``text`` the way the index's unicode61 tokenizer does."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _TOKEN_RE.findall(text)
+
+
+def matches_document(terms, columns):
+    """Whether ``query_terms`` output matches tokenized ``columns``, as MATCH would."""
+    return all(
+        any(_has_phrase(tokens, phrase, is_prefix) for tokens in columns)
+        for phrase, is_prefix in terms
+    )
+
+
+def _has_phrase(tokens, phrase, is_prefix):
+    *head, last = phrase
+    for start in range(len(tokens) - len(head)):
+        if tokens[start : start + len(head)] != head:
+            continue
+        token = tokens[start + len(head)]
+        if token == last or (is_prefix and token.startswith(last)):
+            return True
+    return False
+
+
+def document_counts(tokens):
+    """``{token: number of indexed jobs containing it}`` from the vocabulary."""
+    tokens = sorted(set(tokens))
+    if not fts_enabled() or not tokens:
+        return {}
+    placeholders = ", ".join(["%s"] * len(tokens))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT term, doc FROM {VOCAB_TABLE} WHERE term IN ({placeholders})", tokens
+        )
+        return dict(cursor.fetchall())
+
+
+def prefix_document_count(prefix):
+    """Upper bound on the indexed jobs with a token starting with ``prefix``."""
+    if not fts_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COALESCE(SUM(doc), 0) FROM {VOCAB_TABLE} WHERE term >= %s AND term < %s",
+            [prefix, prefix + "\U0010ffff"],
+        )
+        return cursor.fetchone()[0]
+
+
+def search_jobs(queryset, text):
+    """Restrict ``queryset`` to jobs matching ``text``, best matches first."""
+    expression = build_match_expression(text)
+    if expression is None:
+        return queryset
+    if not fts_enabled():
+        # Same tokens as the index, but phrases only need each of their words
+        for tokens, _is_prefix in query_terms(text):
+            for token in tokens:
+                found = Q()
+                for field in INDEXED_FIELDS:
+                    found |= Q(**{f"{field}__icontains": token})
+                queryset = queryset.filter(found)
+        return queryset
+    return (
+        queryset.filter(search_entry__document__match=expression)
+        .annotate(rank=F("search_entry__rank"))
+        .order_by("rank", "-id")
+    )
+
+
+def is_ranked(queryset):
+    return "rank" in queryset.query.annotations
+
+
+def attach_snippets(objects, text, size=24, table=INDEX_TABLE, column=2):
+    """Set ``obj.snippet`` to a highlighted excerpt for each matching object.
+
+    Defaults to job descriptions; other FTS5 tables keyed by primary key can
+    pass their ``table`` and ``column`` (-1 lets FTS5 pick the best column).
+    Runs a single query for the whole page of results.
+    """
+    expression = build_match_expression(text)
+    objects = list(objects)
+    if expression is None or not objects or not fts_enabled():
+        return objects
+    placeholders = ", ".join(["%s"] * len(objects))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, snippet({table}, %s, %s, %s, %s, %s) "
+            f"FROM {table} WHERE {table} MATCH %s "
+            f"AND rowid IN ({placeholders})",
+            [column, _HIT_START, _HIT_END, "…", size, expression]
+            + [obj.pk for obj in objects],
+        )
+        snippets = dict(cursor.fetchall())
+    for obj in objects:
+        if obj.pk in snippets:
+            obj.snippet = _highlight(snippets[obj.pk])
+    return objects
+
+
+def _highlight(snippet):
+    html = escape(snippet)
+    return mark_safe(html.replace(_HIT_START, "<mark>").replace(_HIT_END, "</mark>"))
+
+
+def _index_rows(cursor, rows):
+    cursor.executemany(
+        f"INSERT OR REPLACE INTO {INDEX_TABLE}"
+        f"(rowid, {', '.join(INDEXED_FIELDS)}) VALUES (%s, %s, %s, %s, %s, %s)",
+        rows,
+    )
+
+
+def index_jobs(jobs):
+    """Add or refresh the index entries for ``jobs``."""
+    if not fts_enabled():
+        return
+    rows = [
+        [job.pk] + [getattr(job, field) for field in INDEXED_FIELDS] for job in jobs
+    ]
+    if rows:
+        with connection.cursor() as cursor:
+            _index_rows(cursor, rows)
+
+
+def unindex_jobs(job_ids):
+    """Drop the index entries for the given job ids."""
+    if not fts_enabled():
+        return
+    job_ids = [[job_id] for job_id in job_ids]
+    if job_ids:
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {INDEX_TABLE} WHERE rowid = %s", job_ids)
+
+
+def rebuild_index(batch_size=5000):
+    """Re-create every index entry from ``Job`` and return the number indexed."""
+    if not fts_enabled():
+        return 0
+    count = 0
+    rows = Job.objects.order_by().values_list("id", *INDEXED_FIELDS)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {INDEX_TABLE}")
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _index_rows(cursor, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            _index_rows(cursor, batch)
+            count += len(batch)
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}) VALUES ('optimize')"
+        )
+    return count
@@ -0,0 +1,61 @@
+# serializers.py - JSON representations for the partner API
+from django.urls import reverse
+from rest_framework import serializers
+
+from .models import DeletedJob, Job
+
+
+class SparseFieldsMixin:
+    """Drop every field not named in the ``fields`` keyword argument."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class JobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "url",
+            "title",
+            "company",
+            "location",
+            "latitude",
+            "longitude",
+            "category",
+            "salary",
+            "salary_min",
+            "salary_max",
+            "salary_currency",
+            "salary_period",
+            "summary",
+            "description",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+    # Model columns behind each field, so views can load only what is sent
+    COLUMNS = {"url": ["id"]}
+
+    @classmethod
+    def columns(cls, fields):
+        return sorted({column for name in fields for column in cls.COLUMNS.get(name, [name])})
+
+    def get_url(self, job):
+        path = reverse("job_detail", args=[job.id])
+        request = self.context.get("request")
+        return request.build_absolute_uri(path) if request else path
+
+
+class DeletedJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeletedJob
+        fields = ["job_id", "deleted_at"]
+        read_only_fields = fields
@@ -0,0 +1,201 @@
+# signals.py - keep derived data in step with Job and Application writes
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import (
+    alerts, analytics, caching, counters, facets, notifications, ranking, resumes, search, storage,
+)
+from .models import FACETS, Application, DeletedJob, Job
+
+
+@receiver(pre_save, sender=Job)
+def remember_job_facets(sender, instance, **kwargs):
+    # The rollup needs what the row looked like before an edit, and
+    # applicant scores go stale when the text they were scored against changes.
+    instance._previous_facets = instance._previous_text = None
+    if not instance._state.adding:
+        previous = (
+            Job.objects.filter(pk=instance.pk)
+            .values(*FACETS, *[f"{facet}_key" for facet in FACETS], *ranking.JOB_WEIGHTS)
+            .first()
+        )
+        if previous:
+            instance._previous_facets = (
+                {facet: previous[f"{facet}_key"] for facet in FACETS},
+                {facet: " ".join(previous[facet].split()) for facet in FACETS},
+            )
+            instance._previous_text = [previous[field] for field in ranking.JOB_WEIGHTS]
+
+
+@receiver(post_save, sender=Job)
+def index_saved_job(sender, instance, **kwargs):
+    search.index_jobs([instance])
+
+
+@receiver(post_save, sender=Job)
+def count_saved_job_facets(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_facets", None)
+    facets.update_counts(
+        added=[facets.snapshot(instance)], removed=[previous] if previous else []
+    )
+
+
+@receiver(post_save, sender=Job)
+def queue_job_alerts(sender, instance, created, **kwargs):
+    # Only new jobs: an edited posting was already matched when it went up
+    if created:
+        alerts.match_jobs([instance])
+
+
+@receiver(post_save, sender=Job)
+def rescore_edited_job(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_text", None)
+    if previous is not None and previous != ranking.job_text(instance):
+        if Application.objects.filter(job=instance).update(relevance=None):
+            ranking.queue_jobs([instance.pk])
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_pages(sender, instance, **kwargs):
+    caching.bump(caching.LISTING, caching.job_scope(instance.pk))
+
+
+@receiver(post_delete, sender=Job)
+def unindex_deleted_job(sender, instance, **kwargs):
+    search.unindex_jobs([instance.pk])
+
+
+@receiver(post_delete, sender=Job)
+def record_deleted_job(sender, instance, **kwargs):
+    DeletedJob.objects.create(job_id=instance.pk)
+
+
+@receiver(pre_delete, sender=Job)
+def unindex_job_applications(sender, instance, **kwargs):
+    # One statement instead of a delete per cascaded application.
+    resumes.unindex_job_applications(instance.pk)
+
+
+@receiver(pre_delete, sender=Job)
+def collect_job_resumes(sender, instance, **kwargs):
+    # One sweep after commit for every resume the job's applications leave behind.
+    names = set(
+        Application.objects.filter(job=instance)
+        .exclude(resume="")
+        .values_list("resume", flat=True)
+    )
+    if names:
+        transaction.on_commit(lambda: storage.collect_blobs(names))
+
+
+@receiver(post_delete, sender=Job)
+def uncount_deleted_job_facets(sender, instance, **kwargs):
+    facets.update_counts(removed=[facets.snapshot(instance)])
+
+
+@receiver(pre_save, sender=Application)
+def remember_application_status(sender, instance, **kwargs):
+    instance._previous_status = instance._previous_reviewed_at = None
+    instance._needs_score = instance._state.adding
+    if not instance._state.adding:
+        previous = (
+            Application.objects.filter(pk=instance.pk)
+            .values_list("status", "reviewed_at", "cover_letter", "resume")
+            .first()
+        )
+        if previous:
+            instance._previous_status, instance._previous_reviewed_at = previous[:2]
+            # A new cover letter or resume needs a new relevance score
+            if previous[2:] != (instance.cover_letter, instance.resume.name):
+                instance.relevance = None
+                instance._needs_score = True
+
+
+@receiver(post_save, sender=Application)
+def count_saved_application(sender, instance, created, **kwargs):
+    if created:
+        counters.record_new(instance.job_id, instance.status)
+    elif instance._previous_status is not None:
+        counters.record_status_change(
+            instance.job_id, instance._previous_status, instance.status
+        )
+
+
+@receiver(post_save, sender=Application)
+def roll_up_saved_application(sender, instance, created, **kwargs):
+    current = analytics.snapshot(
+        instance.job_id, instance.status, instance.applied_at, instance.reviewed_at
+    )
+    if created:
+        analytics.update_counts(added=[current])
+    elif instance._previous_status is not None:
+        previous = analytics.snapshot(
+            instance.job_id,
+            instance._previous_status,
+            instance.applied_at,
+            instance._previous_reviewed_at,
+        )
+        if previous != current:
+            analytics.update_counts(added=[current], removed=[previous])
+
+
+@receiver(post_save, sender=Application)
+def record_application_event(sender, instance, created, **kwargs):
+    # Same transaction as the save, so the outbox never misses or invents a change
+    if created:
+        notifications.record_applied(instance)
+    elif instance._previous_status is not None:
+        notifications.record_status_change(instance, instance._previous_status)
+
+
+@receiver(post_save, sender=Application)
+def queue_application_scoring(sender, instance, **kwargs):
+    if getattr(instance, "_needs_score", False):
+        ranking.queue_jobs([instance.job_id])
+
+
+@receiver(post_save, sender=Application)
+def queue_resume_extraction(sender, instance, created, **kwargs):
+    if created and instance.resume:
+        resumes.queue([instance.pk])
+
+
+@receiver(post_delete, sender=Application)
+def unindex_deleted_application(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Job):
+        return
+    resumes.unindex_applications([instance.pk])
+
+
+@receiver(post_delete, sender=Application)
+def uncount_deleted_application(sender, instance, origin=None, **kwargs):
+    # Deleting the job takes its counters with it.
+    if isinstance(origin, Job):
+        return
+    counters.record_removed(instance.job_id, instance.status)
+
+
+@receiver(post_delete, sender=Application)
+def uncount_deleted_application_day(sender, instance, origin=None, **kwargs):
+    # The job's rollup rows go with the job.
+    if isinstance(origin, Job):
+        return
+    analytics.update_counts(
+        removed=[
+            analytics.snapshot(
+                instance.job_id, instance.status, instance.applied_at, instance.reviewed_at
+            )
+        ]
+    )
+
+
+@receiver(post_delete, sender=Application)
+def collect_unused_resume(sender, instance, origin=None, **kwargs):
+    # Deleting the job collects all of its resumes in one go.
+    if isinstance(origin, Job):
+        return
+    name = instance.resume.name
+    if name:
+        transaction.on_commit(lambda: storage.collect_blobs([name]))
@@ -0,0 +1,171 @@
+# storage.py - content-addressed, deduplicated resume storage
+import hashlib
+import os
+import posixpath
+import time
+import uuid
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = "resumes/blobs"
+
+
+class HashingFileUploadHandler(TemporaryFileUploadHandler):
+    """Stream every upload to a temporary file, hashing it chunk by chunk.
+
+    Replaces Django's memory handler so even small uploads never sit in RAM,
+    and leaves the SHA-256 on the uploaded file as ``sha256`` so storage does
+    not have to read it a second time.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.digest.hexdigest()
+        return file
+
+
+def file_digest(content):
+    digest = getattr(content, "sha256", None)
+    if digest:
+        return digest
+    sha256 = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        sha256.update(chunk)
+    content.seek(0)
+    return sha256.hexdigest()
+
+
+@deconstructible(path="Portal.storage.ContentAddressedStorage")
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores each distinct file once, named after its SHA-256.
+
+    ``save()`` ignores the suggested name apart from its extension and returns
+    ``resumes/blobs/ab/<sha256>.<ext>``; saving identical bytes again returns
+    the existing name without writing anything.
+    """
+
+    def blob_name(self, digest, extension):
+        return posixpath.join(BLOB_PREFIX, digest[:2], f"{digest}{extension.lower()}")
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content in _save, so never add a suffix here.
+        return name
+
+    def _save(self, name, content):
+        name = self.blob_name(file_digest(content), os.path.splitext(name)[1])
+        if self.exists(name):
+            # Refresh the mtime so garbage collection treats the blob as new again
+            os.utime(self.path(name))
+            return name
+
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.{uuid.uuid4().hex}.part"
+        if hasattr(content, "temporary_file_path"):
+            file_move_safe(content.temporary_file_path(), partial)
+        else:
+            with open(partial, "wb") as handle:
+                for chunk in content.chunks():
+                    handle.write(chunk)
+        if self.file_permissions_mode is not None:
+            os.chmod(partial, self.file_permissions_mode)
+        # Atomic: a concurrent save of the same bytes just replaces an equal file
+        os.replace(partial, path)
+        return name
+
+    def is_blob(self, name):
+        return name.startswith(BLOB_PREFIX + "/")
+
+    def iter_blobs(self, older_than=None):
+        """Yield stored blob names, optionally only those not modified recently."""
+        root = self.path(BLOB_PREFIX)
+        for directory, _dirs, files in os.walk(root):
+            for filename in files:
+                # Includes ``.part`` files left behind by interrupted writes
+                path = os.path.join(directory, filename)
+                if older_than is not None and os.path.getmtime(path) > older_than:
+                    continue
+                yield posixpath.join(
+                    BLOB_PREFIX, os.path.relpath(path, root).replace(os.sep, "/")
+                )
+
+
+_resume_storage = ContentAddressedStorage()
+
+
+def resume_storage():
+    return _resume_storage
+
+
+def collect_blobs(names, grace_seconds=3600):
+    """Delete the given blobs unless an application still references them.
+
+    Blobs written or re-used within ``grace_seconds`` are left for
+    ``collect_garbage``, since an upload in flight may be about to reference
+    them. Returns the names deleted.
+    """
+    from .models import Application
+
+    cutoff = time.time() - grace_seconds
+    names = [
+        name
+        for name in set(names)
+        if name
+        and _resume_storage.is_blob(name)
+        and _resume_storage.exists(name)
+        and os.path.getmtime(_resume_storage.path(name)) <= cutoff
+    ]
+    if not names:
+        return []
+    referenced = set(
+        Application.objects.filter(resume__in=names).values_list("resume", flat=True)
+    )
+    deleted = []
+    for name in names:
+        if name not in referenced:
+            _resume_storage.delete(name)
+            deleted.append(name)
+    return deleted
+
+
+def collect_garbage(grace_seconds=24 * 3600, batch_size=1000, dry_run=False):
+    """Delete every unreferenced blob older than ``grace_seconds``.
+
+    The grace period protects blobs written by uploads whose Application row
+    has not been committed yet. Returns the names of unreferenced blobs.
+    """
+    from .models import Application
+
+    unreferenced = []
+    batch = []
+
+    def flush():
+        referenced = set(
+            Application.objects.filter(resume__in=batch).values_list("resume", flat=True)
+        )
+        orphans = [name for name in batch if name not in referenced]
+        if not dry_run:
+            for name in orphans:
+                _resume_storage.delete(name)
+        unreferenced.extend(orphans)
+        batch.clear()
+
+    for name in _resume_storage.iter_blobs(older_than=time.time() - grace_seconds):
+        batch.append(name)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return unreferenced
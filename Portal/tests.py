@@ -1,3 +1,1971 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import logging
+import math
+import os
+import shutil
+import smtplib
+import sqlite3
+import tempfile
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.utils import ConnectionHandler
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    admin as portal_admin, alerts, analytics, caching, counters, exports, facets, geo, imports, notifications,
+    ranking, recommendations, resumes, salaries, search, storage,
+)
+from .middleware import QueryStats, query_shape
+from .models import (
+    Application, DailyApplicationCount, DeletedJob, FacetCount, Job, JobImport, JobSearchIndex,
+    OutboxEvent, PendingRanking, ResumeExtraction, SavedSearch, User,
+)
+from .pagination import paginate_keyset
+from .views import LISTING_KEYS
+
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "portal": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "portal-tests",
+    },
+}
+CITIES = ["Kochi", "Bangalore", "Chennai", "Pune", "Hyderabad"]
+CATEGORIES = ["IT", "Sales", "Design", "Finance"]
+
+
+def seed_portal(rows):
+    """Seed ``rows`` jobs and ``rows`` applications with a realistic skew.
+
+    Most jobs belong to one busy employer and one seeker has applied widely,
+    so per-row queries on the employer and seeker pages grow with ``rows``.
+    Returns the users and jobs the tests log in as and visit.
+    """
+    employer = User.objects.create_user(
+        "employer", "employer@example.com", "pass12345", role="employer"
+    )
+    other_employer = User.objects.create_user(
+        "other", "other@example.com", "pass12345", role="employer"
+    )
+    seeker = User.objects.create_user(
+        "seeker", "seeker@example.com", "pass12345", role="seeker"
+    )
+    crowd = User.objects.bulk_create(
+        User(username=f"seeker{i}", email=f"seeker{i}@example.com", role="seeker")
+        for i in range(rows)
+    )
+
+    jobs = []
+    for i in range(rows):
+        job = Job(
+            employer=employer if i % 10 else other_employer,
+            title=f"Python Developer {i}",
+            description=f"Build Django services for team {i}. " * 20,
+            salary="10-12 LPA",
+            location=CITIES[i % len(CITIES)],
+            category=CATEGORIES[i % len(CATEGORIES)],
+            company=f"Company {i % 7}",
+        )
+        job.refresh_derived_fields()
+        jobs.append(job)
+    jobs = Job.objects.bulk_create(jobs)
+
+    popular = jobs[1]
+    applications = [
+        Application(job=popular, seeker=user, resume="resumes/seed.pdf")
+        for user in crowd[: rows // 2]
+    ]
+    applications += [
+        Application(job=job, seeker=seeker, resume="resumes/seed.pdf")
+        for job in jobs[2 : 2 + rows - len(applications)]
+    ]
+    statuses = counters.STATUSES
+    for i, application in enumerate(applications):
+        application.status = statuses[i % len(statuses)]
+    Application.objects.bulk_create(applications)
+
+    search.rebuild_index()
+    facets.rebuild_counts()
+    counters.reconcile()
+    analytics.reconcile()
+    return {
+        "employer": employer,
+        "seeker": seeker,
+        "popular": popular,
+        "unapplied": jobs[-1],
+        "application": Application.objects.filter(job=popular).first(),
+    }
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PortalTestCase(TestCase):
+    """Starts every test with an empty page/fragment cache."""
+
+    def setUp(self):
+        caching.portal_cache().clear()
+
+
+class QueryBudgetMixin:
+    """Every Portal URL must stay within a query budget at any data size.
+
+    Budgets are identical for every size, so a per-row query shows up as a
+    failure on the large data set.
+    """
+
+    rows = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_portal(cls.rows)
+
+    def assertQueryBudget(self, budget, method, url, user=None, data=None):
+        if user is not None:
+            self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data or {})
+            if response.streaming:
+                # Streamed bodies run their queries while being consumed
+                response.streamed = b"".join(response.streaming_content)
+        self.assertLess(response.status_code, 500)
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            f"{method.upper()} {url} ran {len(queries)} queries with {self.rows} rows:\n"
+            + "\n".join(q["sql"] for q in queries.captured_queries),
+        )
+        return response
+
+    def test_home(self):
+        self.assertQueryBudget(0, "get", reverse("home"))
+
+    def test_register_and_login_pages(self):
+        self.assertQueryBudget(0, "get", reverse("register"))
+        self.assertQueryBudget(0, "get", reverse("login"))
+
+    def test_logout(self):
+        self.assertQueryBudget(4, "get", "/logout/", self.data["seeker"])
+
+    def test_seeker_dashboard(self):
+        # Includes the seeker's saved searches
+        self.assertQueryBudget(4, "get", reverse("dashboard"), self.data["seeker"])
+        with tempfile.TemporaryDirectory() as index, self.settings(RECOMMENDATIONS_DIR=index):
+            recommendations.build()
+            # Two of these refresh the recommendation delta after a job change
+            self.assertQueryBudget(7, "get", reverse("dashboard"), self.data["seeker"])
+
+    def test_employer_dashboard(self):
+        self.assertQueryBudget(3, "get", reverse("dashboard"), self.data["employer"])
+
+    def test_job_list(self):
+        self.assertQueryBudget(2, "get", reverse("job_list"))
+        self.assertQueryBudget(5, "get", reverse("job_list"), self.data["seeker"])
+
+    def test_job_list_search_and_filters(self):
+        url = reverse("job_list")
+        search_params = {"search": "python dev*"}
+        response = self.assertQueryBudget(3, "get", url, data=search_params)
+        cursor = response.context["next_cursor"]
+        if cursor:
+            self.assertQueryBudget(3, "get", url, data={**search_params, "cursor": cursor})
+        self.assertQueryBudget(2, "get", url, data={"location": "kochi", "category": "it"})
+        self.assertQueryBudget(2, "get", url, data={"salary_min": "11 LPA", "sort": "salary"})
+        self.assertQueryBudget(2, "get", url, data={"near": "Kochi", "sort": "distance"})
+
+    def test_job_detail(self):
+        url = reverse("job_detail", args=[self.data["popular"].id])
+        self.assertQueryBudget(1, "get", url)
+        self.assertQueryBudget(4, "get", url, self.data["seeker"])
+        self.assertQueryBudget(3, "get", url, self.data["employer"])
+
+    def test_apply_job_form(self):
+        job = self.data["unapplied"]
+        self.assertQueryBudget(
+            4, "get", reverse("apply_job", args=[job.id]), self.data["seeker"]
+        )
+        self.assertQueryBudget(4, "get", f"/apply/{job.id}/", self.data["seeker"])
+
+    def test_apply_job(self):
+        job = self.data["unapplied"]
+        resume = SimpleUploadedFile("cv.pdf", b"%PDF-1.4 budget resume")
+        # The application, then its counters, rollup, outbox event and work queues
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            response = self.assertQueryBudget(
+                14, "post", reverse("apply_job", args=[job.id]), self.data["seeker"],
+                {"cover_letter": "Hello", "resume": resume},
+            )
+        self.assertRedirects(response, reverse("dashboard"), fetch_redirect_response=False)
+
+    def test_save_and_delete_search(self):
+        seeker = self.data["seeker"]
+        # Reads the searched words' job counts to pick the rarest, then files it
+        self.assertQueryBudget(
+            9, "post", reverse("save_search"), seeker,
+            {"query": "search=python+developer&location=kochi", "name": "Kochi Python"},
+        )
+        saved = seeker.saved_searches.get()
+        self.assertQueryBudget(
+            5, "post", reverse("delete_saved_search", args=[saved.id]), seeker
+        )
+        self.assertFalse(seeker.saved_searches.exists())
+
+    def test_manage_jobs(self):
+        self.assertQueryBudget(3, "get", reverse("manage_jobs"), self.data["employer"])
+
+    def test_import_jobs(self):
+        employer = self.data["employer"]
+        upload = SimpleUploadedFile("jobs.csv", b"title,company\nRust Engineer,Ferrous\n")
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            # Stores the file and queues it; process_job_imports does the rest
+            response = self.assertQueryBudget(
+                3, "post", reverse("import_jobs"), employer, {"file": upload}
+            )
+        job_import = JobImport.objects.get()
+        self.assertRedirects(
+            response, reverse("job_import", args=[job_import.id]), fetch_redirect_response=False
+        )
+        self.assertQueryBudget(3, "get", reverse("import_jobs"), employer)
+        self.assertQueryBudget(3, "get", reverse("job_import", args=[job_import.id]), employer)
+
+    def test_employer_analytics(self):
+        url = reverse("employer_analytics")
+        for days in analytics.PERIODS:
+            # The rollup rows, then the titles of the jobs listed
+            self.assertQueryBudget(4, "get", url, self.data["employer"], {"days": days})
+
+    def test_download_resume(self):
+        url = reverse("download_resume", args=[self.data["application"].id])
+        # Session, user, then the application joined to its job's employer
+        self.assertQueryBudget(3, "get", url, self.data["employer"])
+
+    def test_post_and_edit_job_forms(self):
+        self.assertQueryBudget(2, "get", reverse("post_job"), self.data["employer"])
+        self.assertQueryBudget(
+            3,
+            "get",
+            reverse("edit_job", args=[self.data["popular"].id]),
+            self.data["employer"],
+        )
+
+    def test_view_applicants(self):
+        job_id = self.data["popular"].id
+        url = reverse("view_applications", args=[job_id])
+        response = self.assertQueryBudget(4, "get", url, self.data["employer"])
+        cursor = response.context["applications"].next_cursor
+        if cursor:
+            self.assertQueryBudget(4, "get", url, data={"cursor": cursor})
+        self.assertQueryBudget(
+            4, "get", f"/jobs/{job_id}/applications/", self.data["employer"]
+        )
+
+    def test_view_applicants_by_relevance(self):
+        url = reverse("view_applications", args=[self.data["popular"].id])
+        # Read-only: unscored applicants are one more query after the last ranked page
+        self.assertQueryBudget(5, "get", url, self.data["employer"], {"sort": "relevance"})
+        ranking.score_pending()
+        self.assertQueryBudget(5, "get", url, data={"sort": "relevance"})
+
+    def test_update_application_status(self):
+        application = self.data["application"]
+        # Includes the notification written to the outbox and the daily rollup upsert
+        self.assertQueryBudget(
+            12,
+            "get",
+            reverse("update_application_status", args=[application.id, "reviewed"]),
+            self.data["employer"],
+        )
+
+    def test_bulk_update_application_status(self):
+        job = self.data["popular"]
+        # One INSERT ... SELECT writes every notification, one upsert every rollup
+        self.assertQueryBudget(
+            12,
+            "post",
+            reverse("view_applications", args=[job.id]),
+            self.data["employer"],
+            {
+                "status": "rejected",
+                "applications": list(job.applications.values_list("id", flat=True)),
+            },
+        )
+
+    def test_exports(self):
+        employer = self.data["employer"]
+        for kind in ("applications", "jobs"):
+            response = self.assertQueryBudget(
+                3, "get", reverse("export_data", args=[kind, "csv"]), employer
+            )
+            self.assertGreater(response.streamed.count(b"\n"), 1)
+
+    def test_api(self):
+        self.assertQueryBudget(1, "get", reverse("api_job_list", args=["v1"]))
+        self.assertQueryBudget(
+            1, "get", reverse("api_job_list", args=["v1"]), data={"search": "django"}
+        )
+        self.assertQueryBudget(
+            1,
+            "get",
+            reverse("api_job_detail", args=["v1", self.data["popular"].id]),
+            data={"fields": "title,url"},
+        )
+
+    def test_api_deleted_jobs(self):
+        DeletedJob.objects.bulk_create(DeletedJob(job_id=pk) for pk in range(self.rows))
+        url = reverse("api_deleted_jobs", args=["v1"])
+        page = self.assertQueryBudget(1, "get", url, data={"limit": 5}).json()
+        self.assertEqual(len(page["results"]), 5)
+        self.assertQueryBudget(1, "get", page["next"])
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        self.assertQueryBudget(1, "get", url, data={"since": since})
+
+    def test_admin_changelists(self):
+        staff = User.objects.create_superuser("admin", "admin@example.com", "pass12345")
+        for model in ("application", "job", "user"):
+            # Unfiltered lists read the highest id before counting
+            url = reverse(f"admin:Portal_{model}_changelist")
+            self.assertQueryBudget(5, "get", url, staff)
+        url = reverse("admin:Portal_application_changelist")
+        self.assertQueryBudget(4, "get", url, data={"status__exact": "pending", "q": "seeker1"})
+
+    def test_delete_job(self):
+        job = self.data["unapplied"]
+        # Includes the cascade to the job's ranking queue entry and reading
+        # the resume names to collect once the delete commits
+        self.assertQueryBudget(
+            16, "post", reverse("delete_job", args=[job.id]), self.data["employer"]
+        )
+
+
+class SmallDataQueryBudgetTests(QueryBudgetMixin, PortalTestCase):
+    rows = 10
+
+
+class LargeDataQueryBudgetTests(QueryBudgetMixin, PortalTestCase):
+    rows = 1000
+
+
+class QueryStatsTests(PortalTestCase):
+    def test_query_shape_collapses_in_lists(self):
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE id IN (%s, %s, %s)"),
+            query_shape("SELECT *  FROM t WHERE id IN (%s, %s)"),
+        )
+
+    def test_duplicates(self):
+        stats = QueryStats()
+        execute = lambda sql, params, many, context: None  # noqa: E731
+        for sql in ["SELECT 1", "SELECT %s", "SELECT %s"]:
+            stats(execute, sql, [], False, {})
+        self.assertEqual(stats.count, 3)
+        self.assertEqual(stats.duplicates, {"SELECT %s": 2})
+
+    @override_settings(QUERY_STATS_HEADERS=True)
+    def test_headers_and_log(self):
+        with self.assertLogs("Portal.queries", logging.INFO) as logs:
+            response = self.client.get(reverse("job_list"))
+        self.assertEqual(response["X-Query-Count"], "2")
+        self.assertEqual(response["X-Duplicate-Queries"], "0")
+        self.assertIn("X-Query-Time-Ms", response)
+        self.assertIn("GET /jobs/: 2 queries", logs.output[0])
+
+
+class PageCacheTests(PortalTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_portal(30)
+
+    def test_anonymous_listing_is_served_from_cache(self):
+        url = reverse("job_list")
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertIn("Last-Modified", second)
+
+    def test_conditional_get_returns_304(self):
+        url = reverse("job_detail", args=[self.data["popular"].id])
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_job_save_invalidates_pages(self):
+        job = self.data["unapplied"]
+        listing = self.client.get(reverse("job_list"))
+        detail = self.client.get(reverse("job_detail", args=[job.id]))
+        job.title = "Staff Platform Engineer"
+        job.save()
+        self.assertNotEqual(self.client.get(reverse("job_list"))["ETag"], listing["ETag"])
+        response = self.client.get(reverse("job_detail", args=[job.id]))
+        self.assertNotEqual(response["ETag"], detail["ETag"])
+        self.assertContains(response, "Staff Platform Engineer")
+
+    def test_seekers_get_their_applied_state_over_cached_cards(self):
+        self.client.get(reverse("job_list"))
+        self.client.force_login(self.data["seeker"])
+        response = self.client.get(reverse("job_list"))
+        self.assertNotIn("ETag", response)
+        self.assertContains(response, "Applied")
+        self.assertContains(response, "Apply Now")
+
+
+class QueryPlanTests(PortalTestCase):
+    """Every SELECT behind the per-user pages must be an index search.
+
+    A full table scan or a temporary B-tree for ORDER BY is invisible at
+    test sizes but grows with the employer's or seeker's row count.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_portal(100)
+
+    def assertIndexedPlans(self, user, url, data=None, table=None):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url, data or {}).status_code, 200)
+        selects = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("SELECT") and (table is None or table in query["sql"])
+        ]
+        self.assertTrue(selects)
+        with connection.cursor() as cursor:
+            for sql in selects:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                plan = [row[-1] for row in cursor.fetchall()]
+                with self.subTest(url=url, sql=sql[:120]):
+                    for step in plan:
+                        # Reading a LIMITed subquery's own rows is not a table scan
+                        self.assertFalse(
+                            step.startswith("SCAN") and step != "SCAN subquery", plan
+                        )
+                        self.assertNotIn("TEMP B-TREE", step, plan)
+
+    def test_employer_pages(self):
+        employer, job = self.data["employer"], self.data["popular"]
+        self.assertIndexedPlans(employer, reverse("dashboard"))
+        self.assertIndexedPlans(employer, reverse("manage_jobs"))
+        self.assertIndexedPlans(employer, reverse("import_jobs"))
+        applicants = reverse("view_applications", args=[job.id])
+        self.assertIndexedPlans(employer, applicants)
+        self.assertIndexedPlans(employer, applicants, {"status": "shortlisted"})
+        self.assertIndexedPlans(employer, applicants, {"sort": "relevance"})
+        self.assertIndexedPlans(employer, applicants, {"sort": "relevance", "status": "reviewed"})
+
+    def test_seeker_dashboard(self):
+        self.assertIndexedPlans(self.data["seeker"], reverse("dashboard"))
+
+    def test_employer_analytics(self):
+        self.assertIndexedPlans(self.data["employer"], reverse("employer_analytics"))
+
+    def test_admin_changelists(self):
+        staff = User.objects.create_superuser("admin", "admin@example.com", "pass12345")
+        applications = reverse("admin:Portal_application_changelist")
+        since = "2020-01-01 00:00:00+00:00"
+        self.assertIndexedPlans(staff, applications, {"status__exact": "rejected"})
+        self.assertIndexedPlans(
+            staff, applications, {"status__exact": "pending", "applied_at__gte": since}
+        )
+        self.assertIndexedPlans(staff, applications, {"applied_at__gte": since})
+        users = reverse("admin:Portal_user_changelist")
+        self.assertIndexedPlans(staff, users, {"role__exact": "seeker"})
+
+    def test_salary_sorted_listing(self):
+        # Only the job query: the facet rollup reads a small table of its own
+        seeker, url, table = self.data["seeker"], reverse("job_list"), '"Portal_job"'
+        self.assertIndexedPlans(seeker, url, {"salary_min": "11 LPA", "sort": "salary"}, table)
+        self.assertIndexedPlans(seeker, url, {"sort": "salary", "currency": "USD"}, table)
+
+
+class PaginationTests(PortalTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user("pager", role="employer")
+        cls.now = timezone.now()
+        # Pairs of jobs share a timestamp, so the id has to break the tie
+        for i in range(10):
+            cls.post(cls.now - timedelta(minutes=i // 2))
+
+    @classmethod
+    def post(cls, created_at):
+        job = Job.objects.create(
+            employer=cls.employer, title="Job", description="Work",
+            location="Kochi", category="IT", company="Acme",
+        )
+        Job.objects.filter(pk=job.pk).update(created_at=created_at)
+        return job
+
+    def test_pages_stay_one_sequence_while_jobs_are_posted(self):
+        seen, cursor, older = [], None, []
+        for _fetch in range(10):
+            page = paginate_keyset(Job.objects.all(), LISTING_KEYS, cursor, 3)
+            seen += [(job.created_at, job.id) for job in page]
+            # Listed by (-created_at, -id): a new posting and one tied with the
+            # last row (its id is larger) land before the cursor and are never
+            # seen; only the older job lands after it
+            self.post(timezone.now())
+            self.post(page.object_list[-1].created_at)
+            if len(older) < 2:
+                older.append(self.post(self.now - timedelta(days=1 + len(older))).id)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        else:
+            self.fail("The cursor stopped moving forward")
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        ids = [job_id for _created_at, job_id in seen]
+        self.assertTrue(set(older) <= set(ids))
+        self.assertEqual(len(ids), 12)
+
+
+class SearchTests(PortalTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        employer = User.objects.create_user("searcher", role="employer")
+
+        def job(title, description):
+            return Job.objects.create(
+                employer=employer, title=title, description=description,
+                location="Kochi", category="IT", company="Acme",
+            )
+
+        cls.pythonista = job("Python Developer", "Python services, python tooling and python tests.")
+        cls.accountant = job("Accountant", "Keeps the books; some python helps.")
+        cls.senior = job("Senior Engineer", "A senior engineer for data pipelines.")
+        cls.engineer = job("Engineer", "An engineer who is senior to nobody.")
+        cls.developer = job("Developer", "Developing the developers' tools.")
+
+    def search(self, text):
+        return list(search.search_jobs(Job.objects.all(), text))
+
+    def test_more_relevant_jobs_rank_first(self):
+        found = self.search("python")
+        self.assertEqual(found, [self.pythonista, self.accountant])
+        self.assertLess(found[0].rank, found[1].rank)
+
+    def test_phrases_keep_word_order(self):
+        self.assertEqual(self.search('"senior engineer"'), [self.senior])
+        self.assertEqual(set(self.search("senior engineer")), {self.senior, self.engineer})
+
+    def test_prefix_queries(self):
+        self.assertEqual(set(self.search("dev*")), {self.pythonista, self.developer})
+        self.assertEqual(self.search("dev"), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.accountant.title = "Rust Developer"
+        self.accountant.description = "Systems work in rust."
+        self.accountant.save()
+        self.assertEqual(self.search("python"), [self.pythonista])
+        self.assertEqual(self.search("rust"), [self.accountant])
+        self.pythonista.delete()
+        self.assertEqual(self.search("python"), [])
+        self.assertFalse(JobSearchIndex.objects.filter(job_id=self.pythonista.pk).exists())
+
+
+class FacetTests(PortalTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user("faceter", role="employer")
+
+    def post(self, location, company="Acme", category="IT"):
+        return Job.objects.create(
+            employer=self.employer, title="Job", description="Work",
+            location=location, category=category, company=company,
+        )
+
+    def counts(self):
+        return dict(
+            ((row.facet, row.value), (row.label, row.count))
+            for row in FacetCount.objects.filter(count__gt=0)
+        )
+
+    def test_spellings_of_a_value_share_one_bucket(self):
+        jobs = [self.post("Bangalore"), self.post("bangalore "), self.post("  BANGALORE")]
+        bucket = FacetCount.objects.get(facet="location")
+        self.assertEqual((bucket.value, bucket.label, bucket.count), ("bangalore", "Bangalore", 3))
+        selected = facets.selected_facets(QueryDict("location=Bangalore%20"))
+        self.assertEqual(set(facets.filter_jobs(Job.objects.all(), selected)), set(jobs))
+        self.assertEqual(
+            [(row.value, row.count) for row in facets.facet_counts(selected)["location"]],
+            [("bangalore", 3)],
+        )
+
+    def test_counts_after_edits_and_deletes_equal_a_rebuild(self):
+        kochi = self.post("Kochi", company="Acme")
+        pune = self.post("Pune", company="Acme")
+        self.post("kochi", company="Globex", category="Sales")
+        kochi.location, kochi.company = "Pune", "Globex"
+        kochi.save()
+        pune.category = "Design"
+        pune.save()
+        self.post("Chennai").delete()
+        Job.objects.filter(company="Globex", category="Sales").delete()
+
+        incremental = self.counts()
+        self.assertEqual(incremental[("location", "pune")], ("Pune", 2))
+        self.assertNotIn(("location", "kochi"), incremental)
+        facets.rebuild_counts()
+        self.assertEqual(incremental, self.counts())
+
+
+class AdminTests(PortalTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_portal(10)
+        cls.staff = User.objects.create_superuser("admin", "admin@example.com", "pass12345")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.staff)
+
+    def test_counts_are_estimated_or_capped(self):
+        class Paginator(portal_admin.EstimatedCountPaginator):
+            count_limit = 3
+
+        applications = Application.objects.order_by("-id")
+        highest = applications.first().id
+        with self.assertNumQueries(1):
+            self.assertEqual(Paginator(applications, 2).count, highest)
+        self.assertEqual(Paginator(applications.filter(status="pending"), 2).count, 2)
+        self.assertEqual(Paginator(applications.filter(pk=highest), 2).count, 1)
+        self.assertEqual(
+            portal_admin.EstimatedCountPaginator(applications, 2).count, applications.count()
+        )
+
+    def test_status_action_updates_counters(self):
+        job = self.data["popular"]
+        ids = list(job.applications.values_list("id", flat=True))
+        changed = job.applications.exclude(status="accepted").count()
+        response = self.client.post(
+            reverse("admin:Portal_application_changelist"),
+            {"action": "mark_accepted", "_selected_action": ids},
+            follow=True,
+        )
+        self.assertContains(response, f"{changed} applications marked Accepted.")
+        job.refresh_from_db()
+        self.assertEqual(job.accepted_count, len(ids))
+        expected = counters.actual_counts([job.id])[job.id]
+        self.assertEqual({f: getattr(job, f) for f in expected}, expected)
+
+    def test_searches_and_autocomplete(self):
+        response = self.client.get(reverse("admin:Portal_user_changelist"), {"q": "seeker1"})
+        self.assertEqual(
+            {user.username for user in response.context["cl"].result_list},
+            {"seeker1"},
+        )
+        response = self.client.get(
+            reverse("admin:Portal_application_changelist"),
+            {"q": "seek", "status__exact": "pending"},
+        )
+        self.assertTrue(response.context["cl"].result_list)
+        self.assertTrue(all(a.status == "pending" for a in response.context["cl"].result_list))
+
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "Portal",
+                "model_name": "application",
+                "field_name": "job",
+                "term": "developer 3",
+            },
+        )
+        self.assertEqual(
+            [result["text"] for result in response.json()["results"]],
+            ["Python Developer 3 — Company 3"],
+        )
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {"app_label": "Portal", "model_name": "job", "field_name": "employer", "term": "e"},
+        )
+        # limit_choices_to keeps seekers out of the employer widget
+        self.assertEqual([r["text"] for r in response.json()["results"]], ["employer"])
+
+
+class BulkStatusTests(PortalTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_portal(10)
+
+    def test_only_the_employers_applications_change_and_counters_follow(self):
+        job = self.data["popular"]
+        foreign = Application.objects.create(
+            job=Job.objects.exclude(employer=self.data["employer"]).first(),
+            seeker=self.data["seeker"],
+            resume="resumes/seed.pdf",
+        )
+        ids = list(job.applications.values_list("id", flat=True))
+        already = job.applications.filter(status="shortlisted").count()
+
+        self.client.force_login(self.data["employer"])
+        response = self.client.post(
+            reverse("view_applications", args=[job.id]),
+            {"status": "shortlisted", "applications": ids + [foreign.id]},
+            follow=True,
+        )
+        self.assertContains(
+            response, f"{len(ids) - already} applications marked Shortlisted"
+        )
+        self.assertContains(response, f"{already + 1} unchanged or not found")
+        self.assertEqual(job.applications.exclude(status="shortlisted").count(), 0)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.status, "pending")
+
+        job.refresh_from_db()
+        expected = counters.actual_counts([job.id])[job.id]
+        self.assertEqual({f: getattr(job, f) for f in expected}, expected)
+        self.assertEqual(job.shortlisted_count, len(ids))
+
+    def test_invalid_status_changes_nothing(self):
+        job = self.data["popular"]
+        before = list(job.applications.values_list("status", flat=True))
+        self.client.force_login(self.data["employer"])
+        response = self.client.post(
+            reverse("view_applications", args=[job.id]),
+            {"status": "hired", "applications": [self.data["application"].id]},
+            follow=True,
+        )
+        self.assertContains(response, "Invalid status.")
+        self.assertEqual(list(job.applications.values_list("status", flat=True)), before)
+
+
+class ExportTests(PortalTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_portal(10)
+
+    def export(self, kind, fmt, **params):
+        self.client.force_login(self.data["employer"])
+        response = self.client.get(reverse("export_data", args=[kind, fmt]), params)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_applications_csv_is_scoped_to_the_employer(self):
+        foreign = Job.objects.exclude(employer=self.data["employer"]).first()
+        Application.objects.create(
+            job=foreign, seeker=self.data["seeker"], resume="resumes/seed.pdf"
+        )
+        rows = list(csv.DictReader(io.StringIO(self.export("applications", "csv"))))
+        expected = Application.objects.filter(job__employer=self.data["employer"])
+        self.assertEqual(
+            sorted(int(row["application_id"]) for row in rows),
+            sorted(expected.values_list("id", flat=True)),
+        )
+        self.assertEqual(rows[0]["email"], rows[0]["username"] + "@example.com")
+
+    def test_jobs_ndjson_and_formula_cells(self):
+        job = self.data["popular"]
+        Job.objects.filter(pk=job.pk).update(title="=HYPERLINK(1)")
+        lines = self.export("jobs", "ndjson", job=job.id).splitlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record["job_id"], job.id)
+        self.assertEqual(record["applications"], job.applications.count())
+        self.assertIn("'=HYPERLINK(1)", self.export("jobs", "csv", job=job.id))
+
+    def test_other_employers_jobs_are_not_exportable(self):
+        foreign = Job.objects.exclude(employer=self.data["employer"]).first()
+        self.client.force_login(self.data["employer"])
+        response = self.client.get(
+            reverse("export_data", args=["applications", "csv"]), {"job": foreign.id}
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class AsgiTests(PortalTestCase):
+    """The async views and middleware through the ASGI handler."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_portal(10)
+
+    async def test_public_pages_are_cached_for_anonymous_visitors(self):
+        url = reverse("job_list")
+        first = await self.async_client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.context["cards"]), 10)
+        again = await self.async_client.get(url, headers={"if-none-match": first["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    async def test_logged_in_seeker_sees_applied_state(self):
+        seeker = self.data["seeker"]
+        job = await Job.objects.filter(applications__seeker=seeker).afirst()
+        await self.async_client.aforce_login(seeker)
+        response = await self.async_client.get(reverse("job_detail", args=[job.id]))
+        self.assertTrue(response.context["has_applied"])
+        self.assertNotIn("ETag", response)
+        response = await self.async_client.get(reverse("job_list"))
+        self.assertIn(job.id, response.context["applied_jobs"])
+        response = await self.async_client.get(reverse("job_detail", args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_exports_stream_asynchronously(self):
+        employer = self.data["employer"]
+        await self.async_client.aforce_login(employer)
+        response = await self.async_client.get(
+            reverse("export_data", args=["applications", "csv"])
+        )
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        expected = await sync_to_async(list)(exports.application_rows(employer))
+        self.assertEqual(body, "".join(exports.csv_lines(
+            [header for header, _lookup in exports.APPLICATION_COLUMNS], expected
+        )))
+
+
+class ApiTests(PortalTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_portal(30)
+
+    def get(self, name, *args, **params):
+        response = self.client.get(reverse(name, args=["v1", *args]), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_paging_matches_job_list_with_filters_and_search(self):
+        params = {"search": "django", "location": "kochi"}
+        html = self.client.get(reverse("job_list"), params)
+        expected = [card["id"] for card in html.context["cards"]]
+        self.assertGreater(len(expected), 2)
+        ids, url = [], reverse("api_job_list", args=["v1"])
+        page = self.client.get(url, {**params, "limit": 2}).json()
+        while True:
+            ids += [job["id"] for job in page["results"]]
+            if not page["next"]:
+                break
+            page = self.client.get(page["next"]).json()
+        self.assertEqual(ids, expected)
+
+    def test_sparse_fieldsets(self):
+        job = self.data["popular"]
+        detail = self.get("api_job_detail", job.id, fields="title,url").json()
+        self.assertEqual(set(detail), {"id", "title", "url"})
+        self.assertTrue(detail["url"].endswith(reverse("job_detail", args=[job.id])))
+        listed = self.get("api_job_list").json()["results"][0]
+        self.assertNotIn("description", listed)
+        response = self.client.get(reverse("api_job_list", args=["v1"]), {"fields": "secret"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unchanged_data_returns_304_until_a_job_changes(self):
+        job = self.data["popular"]
+        url = reverse("api_job_detail", args=["v1", job.id])
+        etag = self.client.get(url)["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        job.title = "Staff Python Developer"
+        job.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "Staff Python Developer")
+
+    def test_updated_since_feed_and_tombstones(self):
+        before = timezone.now()
+        edited, deleted = Job.objects.all()[:2]
+        edited.title = "Edited"
+        edited.save()
+        deleted_id = deleted.id
+        deleted.delete()
+        feed = self.get("api_job_list", updated_since=before.isoformat()).json()
+        self.assertEqual([job["id"] for job in feed["results"]], [edited.id])
+        tombstones = self.get("api_deleted_jobs", since=before.isoformat()).json()
+        self.assertEqual([row["job_id"] for row in tombstones["results"]], [deleted_id])
+        response = self.client.get(
+            reverse("api_job_list", args=["v1"]), {"updated_since": "yesterday"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class SalaryTests(PortalTestCase):
+    POSTINGS = {
+        "10-12 LPA": (1_000_000, 1_200_000, "INR", "year"),
+        "₹50,000/month": (600_000, 600_000, "INR", "month"),
+        "$120k": (120_000, 120_000, "USD", "year"),
+        "Rs. 3.5 - 4.5 Lakhs p.a.": (350_000, 450_000, "INR", "year"),
+        "$50/hr": (104_000, 104_000, "USD", "hour"),
+        "€60,000 - €70,000 a year": (60_000, 70_000, "EUR", "year"),
+        "Negotiable": (None, None, "", ""),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        employer = User.objects.create_user("hr", password="pass12345", role="employer")
+        cls.jobs = {
+            salary: Job.objects.create(
+                employer=employer, title="Developer", description="Code.", salary=salary,
+                location="Kochi", category="IT", company="Acme",
+            )
+            for salary in cls.POSTINGS
+        }
+
+    def test_common_formats_are_parsed_on_save(self):
+        for salary, expected in self.POSTINGS.items():
+            with self.subTest(salary=salary):
+                job = Job.objects.get(pk=self.jobs[salary].pk)
+                self.assertEqual(
+                    (job.salary_min, job.salary_max, job.salary_currency, job.salary_period),
+                    expected,
+                )
+        for salary, expected in {
+            "15+ LPA": (1_500_000, 1_500_000, "INR", "year"),
+            "10 LPA+": (1_000_000, 1_000_000, "INR", "year"),
+            "$100k+": (100_000, 100_000, "USD", "year"),
+        }.items():
+            with self.subTest(salary=salary):
+                self.assertEqual(tuple(salaries.parse(salary)), expected)
+        job = self.jobs["Negotiable"]
+        job.salary = "15-20 LPA"
+        job.save(update_fields=["salary"])
+        job.refresh_from_db()
+        self.assertEqual((job.salary_min, job.salary_max), (1_500_000, 2_000_000))
+
+    def test_job_list_and_api_filter_and_sort_by_salary(self):
+        ids = {salary: job.id for salary, job in self.jobs.items()}
+        response = self.client.get(
+            reverse("job_list"), {"salary_min": "5 LPA", "salary_max": "11 LPA"}
+        )
+        self.assertEqual(
+            [card["id"] for card in response.context["cards"]],
+            [ids["₹50,000/month"], ids["10-12 LPA"]],
+        )
+        api = reverse("api_job_list", args=["v1"])
+        usd = self.client.get(api, {"currency": "usd", "sort": "salary"}).json()["results"]
+        self.assertEqual([job["id"] for job in usd], [ids["$120k"], ids["$50/hr"]])
+        self.assertEqual(usd[0]["salary_period"], "year")
+        inr = self.client.get(api, {"sort": "salary", "limit": 1}).json()
+        self.assertEqual(inr["results"][0]["id"], ids["10-12 LPA"])
+        self.assertEqual(
+            [job["id"] for job in self.client.get(inr["next"]).json()["results"]],
+            [ids["₹50,000/month"]],
+        )
+        for params in ({"salary_min": "lots"}, {"currency": "XYZ"}, {"sort": "title"}):
+            self.assertEqual(self.client.get(api, params).status_code, 400)
+
+
+class GeoTests(PortalTestCase):
+    # Kochi; Ernakulam ~6 km away; Thrissur ~70 km; Chennai ~560 km
+    LOCATIONS = ["Cochin, Kerala", "Ernakulam", "Thrissur", "Chennai", "Remote"]
+
+    @classmethod
+    def setUpTestData(cls):
+        employer = User.objects.create_user("hr", password="pass12345", role="employer")
+        cls.jobs = {
+            location: Job.objects.create(
+                employer=employer, title="Developer", description="Code.",
+                location=location, category="IT", company="Acme",
+            )
+            for location in cls.LOCATIONS
+        }
+
+    def ids(self, *locations):
+        return [self.jobs[location].id for location in locations]
+
+    def test_locations_resolve_to_geohashed_coordinates(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        kochi = self.jobs["Cochin, Kerala"]
+        self.assertEqual((kochi.latitude, kochi.longitude), (9.9312, 76.2673))
+        self.assertEqual(kochi.geohash, geo.encode(9.9312, 76.2673))
+        self.assertEqual(self.jobs["Remote"].geohash, "")
+
+        remote = Job.objects.get(pk=self.jobs["Remote"].pk)
+        remote.location = "Bangalore"
+        remote.save(update_fields=["location"])
+        remote.refresh_from_db()
+        self.assertEqual(remote.geohash[:5], geo.encode(12.9716, 77.5946, 5))
+
+    def test_covering_cells_contain_every_point_in_the_radius(self):
+        for latitude, longitude, radius in [(9.93, 76.27, 25), (0.01, 179.99, 80), (60, 10, 400)]:
+            cells = geo.covering_cells(latitude, longitude, radius)
+            self.assertLessEqual(len(cells), geo.MAX_CELLS)
+            for bearing in range(0, 360, 15):
+                # A point just inside the circle along each bearing
+                angle = 0.999 * radius / geo.EARTH_RADIUS_KM
+                lat1, lon1, theta = map(math.radians, (latitude, longitude, bearing))
+                lat2 = math.asin(
+                    math.sin(lat1) * math.cos(angle)
+                    + math.cos(lat1) * math.sin(angle) * math.cos(theta)
+                )
+                lon2 = lon1 + math.atan2(
+                    math.sin(theta) * math.sin(angle) * math.cos(lat1),
+                    math.cos(angle) - math.sin(lat1) * math.sin(lat2),
+                )
+                point = geo.encode(math.degrees(lat2), (math.degrees(lon2) + 540) % 360 - 180)
+                self.assertTrue(any(point.startswith(cell) for cell in cells), (bearing, cells))
+
+        self.assertEqual(
+            geo.cell_ranges(["t9wr", "t9y0", "t9y1", "t9y3", "zz"]),
+            [("t9wr", "t9wr~"), ("t9y0", "t9y1~"), ("t9y3", "t9y3~"), ("zz", "zz~")],
+        )
+
+    def test_job_list_and_api_search_by_radius(self):
+        url = reverse("job_list")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"near": "Kochi", "sort": "distance"})
+        self.assertEqual(
+            [card["id"] for card in response.context["cards"]],
+            self.ids("Cochin, Kerala", "Ernakulam"),
+        )
+        listing = next(q["sql"] for q in queries if '"Portal_job"' in q["sql"])
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + listing)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("USING INDEX Portal_job_geohash", plan)
+        self.assertNotIn("SCAN Portal_job", plan)
+
+        api = reverse("api_job_list", args=["v1"])
+        near = {"near": "10.52,76.21", "radius": 100, "sort": "distance", "limit": 2}
+        page = self.client.get(api, near).json()
+        self.assertEqual([job["id"] for job in page["results"]], self.ids("Thrissur", "Ernakulam"))
+        page = self.client.get(page["next"]).json()
+        self.assertEqual([job["id"] for job in page["results"]], self.ids("Cochin, Kerala"))
+        response = self.client.get(api, {"near": "Kochi", "radius": 500, "search": "developer"})
+        self.assertEqual(len(response.json()["results"]), 3)
+        for params in ({"near": "Atlantis"}, {"near": "Kochi", "radius": 0}, {"sort": "distance"}):
+            self.assertEqual(self.client.get(api, params).status_code, 400)
+        response = self.client.get(url, {"near": "Atlantis"})
+        self.assertContains(response, "Unknown place")
+
+
+class SqliteProfileTests(TestCase):
+    def test_production_profile_pragmas(self):
+        with tempfile.TemporaryDirectory() as scratch:
+            handler = ConnectionHandler({
+                "default": {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": os.path.join(scratch, "profile.sqlite3"),
+                    "OPTIONS": settings.SQLITE_PRODUCTION_OPTIONS,
+                }
+            })
+            production = handler["default"]
+            try:
+                with production.cursor() as cursor:
+                    pragmas = {}
+                    for name in ("journal_mode", "synchronous", "busy_timeout"):
+                        cursor.execute(f"PRAGMA {name}")
+                        pragmas[name] = cursor.fetchone()[0]
+                # Opening a transaction, as atomic() does, takes the write
+                # lock up front, before anything has been written
+                production.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+                other = sqlite3.connect(production.settings_dict["NAME"], timeout=0)
+                with self.assertRaisesMessage(sqlite3.OperationalError, "locked"):
+                    other.execute("BEGIN IMMEDIATE")
+                other.close()
+                production.rollback()
+            finally:
+                production.close()
+        self.assertEqual(pragmas, {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 10000})
+
+
+class RecommendationTests(PortalTestCase):
+    POSTINGS = [
+        ("Python Django Developer", "IT", "Build Django REST APIs in Python with PostgreSQL."),
+        ("Senior Python Engineer", "IT", "Python services, Django, Celery and PostgreSQL."),
+        ("Backend Developer", "IT", "Django and Python microservices, REST APIs."),
+        ("Data Analyst", "Finance", "SQL reporting, Excel dashboards and forecasting."),
+        ("Financial Analyst", "Finance", "Excel models, forecasting and SQL reporting."),
+        ("Sales Executive", "Sales", "Field sales, lead generation and client meetings."),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user("hr", password="pass12345", role="employer")
+        cls.seeker = User.objects.create_user("dev", password="pass12345", role="seeker")
+        cls.jobs = [
+            Job.objects.create(
+                employer=cls.employer, title=title, category=category,
+                description=description, location="Kochi", company="Acme",
+            )
+            for title, category, description in cls.POSTINGS
+        ]
+        Application.objects.create(job=cls.jobs[0], seeker=cls.seeker, resume="resumes/cv.pdf")
+
+    def setUp(self):
+        super().setUp()
+        index = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index)
+        directory = override_settings(RECOMMENDATIONS_DIR=index)
+        directory.enable()
+        self.addCleanup(directory.disable)
+
+    def recommend(self):
+        return recommendations.recommend([self.jobs[0].id], limit=3)
+
+    def test_similar_jobs_come_first_and_applied_ones_are_excluded(self):
+        self.assertEqual(self.recommend(), [])  # nothing built yet
+        self.assertEqual(recommendations.build(), len(self.POSTINGS))
+        recommended = self.recommend()
+        self.assertEqual(set(recommended[:2]), {self.jobs[1].id, self.jobs[2].id})
+        self.assertNotIn(self.jobs[0].id, recommended)
+        self.assertEqual(recommendations.recommend([]), [])
+
+        self.client.force_login(self.seeker)
+        response = self.client.get(reverse("dashboard"))
+        self.assertContains(response, "Recommended for you")
+        self.assertEqual(response.context["recommended"][0].id, recommended[0])
+
+    def test_posted_edited_and_deleted_jobs_are_picked_up_without_a_rebuild(self):
+        recommendations.build()
+        posted = Job.objects.create(
+            employer=self.employer, title="Django Python Developer", category="IT",
+            description="Python and Django REST APIs with PostgreSQL.",
+            location="Kochi", company="Newco",
+        )
+        self.assertEqual(self.recommend()[0], posted.id)
+
+        edited = self.jobs[1]
+        edited.title, edited.category, edited.description = "Store Manager", "Retail", "Retail shifts."
+        edited.save()
+        self.assertNotIn(edited.id, self.recommend())
+
+        posted.delete()
+        self.jobs[2].delete()
+        self.assertFalse({posted.id, self.jobs[2].id} & set(self.recommend()))
+
+
+class RankingTests(PortalTestCase):
+    LETTERS = [
+        "I run field sales teams and sell insurance.",
+        "Five years building Django REST APIs in Python on PostgreSQL.",
+        "Some Python scripting for monthly reports.",
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = User.objects.create_user("hr", password="pass12345", role="employer")
+        cls.job = Job.objects.create(
+            employer=cls.employer, title="Python Django Developer", category="IT",
+            description="Build Django REST APIs in Python with PostgreSQL.",
+            location="Kochi", company="Acme",
+        )
+        cls.applications = [
+            Application.objects.create(
+                job=cls.job, seeker=User.objects.create_user(f"applicant{i}", role="seeker"),
+                cover_letter=letter, resume="resumes/cv.pdf",
+            )
+            for i, letter in enumerate(cls.LETTERS)
+        ]
+
+    def ranked(self, **params):
+        self.client.force_login(self.employer)
+        response = self.client.get(
+            reverse("view_applications", args=[self.job.id]), {"sort": "relevance", **params}
+        )
+        return [application.id for application in response.context["applications"]]
+
+    def scores(self):
+        return dict(self.job.applications.values_list("id", "relevance"))
+
+    def test_best_matches_come_first_and_scores_are_kept(self):
+        best, worst = self.applications[1].id, self.applications[0].id
+        self.assertEqual(ranking.score_pending(), len(self.LETTERS))
+        self.assertEqual(self.ranked(), [best, self.applications[2].id, worst])
+        self.assertEqual(self.scores()[worst], 0)
+        self.assertEqual(ranking.score_pending(), 0)
+        self.assertEqual(self.ranked(status="pending"), [best, self.applications[2].id, worst])
+
+    def test_ranked_view_only_reads_and_lists_unscored_applicants_last(self):
+        ranking.score_pending()
+        late = Application.objects.create(
+            job=self.job, seeker=User.objects.create_user("late", role="seeker"),
+            cover_letter="Django REST APIs in Python on PostgreSQL.", resume="resumes/cv.pdf",
+        )
+        self.assertTrue(PendingRanking.objects.filter(job=self.job).exists())
+        self.client.force_login(self.employer)
+        url = reverse("view_applications", args=[self.job.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"sort": "relevance"})
+        self.assertEqual(
+            [q["sql"] for q in queries.captured_queries if not q["sql"].startswith("SELECT")], []
+        )
+        self.assertEqual(response.context["applications"].object_list[-1], late)
+        self.assertIsNone(Application.objects.get(pk=late.pk).relevance)
+
+        call_command("score_applicants", stdout=io.StringIO())
+        self.assertFalse(PendingRanking.objects.exists())
+        self.assertEqual(self.ranked()[0], late.id)
+
+    def test_only_edited_text_is_rescored(self):
+        ranking.score_pending()
+        application = Application.objects.get(pk=self.applications[0].pk)
+        application.status = "reviewed"
+        application.save()
+        self.assertNotIn(None, self.scores().values())
+
+        self.assertFalse(PendingRanking.objects.exists())
+
+        application.cover_letter = "Django and PostgreSQL REST APIs in Python."
+        application.save()
+        self.assertEqual(ranking.score_pending(), 1)
+        self.assertEqual(self.ranked()[0], application.id)
+
+        job = Job.objects.get(pk=self.job.pk)
+        job.salary = "12 LPA"
+        job.save()
+        self.assertEqual(ranking.score_pending(), 0)
+        job.description = "Field sales and insurance."
+        job.save()
+        self.assertEqual(set(self.scores().values()), {None})
+        self.assertEqual(ranking.score_pending(), len(self.LETTERS))
+
+
+class ResumeTestCase(PortalTestCase):
+    """Runs against a throwaway MEDIA_ROOT."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_portal(10)
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def apply(self, user, job, content=b"%PDF-1.4 same resume", name="cv.pdf"):
+        self.client.force_login(user)
+        return self.client.post(
+            reverse("apply_job", args=[job.id]),
+            {"cover_letter": "Hi", "resume": SimpleUploadedFile(name, content)},
+        )
+
+
+class ImportTests(ResumeTestCase):
+    def upload(self, name, content, **extra):
+        self.client.force_login(self.data["employer"])
+        response = self.client.post(
+            reverse("import_jobs"),
+            {"file": SimpleUploadedFile(name, content.encode()), **extra},
+        )
+        job_import = JobImport.objects.latest("id")
+        self.assertRedirects(response, reverse("job_import", args=[job_import.id]))
+        return job_import
+
+    def report(self, job_import):
+        response = self.client.get(reverse("job_import", args=[job_import.id]))
+        return response.context["job_import"]
+
+    def csv_file(self, rows):
+        lines = ["title,company,location,category,salary,description"]
+        lines += [
+            f"Rust Engineer {i},Ferrous,Kochi,IT,20 LPA,Write rust services {i}"
+            for i in range(rows)
+        ]
+        return "\n".join(lines) + "\n"
+
+    def test_valid_rows_are_imported_and_bad_rows_reported(self):
+        content = self.csv_file(3) + ",Ferrous,Kochi,IT,,Missing title\n"
+        job_import = self.upload("jobs.csv", content)
+        # The upload only queues the file
+        self.assertEqual(self.report(job_import).status, JobImport.PENDING)
+        self.assertFalse(Job.objects.filter(company="Ferrous").exists())
+
+        self.assertEqual(imports.run(), 1)
+        report = self.report(job_import)
+        self.assertEqual((report.status, report.percent), (JobImport.DONE, 100))
+        self.assertEqual((report.created, report.failed, report.line), (3, 1, 5))
+        self.assertEqual(report.errors[0][0], 5)
+        self.assertIn("title", report.errors[0][1])
+        self.assertFalse(report.file)
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, job_import.file.name)))
+
+        jobs = Job.objects.filter(company="Ferrous")
+        self.assertEqual(jobs.count(), 3)
+        self.assertEqual(set(jobs.values_list("employer", flat=True)), {self.data["employer"].id})
+        self.assertEqual(search.search_jobs(Job.objects.all(), "rust").count(), 3)
+        counts = FacetCount.objects.get(facet="company", value="ferrous")
+        self.assertEqual((counts.label, counts.count), ("Ferrous", 3))
+        response = self.client.get(reverse("job_list"), {"search": "rust"})
+        self.assertEqual(len(response.context["cards"]), 3)
+
+    def test_ndjson_lines_are_parsed(self):
+        rows = [
+            {"title": "Chef", "company": "Bistro", "location": "Pune",
+             "category": "Food", "salary": 1, "description": "Cook"},
+            ["not", "an", "object"],
+        ]
+        content = "\n".join(json.dumps(row) for row in rows) + "\n{broken\n"
+        job_import = self.upload("jobs.ndjson", content)
+        imports.run()
+        report = self.report(job_import)
+        self.assertEqual(report.created, 1)
+        self.assertEqual([line for line, _errors in report.errors], [2, 3])
+        self.assertEqual(Job.objects.get(company="Bistro").salary, "1")
+
+    def test_a_restarted_import_resumes_after_the_last_saved_batch(self):
+        job_import = self.upload("jobs.csv", self.csv_file(5))
+        imports.claim()
+        # The worker died after committing the batch that ended on line 3
+        JobImport.objects.filter(pk=job_import.pk).update(
+            line=3, created=2, updated_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(imports.run(), 0)
+        self.assertEqual(imports.requeue_stale(), 1)
+        self.assertEqual(imports.run(batch_size=2), 1)
+        report = self.report(job_import)
+        self.assertEqual((report.status, report.created, report.line), (JobImport.DONE, 5, 6))
+        self.assertEqual(
+            sorted(Job.objects.filter(company="Ferrous").values_list("title", flat=True)),
+            ["Rust Engineer 2", "Rust Engineer 3", "Rust Engineer 4"],
+        )
+
+    def test_a_failed_import_is_reported(self):
+        job_import = self.upload("jobs.csv", self.csv_file(1))
+        job_import.file.delete(save=False)
+        imports.run()
+        report = self.report(job_import)
+        self.assertEqual(report.status, JobImport.FAILED)
+        self.assertTrue(report.error)
+        self.assertContains(
+            self.client.get(reverse("job_import", args=[job_import.id])), "The import stopped"
+        )
+
+    def test_recent_imports_are_listed(self):
+        job_import = self.upload("jobs.csv", self.csv_file(1))
+        response = self.client.get(reverse("import_jobs"))
+        self.assertEqual(list(response.context["imports"]), [job_import])
+        self.assertContains(response, reverse("job_import", args=[job_import.id]))
+        self.client.force_login(User.objects.create_user("other_employer", role="employer"))
+        response = self.client.get(reverse("job_import", args=[job_import.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_queries_grow_per_batch_not_per_row(self):
+        self.upload("jobs.csv", self.csv_file(1))
+        imports.run()
+        self.upload("jobs.csv", self.csv_file(2))
+        with CaptureQueriesContext(connection) as small:
+            imports.run()
+        # Still one INSERT statement under SQLite's 999 bound parameters
+        self.upload("jobs.csv", self.csv_file(30))
+        with CaptureQueriesContext(connection) as large:
+            imports.run()
+        self.assertEqual(Job.objects.filter(company="Ferrous").count(), 33)
+        self.assertEqual(len(small), len(large))
+
+
+class ResumeStorageTests(ResumeTestCase):
+    def test_identical_uploads_share_one_blob(self):
+        seeker = self.data["seeker"]
+        jobs = list(Job.objects.exclude(applications__seeker=seeker)[:2])
+        for job in jobs:
+            self.assertRedirects(self.apply(seeker, job), reverse("dashboard"))
+        first, second = Application.objects.filter(seeker=seeker, job__in=jobs)
+        self.assertEqual(first.resume.name, second.resume.name)
+        self.assertTrue(first.resume.name.startswith(storage.BLOB_PREFIX))
+        self.assertEqual(first.resume_name, "cv.pdf")
+        self.assertEqual(len(list(storage.resume_storage().iter_blobs())), 1)
+
+    def test_unreferenced_blobs_are_collected(self):
+        resumes = storage.resume_storage()
+        kept = resumes.save("a.pdf", ContentFile(b"kept"))
+        orphan = resumes.save("b.pdf", ContentFile(b"orphan"))
+        Application.objects.filter(pk=self.data["application"].pk).update(resume=kept)
+        self.assertEqual(storage.collect_garbage(grace_seconds=3600), [])
+        self.assertEqual(storage.collect_garbage(grace_seconds=-1), [orphan])
+        self.assertTrue(resumes.exists(kept))
+        self.assertFalse(resumes.exists(orphan))
+
+    def test_deleting_the_last_application_removes_its_blob(self):
+        resumes = storage.resume_storage()
+        name = resumes.save("c.pdf", ContentFile(b"only one"))
+        old = os.path.getmtime(resumes.path(name)) - 7200
+        os.utime(resumes.path(name), (old, old))
+        application = self.data["application"]
+        Application.objects.filter(pk=application.pk).update(resume=name)
+        with self.captureOnCommitCallbacks(execute=True):
+            Application.objects.get(pk=application.pk).delete()
+        self.assertFalse(resumes.exists(name))
+
+    def test_deleting_a_job_collects_its_resumes_once(self):
+        resumes = storage.resume_storage()
+        job = self.data["popular"]
+        names = []
+        for application in job.applications.all()[:3]:
+            name = resumes.save("d.pdf", ContentFile(f"resume {application.pk}".encode()))
+            old = os.path.getmtime(resumes.path(name)) - 7200
+            os.utime(resumes.path(name), (old, old))
+            Application.objects.filter(pk=application.pk).update(resume=name)
+            names.append(name)
+        # One blob is shared with an application to another job
+        elsewhere = Application.objects.exclude(job=job).first()
+        Application.objects.filter(pk=elsewhere.pk).update(resume=names[0])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            job.delete()
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(resumes.exists(names[0]))
+        self.assertFalse(any(resumes.exists(name) for name in names[1:]))
+
+
+class ResumeDownloadTests(ResumeTestCase):
+    content = b"%PDF-1.4 " + b"resume bytes " * 10
+
+    def setUp(self):
+        super().setUp()
+        seeker = self.data["seeker"]
+        job = Job.objects.exclude(applications__seeker=seeker).first()
+        self.apply(seeker, job, self.content)
+        self.application = Application.objects.get(job=job, seeker=seeker)
+        self.url = reverse("download_resume", args=[self.application.id])
+        self.employer = job.employer
+
+    def test_only_the_employer_and_the_applicant_can_download(self):
+        for user in (self.employer, self.data["seeker"]):
+            self.client.force_login(user)
+            response = self.client.get(self.url)
+            self.assertEqual(b"".join(response.streaming_content), self.content)
+            self.assertEqual(response["Content-Type"], "application/pdf")
+            self.assertEqual(response["Content-Disposition"], 'inline; filename="cv.pdf"')
+            self.assertIn("private", response["Cache-Control"])
+        response = self.client.get(self.url, {"download": ""})
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="cv.pdf"')
+
+        other_employer = User.objects.get(username="other")
+        if other_employer == self.employer:
+            other_employer = User.objects.get(username="employer")
+        for user in (other_employer, User.objects.get(username="seeker1")):
+            self.client.force_login(user)
+            self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_ranges_resume_and_repeat_downloads_are_not_modified(self):
+        self.client.force_login(self.employer)
+        size = len(self.content)
+        etag = self.client.get(self.url)["ETag"]
+        self.assertIn(self.application.resume.name.split("/")[-1].split(".")[0], etag)
+
+        response = self.client.get(self.url, headers={"Range": "bytes=100-", "If-Range": etag})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 100-{size - 1}/{size}")
+        self.assertEqual(b"".join(response.streaming_content), self.content[100:])
+        response = self.client.get(self.url, headers={"Range": "bytes=2-5"})
+        self.assertEqual(response["Content-Length"], "4")
+        self.assertEqual(b"".join(response.streaming_content), self.content[2:6])
+        response = self.client.get(self.url, headers={"Range": "bytes=-3"})
+        self.assertEqual(b"".join(response.streaming_content), self.content[-3:])
+
+        response = self.client.get(self.url, headers={"Range": f"bytes={size}-"})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{size}")
+        # A different file behind If-Range restarts the download from the top
+        response = self.client.get(self.url, headers={"Range": "bytes=100-", "If-Range": '"x"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_front_server_sends_the_file(self):
+        self.client.force_login(self.employer)
+        name = self.application.resume.name
+        with self.settings(SENDFILE_BACKEND="x-accel-redirect"):
+            response = self.client.get(self.url)
+            self.assertEqual(response["X-Accel-Redirect"], f"{settings.SENDFILE_URL}{name}")
+            self.assertEqual(response.content, b"")
+            self.assertEqual(response["Content-Type"], "application/pdf")
+            etag = response["ETag"]
+            response = self.client.get(self.url, headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 304)
+        with self.settings(SENDFILE_BACKEND="x-sendfile"):
+            response = self.client.get(self.url)
+            self.assertEqual(response["X-Sendfile"], storage.resume_storage().path(name))
+
+
+def make_pdf(text):
+    stream = zlib.compress(f"BT /F1 12 Tf ({text}) Tj ET".encode())
+    return (
+        b"%%PDF-1.4\n4 0 obj<</Length %d/Filter/FlateDecode>>stream\n" % len(stream)
+        + stream
+        + b"\nendstream\nendobj\n%%EOF\n"
+    )
+
+
+def make_docx(*paragraphs):
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr(
+            "word/document.xml",
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/'
+            f'wordprocessingml/2006/main"><w:body>{body}</w:body></w:document>',
+        )
+    return buffer.getvalue()
+
+
+class ResumeExtractionTests(ResumeTestCase):
+    def extract(self, name, content):
+        blobs = storage.resume_storage()
+        return resumes.extract_text(blobs.path(blobs.save(name, ContentFile(content))))
+
+    def test_pdf_and_docx_text_is_extracted(self):
+        self.assertEqual(
+            self.extract("cv.pdf", make_pdf(r"Kubernetes \(CKA\) engineer")),
+            ("Kubernetes (CKA) engineer", ""),
+        )
+        self.assertEqual(
+            self.extract("cv.docx", make_docx("Jane Doe", "Terraform")),
+            ("Jane Doe Terraform", ""),
+        )
+        text, error = self.extract("cv.txt", b"plain")
+        self.assertEqual(text, "")
+        self.assertIn("Unsupported", error)
+
+    def test_worker_makes_applicants_searchable(self):
+        seeker, employer = self.data["seeker"], self.data["employer"]
+        job = Job.objects.filter(employer=employer).exclude(applications__seeker=seeker).first()
+        self.apply(seeker, job, make_pdf("Kubernetes and Terraform"))
+        application = Application.objects.get(seeker=seeker, job=job)
+        self.assertEqual(application.extraction.status, ResumeExtraction.PENDING)
+
+        self.assertEqual(resumes.run(workers=1), ResumeExtraction.objects.count())
+        application.extraction.refresh_from_db()
+        self.assertEqual(application.extraction.status, ResumeExtraction.DONE)
+        self.assertEqual(application.extraction.text, "Kubernetes and Terraform")
+
+        self.client.force_login(employer)
+        url = reverse("view_applications", args=[job.id])
+        response = self.client.get(url, {"q": "terraform"})
+        self.assertEqual(list(response.context["applications"]), [application])
+        self.assertContains(response, "<mark>Terraform</mark>")
+        # Extracted resume text is ranked too
+        response = self.client.get(url, {"q": "terraform", "sort": "relevance"})
+        self.assertEqual(list(response.context["applications"]), [application])
+        response = self.client.get(url, {"q": "cobol"})
+        self.assertEqual(list(response.context["applications"]), [])
+
+    def test_batches_run_a_fixed_number_of_queries(self):
+        name = storage.resume_storage().save("cv.pdf", ContentFile(make_pdf("Kubernetes")))
+        jobs = list(Job.objects.all())
+        seekers = User.objects.bulk_create(
+            User(username=f"applicant{i}", role="seeker") for i in range(22)
+        )
+        applications = Application.objects.bulk_create(
+            Application(job=jobs[i % len(jobs)], seeker=seeker, resume=name)
+            for i, seeker in enumerate(seekers)
+        )
+        ResumeExtraction.objects.all().delete()
+        resumes.queue(application.pk for application in applications)
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            with CaptureQueriesContext(connection) as small:
+                self.assertEqual(resumes.process_batch(executor, batch_size=2), 2)
+            with CaptureQueriesContext(connection) as large:
+                self.assertEqual(resumes.process_batch(executor, batch_size=20), 20)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(
+            ResumeExtraction.objects.filter(status=ResumeExtraction.DONE).count(), 22
+        )
+
+    def test_unreadable_resumes_fail_after_retries(self):
+        application = self.data["application"]
+        name = storage.resume_storage().save("cv.rtf", ContentFile(b"{\\rtf1}"))
+        Application.objects.filter(pk=application.pk).update(resume=name)
+        resumes.queue([application.pk])
+        extraction = ResumeExtraction.objects.filter(pk=application.pk)
+        for attempt in range(1, resumes.MAX_ATTEMPTS):
+            resumes.run(workers=1)
+            self.assertEqual(extraction.get().status, ResumeExtraction.PENDING)
+            self.assertEqual(resumes.run(workers=1), 0)  # backing off
+            extraction.update(queued_at=timezone.now())
+        resumes.run(workers=1)
+        extraction = extraction.get()
+        self.assertEqual(extraction.status, ResumeExtraction.FAILED)
+        self.assertEqual(extraction.attempts, resumes.MAX_ATTEMPTS)
+
+
+class RecordingEmailBackend(locmem.EmailBackend):
+    """In-memory backend that counts connections and refuses some recipients."""
+
+    opened = 0
+    refused = set()
+
+    def open(self):
+        RecordingEmailBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.refused & set(message.to):
+                raise smtplib.SMTPRecipientsRefused(
+                    {address: (450, b"busy") for address in message.to}
+                )
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND="Portal.tests.RecordingEmailBackend")
+class NotificationTests(ResumeTestCase):
+    def setUp(self):
+        super().setUp()
+        RecordingEmailBackend.opened = 0
+        RecordingEmailBackend.refused = set()
+
+    def events(self, **filters):
+        return list(OutboxEvent.objects.filter(**filters).order_by("id"))
+
+    def test_changes_write_events_in_their_transaction_without_mailing(self):
+        employer, seeker = self.data["employer"], self.data["seeker"]
+        job = self.data["unapplied"]
+        self.apply(seeker, job)
+        application = Application.objects.get(job=job, seeker=seeker)
+        [applied] = self.events()
+        self.assertEqual(
+            (applied.kind, applied.recipient_id, applied.application_id),
+            (OutboxEvent.APPLIED, job.employer_id, application.id),
+        )
+        self.assertEqual(applied.payload["seeker"], "seeker")
+
+        self.client.force_login(employer)
+        for status in ("shortlisted", "pending"):
+            self.client.get(reverse("update_application_status", args=[application.id, status]))
+        changed = self.events(kind=OutboxEvent.STATUS_CHANGED)
+        self.assertEqual(
+            [(e.recipient_id, e.payload["status"]) for e in changed], [(seeker.id, "shortlisted")]
+        )
+
+        popular = self.data["popular"]
+        ids = list(popular.applications.values_list("id", flat=True))
+        moving = popular.applications.exclude(status="rejected").count()
+        self.client.post(
+            reverse("view_applications", args=[popular.id]),
+            {"status": "rejected", "applications": ids},
+        )
+        self.assertEqual(len(self.events(payload__status="rejected")), moving)
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            application.status = "accepted"
+            application.save()
+            raise RuntimeError("rolled back")
+        self.assertFalse(self.events(payload__status="accepted"))
+        self.assertEqual(mail.outbox, [])
+
+    def test_one_digest_per_recipient_over_one_connection(self):
+        employer, seeker = self.data["employer"], self.data["seeker"]
+        unapplied = Job.objects.filter(employer=employer).exclude(applications__seeker=seeker)
+        jobs = list(unapplied[:2])
+        for job in jobs:
+            self.apply(seeker, job)
+        counters.change_status(Application.objects.filter(job__in=jobs), "reviewed")
+
+        self.assertEqual(notifications.run(), 4)
+        self.assertEqual(RecordingEmailBackend.opened, 1)
+        messages = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(set(messages), {employer.email, seeker.email})
+        self.assertEqual(messages[employer.email].subject, "2 new applicants")
+        self.assertEqual(messages[seeker.email].subject, "2 updates on your applications")
+        for job in jobs:
+            self.assertIn(f"seeker applied for {job.title}", messages[employer.email].body)
+            self.assertIn(f"{job.title} at {job.company}: Reviewed", messages[seeker.email].body)
+        self.assertEqual(len(self.events(status=OutboxEvent.SENT)), 4)
+        self.assertEqual(notifications.run(), 0)
+
+    def test_failed_digests_back_off_then_give_up(self):
+        employer, seeker = self.data["employer"], self.data["seeker"]
+        self.apply(seeker, self.data["unapplied"])
+        application = Application.objects.get(job=self.data["unapplied"], seeker=seeker)
+        counters.change_status(Application.objects.filter(pk=application.pk), "accepted")
+        RecordingEmailBackend.refused = {seeker.email}
+
+        self.assertEqual(notifications.run(), 2)
+        [sent] = self.events(status=OutboxEvent.SENT)
+        self.assertEqual(sent.recipient_id, employer.id)
+        [retry] = self.events(status=OutboxEvent.PENDING)
+        self.assertEqual(retry.attempts, 1)
+        self.assertIn("SMTPRecipientsRefused", retry.error)
+        self.assertGreater(retry.queued_at, timezone.now())
+        # Not due yet
+        self.assertEqual(notifications.run(), 0)
+
+        for attempt in range(2, notifications.MAX_ATTEMPTS + 1):
+            OutboxEvent.objects.filter(pk=retry.pk).update(queued_at=timezone.now())
+            self.assertEqual(notifications.run(), 1)
+        retry.refresh_from_db()
+        self.assertEqual(
+            (retry.status, retry.attempts), (OutboxEvent.FAILED, notifications.MAX_ATTEMPTS)
+        )
+
+        User.objects.filter(pk=employer.pk).update(email="")
+        unapplied = Job.objects.filter(employer=employer).exclude(applications__seeker=seeker)
+        self.apply(seeker, unapplied.first())
+        self.assertEqual(notifications.run(), 1)
+        self.assertEqual(
+            self.events(status=OutboxEvent.FAILED)[-1].error, "Recipient has no email address"
+        )
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class AlertTests(PortalTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_portal(10)
+
+    def save(self, user, query, name=""):
+        self.client.force_login(user)
+        return self.client.post(reverse("save_search"), {"query": query, "name": name})
+
+    def post_job(self, **fields):
+        self.client.force_login(self.data["employer"])
+        job = {
+            "title": "Rust Engineer", "company": "Ferrous", "location": "Kochi",
+            "category": "IT", "salary": "20 LPA", "description": "Systems work.", **fields,
+        }
+        self.client.post(reverse("post_job"), job)
+        return Job.objects.get(title=job["title"], location=job["location"])
+
+    def alerts(self, user):
+        return list(
+            OutboxEvent.objects.filter(kind=OutboxEvent.JOB_ALERT, recipient=user)
+            .order_by("id")
+            .values_list("payload__job", flat=True)
+        )
+
+    def test_new_jobs_alert_matching_saved_searches_once(self):
+        seeker, other = self.data["seeker"], User.objects.get(username="seeker1")
+        self.client.force_login(seeker)
+        page = self.client.get(reverse("job_list"), {"search": "rust"})
+        self.assertContains(page, reverse("save_search"))
+        response = self.save(seeker, "search=rust+engi*&location=Kochi&cursor=abc", "Rust, Kochi")
+        self.assertRedirects(
+            response, reverse("job_list") + "?search=rust+engi*&location=Kochi&cursor=abc",
+            fetch_redirect_response=False,
+        )
+        self.save(seeker, "search=rust")
+        self.save(other, "category=Design&salary_min=15+LPA")
+        saved = seeker.saved_searches.get(name="Rust, Kochi")
+        self.assertEqual(saved.query, "search=rust+engi%2A&location=Kochi")
+        self.assertEqual(seeker.saved_searches.get(search="rust").name, "rust")
+
+        self.post_job(title="Senior Rust Engineer")
+        self.post_job(title="Rust Developer", location="Pune")
+        self.post_job(title="Brand Designer", category="Design")
+        self.post_job(title="Junior Designer", category="Design", salary="5 LPA")
+        job = Job.objects.get(title="Senior Rust Engineer")
+        job.description = "Rust, again."
+        job.save()
+
+        self.assertEqual(self.alerts(seeker), ["Senior Rust Engineer", "Rust Developer"])
+        self.assertEqual(self.alerts(other), ["Brand Designer"])
+        with self.settings(SITE_URL="https://jobs.example.com/"):
+            self.assertEqual(notifications.run(), 3)
+        message = next(m for m in mail.outbox if m.to == [seeker.email])
+        self.assertEqual(message.subject, "2 new jobs for your saved searches")
+        self.assertIn(
+            f"Senior Rust Engineer at Ferrous, Kochi https://jobs.example.com/jobs/{job.id}/",
+            message.body,
+        )
+        self.assertIn("https://jobs.example.com/dashboard/", message.body)
+
+        self.client.force_login(seeker)
+        self.assertContains(self.client.get(reverse("dashboard")), "Rust, Kochi")
+        self.client.force_login(other)
+        delete = reverse("delete_saved_search", args=[saved.id])
+        self.assertEqual(self.client.post(delete).status_code, 404)
+        self.client.force_login(seeker)
+        self.client.post(delete)
+        self.assertFalse(SavedSearch.objects.filter(pk=saved.pk).exists())
+
+    def test_searches_without_conditions_or_over_the_limit_are_refused(self):
+        seeker = self.data["seeker"]
+        for query in ("", "search=%21%21", "near=Kochi", "salary_min=lots"):
+            self.save(seeker, query)
+        self.assertFalse(seeker.saved_searches.exists())
+        for i in range(alerts.MAX_SAVED_SEARCHES + 1):
+            self.save(seeker, f"search=python+{i}")
+        self.assertEqual(seeker.saved_searches.count(), alerts.MAX_SAVED_SEARCHES)
+
+    def test_searches_are_filed_under_their_rarest_condition(self):
+        def keys(query):
+            saved = alerts.save_search(self.data["seeker"], QueryDict(query))
+            return sorted(saved.keys.values_list("key", flat=True))
+
+        # Every seeded job is a "Python Developer" in one of five cities
+        self.assertEqual(keys("search=python+ferrous&location=Kochi"), ["w:ferrous"])
+        self.assertEqual(keys("search=python&location=Kochi&location=Pune"),
+                         ["location:kochi", "location:pune"])
+        self.assertEqual(keys("search=Pythön"), ["w:python"])
+        self.assertEqual(keys("search=devel*"), ["p:dev"])
+        self.assertEqual(keys("search=dev*&currency=USD"), ["salary:USD"])
+        self.assertEqual(keys("search=d*"), [alerts.ANY_KEY])
+
+    def test_matching_agrees_with_the_listing(self):
+        self.post_job(title="Développeur Rust", description="Tokio & async_std, no C++.")
+        self.post_job(title="Data Scientist", salary="$150k", location="Pune")
+        queries = [
+            "search=python", "search=developer+3", "search=%22python+developer%22",
+            "search=%22developer+python%22", "search=dev*", "search=developpeur",
+            "search=async", "search=std+c", "search=serv*&location=kochi",
+            "category=it&category=design", "salary_min=11+LPA&salary_max=11.5+LPA",
+            "currency=USD", "salary_max=15+LPA&company=company+3",
+        ]
+        jobs = list(Job.objects.all())
+        for query in queries:
+            params = QueryDict(query)
+            text, selected, salary = alerts.conditions(params)
+            listed = facets.filter_jobs(search.search_jobs(Job.objects.all(), text), selected)
+            if salary:
+                listed = salaries.filter_jobs(listed, salary)
+            currency, low, high = salary or ("", None, None)
+            saved = SavedSearch(
+                search=text, facets=selected, salary_currency=currency,
+                salary_min=low, salary_max=high,
+            )
+            terms = search.query_terms(text)
+            matched = {
+                job.pk for job in jobs
+                if alerts.matches(saved, terms, job, [
+                    search.tokenize(getattr(job, field)) for field in search.INDEXED_FIELDS
+                ])
+            }
+            with self.subTest(query=query):
+                self.assertEqual(matched, set(listed.values_list("pk", flat=True)))
+
+    def test_imports_match_in_a_fixed_number_of_queries(self):
+        self.save(self.data["seeker"], "search=rust")
+        self.save(User.objects.get(username="seeker1"), "location=kochi")
+
+        def upload(rows):
+            lines = ["title,company,location,category,salary,description"]
+            lines += [f"Rust Engineer {i},Ferrous,Kochi,IT,20 LPA,Rust {i}" for i in range(rows)]
+            content = io.BytesIO(("\n".join(lines) + "\n").encode())
+            with CaptureQueriesContext(connection) as queries:
+                imports.import_jobs(self.data["employer"], imports.read_rows(content, "csv"))
+            return len(queries)
+
+        self.assertEqual(upload(2), upload(30))
+        self.assertEqual(OutboxEvent.objects.filter(kind=OutboxEvent.JOB_ALERT).count(), 64)
+
+
+class AnalyticsTests(ResumeTestCase):
+    def rollups(self, **filters):
+        return {
+            (row.job_id, row.day, row.status): (row.applications, row.reviewed)
+            for row in DailyApplicationCount.objects.filter(applications__gt=0, **filters)
+        }
+
+    def test_rollups_follow_every_write_and_reconcile_repairs_them(self):
+        employer, seeker, job = self.data["employer"], self.data["seeker"], self.data["unapplied"]
+        today = timezone.localdate()
+        self.apply(seeker, job)
+        self.assertEqual(self.rollups(job=job), {(job.id, today, "pending"): (1, 0)})
+
+        application = Application.objects.get(job=job, seeker=seeker)
+        self.client.force_login(employer)
+        self.client.get(reverse("update_application_status", args=[application.id, "reviewed"]))
+        application.refresh_from_db()
+        first_review = application.reviewed_at
+        self.assertIsNotNone(first_review)
+        self.assertEqual(self.rollups(job=job), {(job.id, today, "reviewed"): (1, 1)})
+
+        popular = self.data["popular"]
+        pending = list(popular.applications.filter(status="pending").values_list("id", flat=True))
+        counters.change_status(Application.objects.filter(job__in=[job, popular]), "shortlisted")
+        application.refresh_from_db()
+        self.assertEqual(application.reviewed_at, first_review)
+        self.assertFalse(Application.objects.filter(pk__in=pending, reviewed_at=None).exists())
+        moved_back = list(popular.applications.values_list("id", flat=True)[:2])
+        counters.change_status(Application.objects.filter(pk__in=moved_back), "pending")
+        popular.applications.first().delete()
+        self.assertEqual(analytics.reconcile(), 0)
+
+        expected = self.rollups()
+        DailyApplicationCount.objects.filter(job=popular).update(applications=F("applications") + 5)
+        DailyApplicationCount.objects.filter(job=job).delete()
+        self.assertEqual(analytics.reconcile(), 2)
+        self.assertEqual(self.rollups(), expected)
+
+    def test_seeded_rollups_and_extraction_queue_are_complete(self):
+        call_command(
+            "seed_portal", seekers=20, employers=3, jobs=30, applications=200,
+            resume_files=2, batch_size=50, stdout=io.StringIO(),
+        )
+        seeded = Application.objects.filter(seeker__username__startswith="seed_")
+        job_ids = list(seeded.values_list("job_id", flat=True).distinct())
+        stored = {
+            (row.job_id, row.day, row.status): (
+                row.applications, row.reviewed, row.review_seconds
+            )
+            for row in DailyApplicationCount.objects.filter(job_id__in=job_ids, applications__gt=0)
+        }
+        self.assertTrue(stored)
+        self.assertEqual(stored, analytics.actual_counts(job_ids))
+        self.assertTrue(any(reviewed for _count, reviewed, _seconds in stored.values()))
+        self.assertEqual(
+            ResumeExtraction.objects.filter(application__in=seeded).count(), seeded.count()
+        )
+
+    def test_report_reads_the_funnel_from_rollups(self):
+        employer = User.objects.create_user(
+            "hiring", "hiring@example.com", "pass12345", role="employer"
+        )
+        first, second = [
+            Job.objects.create(employer=employer, title=title, description="Ops", company="Acme")
+            for title in ("Analyst", "Buyer")
+        ]
+        seekers = list(User.objects.filter(username__startswith="seeker").order_by("id")[1:7])
+        now = timezone.now()
+        hour = timedelta(hours=1)
+        rows = [
+            (first, "pending", 2, None),
+            (first, "reviewed", 2, 2 * hour),
+            (first, "shortlisted", 2, 2 * hour),
+            (first, "accepted", 2, 2 * hour),
+            (first, "rejected", 100, hour),
+            (second, "rejected", 0, hour / 2),
+        ]
+        for (job, status, days_ago, review_time), user in zip(rows, seekers):
+            application = Application.objects.create(
+                job=job, seeker=user, resume="resumes/seed.pdf"
+            )
+            applied_at = now - timedelta(days=days_ago)
+            Application.objects.filter(pk=application.pk).update(
+                status=status,
+                applied_at=applied_at,
+                reviewed_at=applied_at + review_time if review_time else None,
+            )
+        self.assertEqual(analytics.reconcile(job_ids=[first.id, second.id]), 2)
+
+        report = analytics.employer_report(employer, 30)
+        self.assertEqual(
+            [(stage["label"], stage["count"], stage["percent"]) for stage in report["funnel"]],
+            [("Applied", 5, 100), ("Reviewed", 4, 80), ("Shortlisted", 2, 40), ("Accepted", 1, 20)],
+        )
+        self.assertEqual(report["review_time"], "1.6 h")
+        self.assertEqual(
+            [(job["title"], job["review_time"]) for job in report["jobs"]],
+            [("Analyst", "2.0 h"), ("Buyer", "30 min")],
+        )
+        self.assertEqual(len(report["chart"]), 30)
+        self.assertEqual(report["chart"][-3], {
+            "start": timezone.localdate() - timedelta(days=2),
+            "end": timezone.localdate() - timedelta(days=2),
+            "count": 4,
+            "percent": 100,
+        })
+        yearly = analytics.employer_report(employer, 365)
+        self.assertEqual(len(yearly["chart"]), 53)
+        self.assertEqual(sum(bar["count"] for bar in yearly["chart"]), 6)
+
+        self.client.force_login(employer)
+        response = self.client.get(reverse("employer_analytics"), {"days": "oops"})
+        self.assertEqual(response.context["days"], analytics.DEFAULT_PERIOD)
+        self.assertContains(response, "Analyst")
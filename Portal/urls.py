@@ -1,6 +1,6 @@
 # urls.py
 from django.urls import path
-from . import views
+from . import api, views
 from django.contrib.auth.views import LogoutView
 
 urlpatterns = [
@@ -9,7 +9,14 @@ urlpatterns = [
     path("login/", views.user_login, name="login"),
     path("logout/", views.user_logout, name="logout"),
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("dashboard/analytics/", views.employer_analytics, name="employer_analytics"),
     path("jobs/", views.job_list, name="job_list"),
+    path("jobs/saved/", views.save_search, name="save_search"),
+    path(
+        "jobs/saved/<int:search_id>/delete/",
+        views.delete_saved_search,
+        name="delete_saved_search",
+    ),
     path("apply/<int:job_id>/", views.apply_job, name="apply_job"),
     path("jobs/<int:job_id>/", views.job_detail, name="job_detail"),
     path("jobs/<int:job_id>/apply/", views.apply_job, name="apply_job"),
@@ -20,6 +27,8 @@ urlpatterns = [
     ),
     path("manage-jobs/", views.manage_jobs, name="manage_jobs"),
     path("post-job/", views.post_job, name="post_job"),
+    path("import-jobs/", views.import_jobs, name="import_jobs"),
+    path("import-jobs/<int:import_id>/", views.job_import, name="job_import"),
     path("edit-job/<int:job_id>/", views.edit_job, name="edit_job"),
     path("delete-job/<int:job_id>/", views.delete_job, name="delete_job"),
     path(
@@ -27,10 +36,19 @@ urlpatterns = [
         views.view_applicants,
         name="view_applications",
     ),
+    path("export/<str:kind>/<str:fmt>/", views.export_data, name="export_data"),
     path(
         "application/<int:application_id>/update-status/<str:status>/",
         views.update_application_status,
         name="update_application_status",
     ),
+    path(
+        "application/<int:application_id>/resume/",
+        views.download_resume,
+        name="download_resume",
+    ),
     path("logout/", LogoutView.as_view(), name="logout"),
+    path("api/<str:version>/jobs/", api.job_list, name="api_job_list"),
+    path("api/<str:version>/jobs/deleted/", api.deleted_jobs, name="api_deleted_jobs"),
+    path("api/<str:version>/jobs/<int:pk>/", api.job_detail, name="api_job_detail"),
 ]
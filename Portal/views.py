@@ -1,11 +1,55 @@
 # views.py
-from django.shortcuts import render, get_object_or_404, redirect
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, QueryDict, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, render, get_object_or_404, redirect
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q
-from .models import User, Job, Application
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.http import urlencode
+from .models import User, Job, Application, JobImport
 from .forms import JobForm, ApplicationForm, UserRegistrationForm
+from . import (
+    alerts, analytics, caching, counters, downloads, exports, facets, geo, imports, ranking,
+    recommendations, resumes, salaries,
+)
+from . import search as job_search
+from .pagination import InvalidCursor, paginate_keyset
+
+JOBS_PER_PAGE = 20
+APPLICANTS_PER_PAGE = 50
+RECENT_IMPORTS = 10
+# Newest applicants first, matching Application.Meta.ordering; ties go in
+# rowid order, which is how application_job_idx stores them.
+APPLICANT_KEYS = [("applied_at", True), ("id", False)]
+# Newest first, matching Job.Meta.ordering; id breaks created_at ties.
+LISTING_KEYS = [("created_at", True), ("id", True)]
+# Only what a listing card renders; the full description stays on job_detail.
+LISTING_FIELDS = [
+    "id",
+    "title",
+    "company",
+    "location",
+    "salary",
+    "summary",
+    "created_at",
+    "employer__username",
+]
+DETAIL_FIELDS = [
+    "id",
+    "title",
+    "company",
+    "description",
+    "location",
+    "salary",
+    "category",
+    "created_at",
+    "employer__username",
+]
 
 
 def home(request):
@@ -47,9 +91,23 @@ def user_logout(request):
 @login_required
 def dashboard(request):
     if request.user.is_seeker():
-        applications = Application.objects.filter(seeker=request.user)
+        applications = Application.objects.filter(seeker=request.user).select_related(
+            "job"
+        )
+        recommended = recommendations.recommended_jobs(
+            [application.job_id for application in applications]
+        )
+        saved_searches = request.user.saved_searches.only("id", "name", "query").order_by(
+            "-created_at"
+        )
         return render(
-            request, "seeker/dashboard_seeker.html", {"applications": applications}
+            request,
+            "seeker/dashboard_seeker.html",
+            {
+                "applications": applications,
+                "recommended": recommended,
+                "saved_searches": saved_searches,
+            },
         )
     else:
         jobs = Job.objects.filter(employer=request.user)
@@ -72,6 +130,53 @@ def post_job(request):
     return render(request, "employer/post_job.html", {"form": form})
 
 
+@login_required
+@user_passes_test(lambda u: u.is_employer())
+def employer_analytics(request):
+    try:
+        days = int(request.GET.get("days", analytics.DEFAULT_PERIOD))
+    except ValueError:
+        days = analytics.DEFAULT_PERIOD
+    if days not in analytics.PERIODS:
+        days = analytics.DEFAULT_PERIOD
+    report = analytics.employer_report(request.user, days)
+    return render(
+        request,
+        "employer/analytics.html",
+        {"report": report, "days": days, "periods": analytics.PERIODS},
+    )
+
+
+@login_required
+@user_passes_test(lambda u: u.is_employer())
+def import_jobs(request):
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        fmt = request.POST.get("format") or (upload and imports.guess_format(upload.name))
+        if upload is None:
+            messages.error(request, "Choose a CSV or NDJSON file to import.")
+        elif fmt not in imports.FORMATS:
+            messages.error(request, "Invalid format.")
+        else:
+            # Large files take a while: process_job_imports does the work
+            job_import = imports.queue_upload(request.user, upload, fmt)
+            messages.success(request, "Your file is queued for import.")
+            return redirect("job_import", job_import.id)
+    recent = request.user.job_imports.defer("errors").order_by("-id")[:RECENT_IMPORTS]
+    return render(
+        request,
+        "employer/import_jobs.html",
+        {"imports": recent, "formats": imports.FORMATS, "fields": list(JobForm.base_fields)},
+    )
+
+
+@login_required
+@user_passes_test(lambda u: u.is_employer())
+def job_import(request, import_id):
+    job_import = get_object_or_404(JobImport, id=import_id, employer=request.user)
+    return render(request, "employer/job_import.html", {"job_import": job_import})
+
+
 @login_required
 def manage_jobs(request):
     # Only show jobs posted by the current user
@@ -82,51 +187,138 @@ def manage_jobs(request):
 @login_required
 def view_applicants(request, job_id):
     job = get_object_or_404(Job, id=job_id, employer=request.user)
+    if request.method == "POST":
+        return _bulk_update_status(request, job)
+
     applications = Application.objects.filter(job=job).select_related("seeker")
+    status = request.GET.get("status", "")
+    if status in counters.STATUSES:
+        applications = applications.filter(status=status)
+    else:
+        status = ""
+    keys = APPLICANT_KEYS
+    query = request.GET.get("q", "").strip()
+    if query:
+        applications = resumes.search_applications(applications, query)
+        if job_search.is_ranked(applications):
+            keys = job_search.RANK_KEYS
+    sort = request.GET.get("sort", "")
+    unscored = applications
+    if sort == "relevance":
+        # Scores are written by score_applicants; this view only reads them
+        applications = applications.filter(relevance__isnull=False)
+        keys = ranking.RELEVANCE_KEYS
+    else:
+        sort = ""
+
+    try:
+        page = paginate_keyset(
+            applications, keys, request.GET.get("cursor"), APPLICANTS_PER_PAGE
+        )
+    except InvalidCursor:
+        page = paginate_keyset(applications, keys, None, APPLICANTS_PER_PAGE)
+    more_unscored = False
+    if sort and not page.has_next:
+        # Applicants still waiting for a score follow the last ranked page,
+        # newest first along application_relevance_idx
+        waiting = list(
+            unscored.filter(relevance__isnull=True).order_by("-id")[: APPLICANTS_PER_PAGE + 1]
+        )
+        more_unscored = len(waiting) > APPLICANTS_PER_PAGE
+        # The page's cursors are already set, so appending leaves paging alone
+        page.object_list += waiting[:APPLICANTS_PER_PAGE]
+    if query:
+        resumes.attach_snippets(page.object_list, query)
 
     return render(
         request,
         "employer/view_applicants.html",
-        {"job": job, "applications": applications},
+        {
+            "job": job,
+            "applications": page,
+            "next_query": _cursor_query(request, page.next_cursor),
+            "prev_query": _cursor_query(request, page.prev_cursor),
+            "query": query,
+            "status": status,
+            "sort": sort,
+            "more_unscored": more_unscored,
+            "statuses": Application.STATUS_CHOICES,
+        },
     )
 
 
-@login_required
-def update_application_status(request, application_id, status):
-    application = get_object_or_404(Application, id=application_id)
-
-    # Ensure the current user owns the job
-    if application.job.employer != request.user:
-        raise Http404("Application not found")
-
-    valid_statuses = ["pending", "reviewed", "shortlisted", "accepted", "rejected"]
-    if status in valid_statuses:
-        application.status = status
-        application.save()
-        messages.success(request, f"Application status updated to {status}.")
-    else:
+def _bulk_update_status(request, job):
+    """Set the selected applications of ``job`` to one status in a single UPDATE."""
+    status = request.POST.get("status")
+    ids = [pk for pk in request.POST.getlist("applications") if pk.isdigit()]
+    labels = dict(Application.STATUS_CHOICES)
+    if status not in labels:
         messages.error(request, "Invalid status.")
-
-    return redirect("seeker/view_applications", job_id=application.job.id)
+    elif not ids:
+        messages.error(request, "Select at least one application.")
+    else:
+        # Filtering on the job keeps other employers' applications out
+        changed = counters.change_status(
+            Application.objects.filter(job=job, id__in=ids), status
+        )
+        moved = sum(changed.values())
+        summary = f"{moved} application{'s' if moved != 1 else ''} marked {labels[status]}"
+        if changed:
+            summary += " (from " + ", ".join(
+                f"{count} {labels[old]}" for old, count in sorted(changed.items())
+            ) + ")"
+        unchanged = len(set(ids)) - moved
+        if unchanged:
+            summary += f"; {unchanged} unchanged or not found"
+        messages.success(request, summary + ".")
+
+    url = reverse("view_applications", args=[job.id])
+    filters = {
+        name: request.POST.get(name, "").strip()
+        for name in ("q", "status", "sort")
+        if request.POST.get(name, "").strip()
+    }
+    return redirect(f"{url}?{urlencode(filters)}" if filters else url)
 
 
 @login_required
 def update_application_status(request, application_id, status):
-    application = get_object_or_404(Application, id=application_id)
+    application = get_object_or_404(
+        Application.objects.select_related("job"), id=application_id
+    )
 
     # Ensure the current user owns the job
-    if application.job.employer != request.user:
+    if application.job.employer_id != request.user.id:
         raise Http404("Application not found")
 
-    valid_statuses = ["pending", "reviewed", "accepted", "rejected"]
-    if status in valid_statuses:
+    if status in counters.STATUSES:
         application.status = status
-        application.save()
+        with transaction.atomic():
+            application.save()
         messages.success(request, f"Application status updated to {status}.")
     else:
         messages.error(request, "Invalid status.")
 
-    return redirect("seeker/view_applications", job_id=application.job.id)
+    return redirect("view_applications", job_id=application.job_id)
+
+
+@login_required
+def download_resume(request, application_id):
+    # Only the job's employer and the seeker who applied may read the resume
+    application = get_object_or_404(
+        Application.objects.filter(Q(job__employer=request.user) | Q(seeker=request.user))
+        .only("resume", "resume_name"),
+        id=application_id,
+    )
+    if not application.resume:
+        raise Http404("No resume")
+    return downloads.serve(
+        request,
+        application.resume.storage,
+        application.resume.name,
+        application.resume_name,
+        as_attachment="download" in request.GET,
+    )
 
 
 @login_required
@@ -159,37 +351,252 @@ def delete_job(request, job_id):
     return redirect("manage_jobs")
 
 
-def job_list(request):
-    search = request.GET.get("search", "")
-    jobs = Job.objects.all()
+@login_required
+@user_passes_test(lambda u: u.is_seeker())
+def save_search(request):
+    params = QueryDict(request.POST.get("query", ""))
+    if request.method == "POST":
+        try:
+            saved = alerts.save_search(request.user, params, request.POST.get("name", ""))
+        except ValueError as exc:
+            messages.error(request, str(exc))
+        else:
+            messages.success(
+                request, f'Search "{saved.name}" saved. New matching jobs will be emailed to you.'
+            )
+    query = request.POST.get("query", "")
+    return redirect(f"{reverse('job_list')}?{query}" if query else "job_list")
 
-    if search:
-        jobs = jobs.filter(
-            Q(title__icontains=search)
-            | Q(company__icontains=search)
-            | Q(description__icontains=search)
-        )
 
-    applied_jobs = []
-    if request.user.is_authenticated:
-        applied_jobs = Application.objects.filter(
-            seeker=request.user  # Changed from 'user' to 'seeker'
-        ).values_list("job_id", flat=True)
+@login_required
+def delete_saved_search(request, search_id):
+    saved = get_object_or_404(request.user.saved_searches, id=search_id)
 
-    return render(
+    if request.method == "POST":
+        saved.delete()
+        messages.success(request, f'Saved search "{saved.name}" deleted.')
+
+    return redirect("dashboard")
+
+
+@login_required
+@user_passes_test(lambda u: u.is_employer())
+async def export_data(request, kind, fmt):
+    """Stream the employer's jobs or applications as CSV or NDJSON."""
+    if kind not in exports.KINDS or fmt not in exports.FORMATS:
+        raise Http404("Unknown export")
+    user = await request.auser()
+    job_id = request.GET.get("job")
+    if job_id is not None:
+        if not job_id.isdigit():
+            raise Http404("Job not found")
+        job = await aget_object_or_404(Job.objects.only("id"), id=job_id, employer=user)
+        job_id = job.id
+
+    # ASGI servers consume an async iterator without holding a thread; WSGI
+    # would buffer one, so it keeps the plain generator
+    stream = exports.astream if isinstance(request, ASGIRequest) else exports.stream
+    response = StreamingHttpResponse(
+        stream(kind, fmt, user, job_id), content_type=exports.FORMATS[fmt][0]
+    )
+    name = f"{kind}-job-{job_id}" if job_id else kind
+    response["Content-Disposition"] = f'attachment; filename="{name}.{fmt}"'
+    return response
+
+
+@caching.cache_public_page(lambda request: [caching.LISTING])
+async def job_list(request):
+    search = request.GET.get("search", "")
+    versions = await caching.aget_versions([caching.LISTING])
+    token, _modified = versions[caching.LISTING]
+    loaded = {}
+    listing = await caching.aget_or_build(
+        f"portal:listing:{caching.fingerprint(request.GET.urlencode(), token)}",
+        lambda: sync_to_async(_build_listing)(request, search, loaded),
+    )
+    cards = await sync_to_async(_job_cards)(listing["job_ids"], listing["snippets"], loaded)
+
+    # Per-user state is layered over the shared cached listing
+    applied_jobs = set()
+    if request.user.is_authenticated:
+        applied_jobs = {
+            job_id
+            async for job_id in Application.objects.filter(
+                seeker=request.user, job_id__in=listing["job_ids"]
+            ).values_list("job_id", flat=True)
+        }
+
+    return await sync_to_async(render)(
         request,
         "seeker/job_list.html",
-        {"jobs": jobs, "search": search, "applied_jobs": applied_jobs},
+        {
+            "cards": cards,
+            "next_cursor": listing["next_cursor"],
+            "next_query": _cursor_query(request, listing["next_cursor"]),
+            "prev_query": _cursor_query(request, listing["prev_cursor"]),
+            "search": search,
+            "salary_min": request.GET.get("salary_min", ""),
+            "salary_max": request.GET.get("salary_max", ""),
+            "currency": request.GET.get("currency", ""),
+            "currencies": salaries.CURRENCIES,
+            "near": request.GET.get("near", ""),
+            "radius": request.GET.get("radius") or str(geo.DEFAULT_RADIUS_KM),
+            "radii": [10, geo.DEFAULT_RADIUS_KM, 50, 100, 250],
+            "errors": listing["errors"],
+            "sort": request.GET.get("sort", ""),
+            "facets": listing["facets"],
+            "filtered": listing["filtered"],
+            "applied_jobs": applied_jobs,
+            "query": request.GET.urlencode(),
+        },
     )
 
 
-def job_detail(request, job_id):
-    job = get_object_or_404(Job, id=job_id)
+def _build_listing(request, search, loaded):
+    """The user-independent part of a job_list page, safe to cache."""
+    jobs = Job.objects.select_related("employer").only(*LISTING_FIELDS)
+    keys = LISTING_KEYS
+    selected = facets.selected_facets(request.GET)
+    jobs = facets.filter_jobs(jobs, selected)
+    errors = []
+    try:
+        salary = salaries.selected_range(request.GET)
+    except ValueError as exc:
+        salary = None
+        errors.append(str(exc))
+    sort = request.GET.get("sort")
+    if sort == "salary" and salary is None:
+        salary = (salaries.DEFAULT_CURRENCY, None, None)
+    if salary is not None:
+        jobs = salaries.filter_jobs(jobs, salary)
+    try:
+        area = geo.selected_area(request.GET)
+    except ValueError as exc:
+        area = None
+        errors.append(str(exc))
+    if area is not None:
+        jobs = geo.filter_jobs(jobs, area)
+
+    if search:
+        jobs = job_search.search_jobs(jobs, search)
+        if job_search.is_ranked(jobs):
+            keys = job_search.RANK_KEYS
+    if sort == "salary":
+        jobs = jobs.only(*LISTING_FIELDS, "salary_max")
+        keys = salaries.SALARY_KEYS
+    elif sort == "distance" and area is not None:
+        keys = geo.DISTANCE_KEYS
+
+    try:
+        page = paginate_keyset(jobs, keys, request.GET.get("cursor"), JOBS_PER_PAGE)
+    except InvalidCursor:
+        page = paginate_keyset(jobs, keys, None, JOBS_PER_PAGE)
+    if search:
+        job_search.attach_snippets(page.object_list, search)
+    loaded.update((job.id, job) for job in page)
+
+    return {
+        "job_ids": [job.id for job in page],
+        "snippets": {
+            job.id: job.snippet for job in page if getattr(job, "snippet", None)
+        },
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+        "facets": _facet_links(request, facets.facet_counts(selected)),
+        "filtered": bool(selected) or salary is not None or area is not None,
+        "errors": errors,
+    }
+
+
+def _job_cards(job_ids, snippets, loaded):
+    """Rendered listing cards, cached per job version and search snippet."""
+    scopes = {job_id: caching.job_scope(job_id) for job_id in job_ids}
+    versions = caching.get_versions(scopes.values())
+    keys = {
+        job_id: "portal:card:%s:%s:%s"
+        % (job_id, versions[scope][0], caching.fingerprint(snippets.get(job_id, "")))
+        for job_id, scope in scopes.items()
+    }
+
+    def render_cards(missing):
+        jobs = {job_id: loaded[job_id] for job_id in missing if job_id in loaded}
+        unloaded = [job_id for job_id in missing if job_id not in jobs]
+        if unloaded:
+            jobs.update(
+                Job.objects.select_related("employer")
+                .only(*LISTING_FIELDS)
+                .in_bulk(unloaded)
+            )
+        return {
+            job_id: render_to_string(
+                "seeker/job_card.html",
+                {"job": job, "snippet": snippets.get(job_id)},
+            )
+            for job_id, job in jobs.items()
+        }
+
+    html = caching.get_or_build_many(keys, render_cards)
+    return [{"id": job_id, "html": html[job_id]} for job_id in job_ids if job_id in html]
+
+
+def _facet_links(request, counts):
+    """Facet values as plain dicts, each with the query string that toggles it."""
+    links = {}
+    for facet, values in counts.items():
+        links[facet] = []
+        for value in values:
+            params = request.GET.copy()
+            params.pop("cursor", None)
+            chosen = [v for v in params.getlist(facet) if Job.normalize_facet(v) != value.value]
+            if not value.selected:
+                chosen.append(value.value)
+            params.setlist(facet, chosen)
+            links[facet].append(
+                {
+                    "value": value.value,
+                    "label": value.label,
+                    "count": value.count,
+                    "selected": value.selected,
+                    "query": params.urlencode(),
+                }
+            )
+    return links
+
+
+def _cursor_query(request, cursor):
+    if not cursor:
+        return ""
+    params = request.GET.copy()
+    params["cursor"] = cursor
+    return params.urlencode()
+
+
+@caching.cache_public_page(lambda request, job_id: [caching.job_scope(job_id)])
+async def job_detail(request, job_id):
+    if request.user.is_authenticated and request.user.is_employer():
+        # Owners see live application counters, which change without a version bump
+        job = await aget_object_or_404(Job.objects.select_related("employer"), id=job_id)
+    else:
+        scope = caching.job_scope(job_id)
+        versions = await caching.aget_versions([scope])
+        token, _modified = versions[scope]
+        job = await caching.aget_or_build(
+            f"portal:job:{job_id}:{token}",
+            lambda: Job.objects.select_related("employer")
+            .only(*DETAIL_FIELDS)
+            .filter(id=job_id)
+            .afirst(),
+        )
+        if job is None:
+            raise Http404("No Job matches the given query.")
+
     has_applied = False
     if request.user.is_authenticated and request.user.is_seeker():
-        has_applied = Application.objects.filter(job=job, seeker=request.user).exists()
+        has_applied = await Application.objects.filter(
+            job_id=job.id, seeker=request.user
+        ).aexists()
 
-    return render(
+    return await sync_to_async(render)(
         request, "seeker/job_detail.html", {"job": job, "has_applied": has_applied}
     )
 
@@ -211,7 +618,8 @@ def apply_job(request, job_id):
             application = form.save(commit=False)
             application.job = job
             application.seeker = request.user
-            application.save()
+            with transaction.atomic():
+                application.save()
             messages.success(request, "Application submitted successfully!")
             return redirect("dashboard")
     else:
@@ -224,11 +632,11 @@ def apply_job(request, job_id):
 @user_passes_test(lambda u: u.is_employer())
 def view_applications(request, job_id):
     job = get_object_or_404(Job, id=job_id, employer=request.user)
-    applications = job.applications.all()
+    applications = job.applications.select_related("seeker")
 
     return render(
         request,
-        "seeker/view_applications.html",
+        "seeker/view_application.html",
         {
             "job": job,
             "applications": applications,